@@ -0,0 +1,71 @@
+"""Cost of 1,000 manual kills with every enemy type in the bestiary.
+
+Run from the repository root:
+    python benchmarks/bench_bestiary.py
+
+"reset" rebuilds the whole enemies tab after every kill, as the widget per
+enemy version had to re-format every row. "rows" is the current path, where
+a kill only reports the rows of the enemies it changed. Both run with the
+enemies tab on screen, so the repaints are included.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from PyQt6.QtWidgets import QApplication
+
+from rpg_game import RPGGame
+
+KILLS = 1000
+
+
+def run(app, mode):
+    window = RPGGame()
+    window.show()
+    window.start_new_game()
+    engine = window.engine
+    # Defeat every enemy type once so the bestiary is full
+    engine.record_defeats(len(engine.enemy_ids) * 4)
+    for enemy_id in engine.enemy_ids:
+        engine.enemy_id = enemy_id
+        engine.record_defeats(1)
+    engine.pop_events()
+    window.update_enemy_stats_display()
+    window.tab_widget.setCurrentIndex(window.tab_widget.count() - 1)
+    app.processEvents()
+
+    rows = 0
+    start = time.perf_counter()
+    for kill in range(KILLS):
+        engine.damage_enemy(engine.enemy_hp, manual=True)
+        events = engine.pop_events()
+        if mode == "reset":
+            window.update_enemy_stats_display()
+            rows += window.bestiary_model.rowCount()
+        else:
+            for event in events:
+                if event[0] != "enemy_defeated":
+                    continue
+                window.bestiary_model.update_enemies(event[4])
+                rows += window.bestiary_model.changed_rows
+        app.processEvents()
+    total = time.perf_counter() - start
+
+    print(f"{mode:<8}{total / KILLS * 1000:>8.3f}{rows / KILLS:>12.1f}{window.bestiary_model.rowCount():>9}")
+    window.close()
+
+
+def main():
+    app = QApplication(sys.argv)
+    print("mode    ms/kill  rows/kill  enemies")
+    for mode in ("reset", "rows"):
+        run(app, mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Startup time and memory of loading the enemy images eagerly vs through EnemyImageCache.
+
+Run from the repository root:
+    python benchmarks/bench_enemy_images.py
+
+Each mode runs in a fresh process so the resident set sizes do not mix.
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ENEMY_DIRECTORY = os.path.join(ROOT, "images", "enemies")
+
+
+def rss_mb():
+    """Resident set size of this process in MB (Linux), or None"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def run(mode):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QGuiApplication, QPixmap
+    from image_cache import EnemyImageCache
+
+    app = QGuiApplication(sys.argv)
+    before = rss_mb()
+    start = time.perf_counter()
+    if mode == "eager":
+        # What load_enemy_images() used to do: decode every PNG up front
+        images = {}
+        for name in sorted(os.listdir(ENEMY_DIRECTORY)):
+            images[name] = QPixmap(os.path.join(ENEMY_DIRECTORY, name))
+        first = images[sorted(images)[0]]
+    else:
+        images = EnemyImageCache(ENEMY_DIRECTORY)
+        first = images.get(sorted(images.keys())[0])
+    elapsed = time.perf_counter() - start
+    after = rss_mb()
+    assert not first.isNull()
+    growth = "n/a" if before is None else f"{after - before:.0f} MB"
+    print(f"{mode:<6}{len(images):>8}{elapsed * 1000:>10.0f} ms{growth:>12}")
+
+
+def main():
+    print("mode   images   startup   RSS growth")
+    for mode in ("eager", "lazy"):
+        subprocess.run([sys.executable, __file__, mode], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run(sys.argv[1])
+    else:
+        main()
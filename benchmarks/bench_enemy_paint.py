@@ -0,0 +1,101 @@
+"""Paint cost of EnemyButton with whole-widget updates vs dirty-region refresh().
+
+Run from the repository root:
+    python benchmarks/bench_enemy_paint.py
+
+Simulates a minute of play with a 5,000 DPS party ticking four times a
+second and the player clicking eight times a second, on the offscreen
+platform.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from PyQt6.QtWidgets import QApplication
+
+from game_engine import RPGEngine, Upgrade
+from image_cache import shared_enemy_images
+from rpg_game import EnemyButton
+
+SECONDS = 60
+TICKS_PER_SECOND = 4
+CLICKS_PER_TICK = 2
+DPS = 5000
+
+
+class MeasuredEnemyButton(EnemyButton):
+    """EnemyButton that counts its paints, painted area and paint time"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.paints = 0
+        self.area = 0
+        self.seconds = 0.0
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        super().paintEvent(event)
+        self.seconds += time.perf_counter() - start
+        self.paints += 1
+        self.area += event.rect().width() * event.rect().height()
+
+
+def run(app, mode):
+    enemy_images = shared_enemy_images("images/enemies")
+    engine = RPGEngine([Upgrade("Party", 10, DPS / 2, "", "")], enemy_images.keys(), seed=1)
+    engine.currency = 10
+    engine.buy("Party")  # Production is base_production * 2 after the first unit
+    button = MeasuredEnemyButton(engine, enemy_images)
+    button.show()
+    app.processEvents()
+    button.paints = button.area = 0
+    button.seconds = 0.0
+
+    def invalidate(rect=None):
+        if mode == "full":
+            button.update()
+        else:
+            if rect is None:
+                button.refresh()
+            else:
+                button.frame_clock.invalidate(button, rect)
+            # Hand the invalidated rects to Qt now instead of on the next frame
+            button.frame_clock.flush()
+
+    start = time.perf_counter()
+    for _ in range(SECONDS * TICKS_PER_SECOND):
+        engine.tick(1 / TICKS_PER_SECOND)
+        invalidate()
+        app.processEvents()
+        for _ in range(CLICKS_PER_TICK):
+            engine.click()
+            invalidate()
+            # The 100 ms click animation, without waiting for its timer
+            button.is_clicked = True
+            invalidate(button.image_rect)
+            app.processEvents()
+            button.is_clicked = False
+            invalidate(button.image_rect)
+            app.processEvents()
+        engine.pop_events()
+    total = time.perf_counter() - start
+
+    print(f"{mode:<7}{button.paints / SECONDS:>10.1f}{button.area / SECONDS / 1000:>12.0f}"
+          f"{button.seconds / SECONDS * 1000:>12.2f}{total / SECONDS * 1000:>13.2f}")
+    button.deleteLater()
+
+
+def main():
+    app = QApplication(sys.argv)
+    print("mode   paints/s   kpx/s   paint ms/s   loop ms/s")
+    for mode in ("full", "dirty"):
+        run(app, mode)
+
+
+if __name__ == "__main__":
+    main()
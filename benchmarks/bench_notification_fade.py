@@ -0,0 +1,64 @@
+"""Paint cost of one NotificationOverlay fade frame in the RPG game window.
+
+Run from the repository root:
+    python benchmarks/bench_notification_fade.py
+
+Steps the 500 ms fade-in through the frame clock's frames on the offscreen
+platform and times the repaint each step triggers.
+"""
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from PyQt6.QtWidgets import QApplication
+
+from rpg_game import RPGGame
+
+ROUNDS = 20
+
+
+def main():
+    app = QApplication(sys.argv)
+    window = RPGGame()
+    window.show()
+    window.start_new_game()
+    app.processEvents()
+    overlay = window.notification_overlay
+    clock = overlay.frame_clock
+
+    frame_times = []
+    for _ in range(ROUNDS):
+        overlay.show_notification("Benchmark", "⏱️", "One fade frame\nat a time", 60000)
+        clock.flush()
+        app.processEvents()
+        start = overlay.fade_start
+        frame = 0
+        while True:
+            now = start + frame * clock.frame_seconds
+            begin = time.perf_counter()
+            running = overlay.fade_step(now)
+            clock.flush()
+            app.processEvents()
+            frame_times.append(time.perf_counter() - begin)
+            frame += 1
+            if not running:
+                break
+        overlay.hide_animation()
+        overlay.fade_step(overlay.fade_start + overlay.fade_duration)
+        clock.cancel((overlay, "fade"))
+        app.processEvents()
+
+    frame_times.sort()
+    print(f"overlay {overlay.width()}x{overlay.height()}, {len(frame_times)} fade frames")
+    print(f"median {statistics.median(frame_times) * 1e6:8.0f} µs/frame")
+    print(f"p90    {frame_times[int(len(frame_times) * 0.9)] * 1e6:8.0f} µs/frame")
+
+
+if __name__ == "__main__":
+    main()
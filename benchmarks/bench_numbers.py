@@ -0,0 +1,66 @@
+"""Compare BigNumber with float, on its own and inside ClickerEngine.tick().
+
+Run from the repository root:
+    python benchmarks/bench_numbers.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_engine import BigNumber, ClickerEngine, Upgrade, BIG_NUMBER_START, format_number
+
+NUMBER = 200000
+
+
+class FloatClickerEngine(ClickerEngine):
+    """ClickerEngine as it was before BigNumber: plain float currency"""
+
+    def earn(self, amount):
+        self.currency += amount
+        self.total_currency += amount
+
+
+def per_call(statement, setup_globals):
+    """Best of 5 runs, in nanoseconds per call"""
+    timer = timeit.Timer(statement, globals=setup_globals)
+    return min(timer.repeat(5, NUMBER)) / NUMBER * 1e9
+
+
+def make_engine(engine_class, currency):
+    engine = engine_class([Upgrade("Cursor", 10, 0.1, "", ""), Upgrade("Grandma", 50, 0.5, "", "", "Cursor")])
+    engine.currency = 1000
+    engine.buy("Cursor", 5)
+    engine.buy("Grandma", 2)
+    engine.unlock_achievement("Coin Master")
+    engine.unlock_achievement("Coin Empire")
+    engine.currency = engine.total_currency = currency
+    engine.earn(0)
+    return engine
+
+
+def main():
+    values = {"f": 1234.5, "g": 0.25, "b": BigNumber(1234.5), "c": BigNumber(0.25)}
+    print("operation                 float ns   BigNumber ns")
+    for name, statement in (("add", "{0} + {1}"), ("multiply", "{0} * {1}"), ("compare", "{0} < {1}")):
+        float_ns = per_call(statement.format("f", "g"), values)
+        big_ns = per_call(statement.format("b", "c"), values)
+        print(f"{name:<24}{float_ns:>10.0f}{big_ns:>15.0f}")
+    print(f"{'format':<24}{per_call('format_number(f)', dict(values, format_number=format_number)):>10.0f}"
+          f"{per_call('format_number(b * 1e20)', dict(values, format_number=format_number)):>15.0f}")
+
+    print()
+    print("ClickerEngine.tick(0.25)  ns/tick")
+    for label, engine_class, currency in (
+            ("float engine, 1e6 coins", FloatClickerEngine, 1e6),
+            ("current engine, 1e6 coins", ClickerEngine, 1e6),
+            ("current engine, 1e20 coins", ClickerEngine, 1e20),
+            ("current engine, 2^1001 coins", ClickerEngine, BIG_NUMBER_START * 2),
+            ("current engine, 1e400 coins", ClickerEngine, BigNumber(1e300) * 1e100)):
+        engine = make_engine(engine_class, currency)
+        print(f"{label:<30}{per_call('engine.tick(0.25)', {'engine': engine}):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
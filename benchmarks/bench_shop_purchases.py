@@ -0,0 +1,66 @@
+"""Cost of 1,000 consecutive shop purchases in the RPG game window.
+
+Run from the repository root:
+    python benchmarks/bench_shop_purchases.py
+
+"rescan" repeats what every purchase used to do after buying, a full
+update_visible_upgrades() over the whole catalogue. "events" is the current
+path, where only first_purchase events insert rows into the shop model.
+"relayouts" counts the row insertions and model resets the shop view had to
+lay out.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from PyQt6.QtWidgets import QApplication
+
+from rpg_game import RPGGame
+
+PURCHASES = 1000
+
+
+def run(app, mode):
+    window = RPGGame()
+    window.show()
+    window.start_new_game()
+    app.processEvents()
+
+    relayouts = [0]
+
+    def count_relayout(*args):
+        relayouts[0] += 1
+    model = window.shop_model
+    model.rowsInserted.connect(count_relayout)
+    model.modelReset.connect(count_relayout)
+
+    upgrades = window.engine.upgrades
+    start = time.perf_counter()
+    for purchase in range(PURCHASES):
+        # Round robin over the rows the player can see and buy
+        window.engine.currency = 1e300
+        candidates = [upgrades[index] for index in model.rows if window.engine.is_available(upgrades[index])]
+        window.buy_upgrade(candidates[purchase % len(candidates)])
+        if mode == "rescan":
+            window.update_visible_upgrades()
+        app.processEvents()
+    total = time.perf_counter() - start
+
+    print(f"{mode:<8}{total / PURCHASES * 1000:>10.3f}{relayouts[0]:>11}{len(model.rows):>9}")
+    window.close()
+
+
+def main():
+    app = QApplication(sys.argv)
+    print("mode    ms/purchase  relayouts  visible")
+    for mode in ("rescan", "events"):
+        run(app, mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Render cost of the custom game widgets, rendered offscreen into a QImage.
+
+Run from the repository root:
+    python benchmarks/bench_widgets.py
+    python benchmarks/bench_widgets.py --only enemy --frames 5000
+    python benchmarks/bench_widgets.py --save-baseline widgets.json
+    python benchmarks/bench_widgets.py --baseline widgets.json --tolerance 0.25
+    python benchmarks/bench_widgets.py --max-us coin_button=40 --max-us notification_fade=400
+
+Every case renders its widget --frames times (after a warm up) and reports
+µs per frame at the 50th, 90th and 99th percentile. The exit status is 1 if
+a median is over its --max-us limit or more than --tolerance above the
+--baseline file, so the script can guard rendering changes on a headless box.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage
+from PyQt6.QtWidgets import QApplication, QWidget
+
+import clicker_game
+import rpg_game
+from game_engine import RPGEngine
+from image_cache import shared_enemy_images
+
+WARM_UP_FRAMES = 50
+
+
+def coin_button_case(pressed):
+    button = clicker_game.CoinButton()
+    button.is_clicked = pressed
+
+    def prepare(frame):
+        button.current_frame = frame % button.total_frames
+    return button, prepare
+
+
+def enemy_button_case(hp_percent, pressed=False):
+    enemy_images = shared_enemy_images("images/enemies")
+    engine = RPGEngine([], enemy_images.keys(), seed=1)
+    engine.enemy_hp = engine.max_hp * hp_percent / 100
+    button = rpg_game.EnemyButton(engine, enemy_images)
+    button.is_clicked = pressed
+    return button, None
+
+
+def notification_fade_case():
+    window = QWidget()
+    window.resize(800, 600)
+    overlay = rpg_game.NotificationOverlay(window)
+    overlay.show_notification("Achievement Unlocked!", "🏆", "Benchmark\nRender one fade frame", 60000)
+    overlay.frame_clock.cancel((overlay, "fade"))
+    overlay.frame_clock.cancel((overlay, "hide"))
+
+    def prepare(frame):
+        # Sweep the whole fade, 30 frames at 60 fps
+        overlay.opacity = (frame % 30 + 1) / 30
+    # Keep the parent alive alongside the overlay
+    overlay.bench_window = window
+    return overlay, prepare
+
+
+CASES = {
+    "coin_button": lambda: coin_button_case(False),
+    "coin_button_pressed": lambda: coin_button_case(True),
+    "coin_icon": lambda: (clicker_game.CoinIconLabel(), None),
+    "xp_icon": lambda: (rpg_game.XPIconLabel(), None),
+    "enemy_hp_100": lambda: enemy_button_case(100),
+    "enemy_hp_60": lambda: enemy_button_case(60),
+    "enemy_hp_30": lambda: enemy_button_case(30),
+    "enemy_hp_5": lambda: enemy_button_case(5),
+    "enemy_pressed": lambda: enemy_button_case(50, pressed=True),
+    "notification_fade": notification_fade_case,
+}
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def measure(widget, prepare, frames):
+    """Return the sorted render times of widget in µs"""
+    image = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    times = []
+    for frame in range(WARM_UP_FRAMES + frames):
+        if prepare is not None:
+            prepare(frame)
+        image.fill(Qt.GlobalColor.transparent)
+        start = time.perf_counter()
+        widget.render(image)
+        elapsed = time.perf_counter() - start
+        if frame >= WARM_UP_FRAMES:
+            times.append(elapsed * 1e6)
+    times.sort()
+    return times
+
+
+def parse_limits(values):
+    limits = {}
+    for value in values:
+        name, _, limit = value.partition("=")
+        if name not in CASES or not limit:
+            raise SystemExit(f"--max-us expects CASE=MICROSECONDS with a case from: {', '.join(CASES)}")
+        limits[name] = float(limit)
+    return limits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render cost of the custom game widgets")
+    parser.add_argument("--frames", type=int, default=2000, help="frames rendered per case")
+    parser.add_argument("--only", default="", help="only run cases whose name contains this")
+    parser.add_argument("--max-us", action="append", default=[], metavar="CASE=US",
+                        help="fail if the median of CASE is over US microseconds")
+    parser.add_argument("--baseline", help="JSON file of medians from --save-baseline to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against --baseline, 0.25 = 25%%")
+    parser.add_argument("--save-baseline", help="write the medians of this run to a JSON file")
+    args = parser.parse_args()
+    limits = parse_limits(args.max_us)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    app = QApplication(sys.argv)
+    medians = {}
+    failures = []
+    print(f"{'case':<22}{'p50 µs':>10}{'p90 µs':>10}{'p99 µs':>10}")
+    for name, make_case in CASES.items():
+        if args.only not in name:
+            continue
+        widget, prepare = make_case()
+        times = measure(widget, prepare, args.frames)
+        median = medians[name] = percentile(times, 0.5)
+        print(f"{name:<22}{median:>10.1f}{percentile(times, 0.9):>10.1f}{percentile(times, 0.99):>10.1f}")
+
+        if name in limits and median > limits[name]:
+            failures.append(f"{name}: median {median:.1f} µs is over the {limits[name]:.1f} µs limit")
+        if name in baseline and median > baseline[name] * (1 + args.tolerance):
+            failures.append(f"{name}: median {median:.1f} µs is more than {args.tolerance:.0%} "
+                            f"over the baseline {baseline[name]:.1f} µs")
+        widget.deleteLater()
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(medians, f, indent=2)
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
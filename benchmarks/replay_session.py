@@ -0,0 +1,42 @@
+"""Replay a session recorded with --record as fast as possible.
+
+    python clicker_game.py --record session.json
+    python benchmarks/replay_session.py session.json
+
+Prints the replay time and a digest of the final state. The digest is the
+same on every run, so a recording doubles as a regression test.
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_engine import replay_recording, run_seconds
+
+
+def main(path):
+    with open(path, "r") as f:
+        recording = json.load(f)
+
+    start = time.perf_counter()
+    engine = replay_recording(recording)
+    elapsed = time.perf_counter() - start
+
+    entries = recording["entries"]
+    # Tick runs count once per tick
+    counts = [entry[3] if len(entry) > 3 else 1 for entry in entries]
+    session_seconds = 0
+    if entries:
+        session_seconds = entries[-1][0] if counts[-1] == 1 else run_seconds(entries[-1][0], entries[-1][2][0], counts[-1] - 1)
+    state = json.dumps(engine.to_save_data(), sort_keys=True)
+    print(f"{sum(counts)} inputs in {len(entries)} entries covering {session_seconds:.0f}s replayed in {elapsed:.3f}s")
+    print(f"final state sha1 {hashlib.sha1(state.encode()).hexdigest()}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    main(sys.argv[1])
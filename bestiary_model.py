@@ -0,0 +1,223 @@
+"""Bestiary of the defeated enemies, shown on the enemies tab of rpg_game.py and space_game.py.
+
+BestiaryModel has one row per enemy type in engine.enemy_stats and formats
+it on demand, so the tab owns no widgets per enemy. A kill reports only the
+rows of the enemies it changed. BestiaryProxy sorts and filters the rows and
+BestiaryView shows them with fixed row heights, so BestiaryDelegate only
+paints, and only loads thumbnails for, the rows on screen.
+"""
+import time
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QSortFilterProxyModel
+from PyQt6.QtGui import QColor, QFont, QFontMetrics
+from PyQt6.QtWidgets import QAbstractItemView, QHeaderView, QStyledItemDelegate, QTableView
+
+from game_engine import TIMESTAMP_FORMAT
+
+ENEMY_ID_ROLE = Qt.ItemDataRole.UserRole
+DEFEATS_ROLE = Qt.ItemDataRole.UserRole + 1
+LAST_DEFEATED_ROLE = Qt.ItemDataRole.UserRole + 2
+# Rank of the last defeat, higher is more recent
+RECENT_ROLE = Qt.ItemDataRole.UserRole + 3
+
+# Sort orders offered by the enemies tab, None keeps the order of first defeat
+SORT_ORDERS = {
+    "First defeated": None,
+    "Most defeated": DEFEATS_ROLE,
+    "Most recent": RECENT_ROLE,
+}
+
+THUMBNAIL_SIZE = 80
+ROW_MARGIN = 5
+
+
+def timestamp_key(text):
+    """Sort key of a statistics timestamp, unreadable ones sort as the oldest"""
+    try:
+        return tuple(time.strptime(text, TIMESTAMP_FORMAT))
+    except (TypeError, ValueError):
+        return ()
+
+
+class BestiaryModel(QAbstractListModel):
+    """Rows are the enemy ids of engine.enemy_stats in order of first defeat.
+
+    reset_stats() rebuilds the rows after a new game or load, update_enemies()
+    appends or reports the rows of the enemies named by an enemy_defeated
+    event. Thumbnails are requested from the enemy image cache the first
+    time a row is painted.
+    """
+
+    def __init__(self, engine, enemy_images, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.enemy_images = enemy_images
+        self.enemy_ids = []
+        self.row_of = {}
+        self.recent = {}  # Enemy id -> rank of its last defeat
+        self.next_rank = 0
+        # (enemy id, device pixel ratio) of the thumbnails being loaded. The pixmaps
+        # themselves stay in the image cache, under its byte budget.
+        self.loading_thumbnails = set()
+        self.requesting = None  # Thumbnail being requested, its callback may run right away
+        self.changed_rows = 0  # Rows reported by the last update_enemies(), for benchmarks
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.enemy_ids)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        enemy_id = self.enemy_ids[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.engine.enemy_stats[enemy_id]["name"]
+        if role == ENEMY_ID_ROLE:
+            return enemy_id
+        if role == DEFEATS_ROLE:
+            return self.engine.enemy_stats[enemy_id]["defeats"]
+        if role == LAST_DEFEATED_ROLE:
+            return self.engine.enemy_stats[enemy_id]["last_defeated"]
+        if role == RECENT_ROLE:
+            return self.recent[enemy_id]
+        return None
+
+    def reset_stats(self):
+        """List every enemy of engine.enemy_stats, e.g. after a new game or load"""
+        self.beginResetModel()
+        stats = self.engine.enemy_stats
+        self.enemy_ids = list(stats)
+        self.row_of = {enemy_id: row for row, enemy_id in enumerate(self.enemy_ids)}
+        # Saves only keep the time of the last defeat, rank the enemies by it
+        by_time = sorted(self.enemy_ids, key=lambda enemy_id: timestamp_key(stats[enemy_id]["last_defeated"]))
+        self.recent = {enemy_id: rank for rank, enemy_id in enumerate(by_time)}
+        self.next_rank = len(by_time)
+        self.endResetModel()
+
+    def update_enemies(self, enemy_ids):
+        """Append or report the rows of enemy_ids, whose statistics just changed"""
+        self.changed_rows = 0
+        for enemy_id in enemy_ids:
+            if enemy_id not in self.engine.enemy_stats:
+                continue
+            self.recent[enemy_id] = self.next_rank
+            self.next_rank += 1
+            row = self.row_of.get(enemy_id)
+            if row is None:
+                row = len(self.enemy_ids)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.enemy_ids.append(enemy_id)
+                self.row_of[enemy_id] = row
+                self.endInsertRows()
+            else:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+            self.changed_rows += 1
+
+    def thumbnail(self, enemy_id, device_pixel_ratio):
+        """Return the thumbnail of enemy_id from the image cache, or None while it loads"""
+        key = (enemy_id, device_pixel_ratio)
+        if key in self.loading_thumbnails:
+            return None
+        # Cached and atlas thumbnails are delivered right away, evicted ones are loaded again
+        self.loading_thumbnails.add(key)
+        self.requesting = key
+        pixmap = self.enemy_images.request_scaled(
+            enemy_id, THUMBNAIL_SIZE, device_pixel_ratio, lambda pixmap: self.thumbnail_loaded(key, pixmap))
+        self.requesting = None
+        return pixmap
+
+    def thumbnail_loaded(self, key, pixmap):
+        self.loading_thumbnails.discard(key)
+        # A thumbnail delivered while its row is painted needs no repaint
+        row = self.row_of.get(key[0])
+        if pixmap is not None and key != self.requesting and row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+
+class BestiaryProxy(QSortFilterProxyModel):
+    """Sorts a BestiaryModel by one of SORT_ORDERS and filters it by enemy name"""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(model)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        # Kills move their rows to the new sort position
+        self.setDynamicSortFilter(True)
+
+    def sort_by(self, role):
+        if role is None:
+            self.sort(-1)  # Source order, first defeated first
+            return
+        self.setSortRole(role)
+        self.sort(0, Qt.SortOrder.DescendingOrder)
+
+
+class BestiaryDelegate(QStyledItemDelegate):
+    """Paints a row as the enemy's thumbnail next to its name, defeats and last defeat"""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.font = QFont("Arial", 12)
+        self.name_font = QFont("Arial", 12, QFont.Weight.Bold)
+        self.line_height = max(QFontMetrics(self.font).height(), QFontMetrics(self.name_font).height())
+
+    def sizeHint(self, option, index):
+        return QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE + 2 * ROW_MARGIN)
+
+    def paint(self, painter, option, index):
+        rect = option.rect.adjusted(ROW_MARGIN, ROW_MARGIN, -ROW_MARGIN, -ROW_MARGIN)
+        image_rect = QRect(rect.left(), rect.top(), THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        pixmap = self.model.thumbnail(index.data(ENEMY_ID_ROLE), option.widget.devicePixelRatioF())
+        if pixmap is None:
+            # Gray placeholder until the shared cache has the thumbnail
+            painter.fillRect(image_rect, QColor(200, 200, 200))
+        else:
+            painter.drawPixmap(image_rect, pixmap)
+
+        lines = [
+            (self.name_font, index.data()),
+            (self.font, f"Defeated: {index.data(DEFEATS_ROLE)} times"),
+            (self.font, f"Last defeated: {index.data(LAST_DEFEATED_ROLE)}"),
+        ]
+        text_left = image_rect.right() + 1 + 2 * ROW_MARGIN
+        text_width = rect.right() + 1 - text_left
+        top = rect.top() + (THUMBNAIL_SIZE - len(lines) * self.line_height) // 2
+        painter.save()
+        painter.setPen(option.palette.color(option.palette.ColorRole.WindowText))
+        for font, text in lines:
+            painter.setFont(font)
+            text = QFontMetrics(font).elidedText(text, Qt.TextElideMode.ElideRight, text_width)
+            painter.drawText(QRect(text_left, top, text_width, self.line_height),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, text)
+            top += self.line_height
+        painter.restore()
+
+
+class BestiaryView(QTableView):
+    """Headerless single column table of a BestiaryProxy.
+
+    A table rather than a QListView, which lays out all rows again whenever
+    one changes, so a kill only repaints the row it changed.
+    """
+
+    def __init__(self, model, proxy, parent=None):
+        super().__init__(parent)
+        self.setModel(proxy)
+        self.setItemDelegate(BestiaryDelegate(model, self))
+        self.horizontalHeader().hide()
+        self.verticalHeader().hide()
+        self.setShowGrid(False)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        # Draw over the window background like the widgets of a plain layout
+        self.viewport().setAutoFillBackground(False)
+
+        # Every row has the delegate's height, no row is measured
+        rows = self.verticalHeader()
+        rows.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        rows.setDefaultSectionSize(THUMBNAIL_SIZE + 2 * ROW_MARGIN)
+        self.horizontalHeader().setStretchLastSection(True)
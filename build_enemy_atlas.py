@@ -0,0 +1,19 @@
+"""Pack images/enemies/*.png into images/enemies.atlas for rpg_game.py and space_game.py.
+
+    python build_enemy_atlas.py [enemy_directory] [atlas_path]
+
+Run it again whenever enemy images are added or changed. The games fall
+back to reading the PNGs when the atlas is missing.
+"""
+import sys
+import time
+
+from image_cache import DEFAULT_ATLAS_PATH, ATLAS_SIZES, build_atlas
+
+if __name__ == "__main__":
+    enemy_directory = sys.argv[1] if len(sys.argv) > 1 else "images/enemies"
+    atlas_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_ATLAS_PATH
+    start = time.perf_counter()
+    count = build_atlas(enemy_directory, atlas_path)
+    sizes = ", ".join(f"{size}px" for size in ATLAS_SIZES)
+    print(f"Packed {count} enemies at {sizes} into {atlas_path} in {time.perf_counter() - start:.1f}s")
@@ -2,15 +2,27 @@ import sys
 import json
 import os
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                            QHBoxLayout, QPushButton, QLabel, QGridLayout,
+                            QHBoxLayout, QPushButton, QLabel,
                             QMessageBox, QTabWidget, QScrollArea, QStackedWidget,
-                            QGraphicsOpacityEffect)
-from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QDateTime, QThread, pyqtSignal, QObject, QUrl, QRect
-from PyQt6.QtGui import QFont, QColor, QPainter, QPixmap
+                            QButtonGroup)
+from PyQt6.QtCore import Qt, QDateTime, QThread, pyqtSignal, QObject, QUrl, QRect, QPoint
+from PyQt6.QtGui import QFont, QColor, QPainter, QPixmap, QRegion
 import threading
 import queue
-import winsound  # Windows-only sound module
+try:
+    import winsound  # Windows-only sound module
+except ImportError:
+    winsound = None  # Other platforms run silently, e.g. the offscreen benchmarks
 import random
+from frame_clock import shared_frame_clock
+from game_engine import ClickerEngine, InputRecorder, TickDriver, Upgrade, BUY_MAX, format_duration, format_number
+from shop_model import ShopModel, ShopView
+from view_state import ViewState
+
+# Notification priorities, higher ones are shown first
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
 
 # Use a flag to prevent too many sounds playing at once
 MAX_CONCURRENT_SOUNDS = 4
@@ -31,40 +43,31 @@ def play_sound_thread(sound_file):
 
 def play_sound(sound_file):
     """Windows sound playing function that doesn't cut off previous sounds"""
+    if winsound is None:
+        return
     # Start a new thread for each sound to allow overlapping
     sound_thread = threading.Thread(target=play_sound_thread, args=(sound_file,))
     sound_thread.daemon = True  # Make thread terminate when main program exits
     sound_thread.start()
 
-class Upgrade:
-    def __init__(self, name, base_cost, base_production, icon, description, required_upgrade=None):
-        self.name = name
-        self.count = 0
-        self.base_cost = base_cost
-        self.cost = base_cost
-        self.base_production = base_production
-        self.production = base_production
-        self.icon = icon
-        self.description = description
-        self.achievement_name = f"First {name}"
-        self.achievement_description = f"Buy your first {name.lower()}"
-        self.required_upgrade = required_upgrade  # Name of the required upgrade
-        # Add stats tracking
-        self.total_bought = 0
-        self.total_spent = 0
-
 class SaveWorker(QThread):
     finished = pyqtSignal()
     error = pyqtSignal(str)
     
-    def __init__(self, save_data):
+    def __init__(self, save_data, recording=None, record_path=None):
         super().__init__()
         self.save_data = save_data
+        # Snapshot of the input log to write alongside the save, if recording
+        self.recording = recording
+        self.record_path = record_path
         
     def run(self):
         try:
             with open("clicker_save_game.json", "w") as f:
                 json.dump(self.save_data, f)
+            if self.recording is not None:
+                with open(self.record_path, "w") as f:
+                    json.dump(self.recording, f)
             self.finished.emit()
         except Exception as e:
             self.error.emit(str(e))
@@ -160,11 +163,13 @@ class CoinButton(QPushButton):
         self.frame_height = 22
         self.current_frame = 0
         self.total_frames = 4
+        # Frames pre-scaled per (size, device pixel ratio), see frames_at()
+        self.frames = {}
         
-        # Animation timer
-        self.animation_timer = QTimer(self)
-        self.animation_timer.timeout.connect(self.next_frame)
-        self.animation_timer.start(150)  # 150ms per frame = ~6.6 fps
+        # Animation frames come from the shared frame clock, only while the coin is visible
+        # (see showEvent/hideEvent)
+        self.frame_clock = shared_frame_clock()
+        self.frame_interval = 0.15  # 150ms per frame = ~6.6 fps
         
         # Set flat style for button with no background
         self.setStyleSheet("QPushButton { background-color: transparent; border: none; }")
@@ -173,49 +178,61 @@ class CoinButton(QPushButton):
         self.is_clicked = False
         self.click_scale = 0.9  # Scale down to 90% when clicked
         
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.frame_clock.call_every((self, "frame"), self.frame_interval, self.next_frame)
+        
+    def hideEvent(self, event):
+        # Also sent when the window is minimized or another tab or menu page is shown
+        super().hideEvent(event)
+        self.frame_clock.cancel((self, "frame"))
+        
     def next_frame(self):
         self.current_frame = (self.current_frame + 1) % self.total_frames
-        self.update()
+        self.frame_clock.invalidate(self)
+        
+    def frames_at(self, size):
+        """Return the animation frames sliced from the sprite sheet and scaled to size x size"""
+        device_pixel_ratio = self.devicePixelRatioF()
+        key = (size, device_pixel_ratio)
+        frames = self.frames.get(key)
+        if frames is None:
+            pixels = round(size * device_pixel_ratio)
+            frames = []
+            for frame in range(self.total_frames):
+                source_rect = QRect(frame * self.frame_width, 0, self.frame_width, self.frame_height)
+                # Nearest neighbour keeps the pixel art sharp, like the unscaled painter used to
+                pixmap = self.spritesheet.copy(source_rect).scaled(pixels, pixels,
+                                                                   Qt.AspectRatioMode.IgnoreAspectRatio,
+                                                                   Qt.TransformationMode.FastTransformation)
+                pixmap.setDevicePixelRatio(device_pixel_ratio)
+                frames.append(pixmap)
+            self.frames[key] = frames
+        return frames
         
     def paintEvent(self, event):
         painter = QPainter(self)
         
-        # Calculate source rect based on current frame
-        x = self.current_frame * self.frame_width
-        source_rect = QRect(x, 0, self.frame_width, self.frame_height)
-        
-        # Draw the current frame scaled to button size
-        target_rect = QRect(0, 0, self.width(), self.height())
-        
-        # If clicked, scale down the drawing
+        # If clicked, draw the smaller frames centered
+        size = self.width()
         if self.is_clicked:
-            # Calculate scaled rect
-            scale_factor = self.click_scale
-            width_diff = self.width() * (1 - scale_factor)
-            height_diff = self.height() * (1 - scale_factor)
-            scaled_rect = QRect(
-                int(width_diff / 2),
-                int(height_diff / 2),
-                int(self.width() * scale_factor),
-                int(self.height() * scale_factor)
-            )
-            painter.drawPixmap(scaled_rect, self.spritesheet, source_rect)
-        else:
-            painter.drawPixmap(target_rect, self.spritesheet, source_rect)
+            size = int(self.width() * self.click_scale)
+        offset = (self.width() - size) // 2
+        painter.drawPixmap(offset, offset, self.frames_at(size)[self.current_frame])
         
         painter.end()
     
     def show_click_animation(self):
         # Set clicked state
         self.is_clicked = True
-        self.update()
+        self.frame_clock.invalidate(self)
         
-        # Reset after short delay
-        QTimer.singleShot(100, self.reset_click_animation)
+        # Reset after short delay, rescheduling replaces the reset of an earlier click
+        self.frame_clock.call_later((self, "click"), 0.1, self.reset_click_animation)
     
     def reset_click_animation(self):
         self.is_clicked = False
-        self.update()
+        self.frame_clock.invalidate(self)
 
 class CoinIconLabel(QLabel):
     def __init__(self, parent=None):
@@ -251,9 +268,9 @@ class NotificationOverlay(QWidget):
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
         
-        # Set up layout
+        # Set up layout, the overlay is exactly as big as the notification card
         self.layout = QVBoxLayout(self)
-        self.layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.layout.setContentsMargins(0, 0, 0, 0)
         
         # Create container for notification with semi-transparent background
         self.notification_container = QWidget()
@@ -353,60 +370,174 @@ class NotificationOverlay(QWidget):
         # Initially hide the overlay
         self.hide()
         
-        # Auto-hide timer
-        self.hide_timer = QTimer(self)
-        self.hide_timer.timeout.connect(self.hide_animation)
-        
-        # Animation for fading in/out
-        self.opacity_effect = QGraphicsOpacityEffect(self)
-        self.notification_container.setGraphicsEffect(self.opacity_effect)
-        self.opacity_effect.setOpacity(0)
-        
-        self.fade_animation = QPropertyAnimation(self.opacity_effect, b"opacity")
-        self.fade_animation.setDuration(500)  # 500ms for fade
-        self.fade_animation.finished.connect(self.on_animation_finished)
+        # Auto-hide and fading in/out run on the shared frame clock. While fading, the
+        # live card is hidden and a snapshot of it is painted with the current opacity
+        self.frame_clock = shared_frame_clock()
+        self.opacity = 0.0
+        self.card_pixmap = None
+        
+        self.fade_duration = 0.5  # 500ms for fade
+        self.fade_start = 0.0
+        self.fade_from = 0.0
+        self.fade_to = 0.0
+        
+        # Notifications wait their turn instead of replacing the one on screen
+        self.queue = []
+        self.current = None
+        self.hiding = False
+        self.shown_at = 0.0
+        self.hide_at = 0.0
+        self.last_shown = {}  # Kind -> clock time it was last put on screen, for cooldowns
+        self.min_display = 1.0  # Seconds a notification stays up before a more important one replaces it
     
-    def show_notification(self, title, icon, message, duration=3000):
-        """Show a notification with title, icon, and message for the specified duration"""
-        self.title_label.setText(title)
-        self.icon_label.setText(icon)
-        self.message_label.setText(message)
+    def show_notification(self, title, icon, message, duration=3000, priority=PRIORITY_NORMAL,
+                          kind=None, count=1, summarize=None, cooldown=0):
+        """Queue a notification with title, icon, and message for the specified duration.
+        
+        Notifications are shown one at a time, highest priority first. One of
+        the same kind as the notification on screen or a queued one is merged
+        into it: the counts add up and summarize(count) rewrites the message.
+        A kind with a cooldown is shown at most once per cooldown seconds.
+        """
+        notification = {
+            "title": title,
+            "icon": icon,
+            "message": message,
+            "duration": duration,
+            "priority": priority,
+            "kind": kind,
+            "count": count,
+            "summarize": summarize,
+            "cooldown": cooldown,
+        }
         
-        # Position overlay centered in parent
+        if kind is not None:
+            candidates = self.queue if self.hiding else [self.current] + self.queue
+            for pending in candidates:
+                if pending is not None and pending["kind"] == kind:
+                    pending["count"] += count
+                    pending["message"] = summarize(pending["count"]) if summarize else message
+                    if pending is self.current:
+                        # Only the text changes, the overlay stays up as scheduled
+                        self.message_label.setText(pending["message"])
+                        if not self.notification_container.isVisible():
+                            self.snapshot_card()
+                    return
+        
+        self.queue.append(notification)
+        if self.current is None:
+            self.show_next()
+        elif not self.hiding and priority > self.current["priority"]:
+            # Cut the current notification short, but leave it up long enough to be read
+            hide_at = max(self.shown_at + self.min_display, self.frame_clock.clock())
+            if hide_at < self.hide_at:
+                self.hide_at = hide_at
+                self.frame_clock.call_later((self, "hide"), hide_at - self.frame_clock.clock(), self.hide_animation)
+    
+    def show_next(self):
+        """Put the most important queued notification whose cooldown has passed on screen"""
+        if self.current is not None or not self.queue:
+            return
+        now = self.frame_clock.clock()
+        ready = [notification for notification in self.queue
+                 if now >= self.last_shown.get(notification["kind"], -notification["cooldown"]) + notification["cooldown"]]
+        if not ready:
+            # Everything left is cooling down, come back when the first one may be shown
+            wait = min(self.last_shown[notification["kind"]] + notification["cooldown"] for notification in self.queue)
+            self.frame_clock.call_later((self, "next"), wait - now, self.show_next)
+            return
+        
+        # max() keeps the first of equal priorities, so the queue is FIFO within a priority
+        notification = max(ready, key=lambda pending: pending["priority"])
+        self.queue.remove(notification)
+        self.current = notification
+        self.hiding = False
+        self.shown_at = now
+        self.hide_at = now + notification["duration"] / 1000
+        if notification["kind"] is not None:
+            self.last_shown[notification["kind"]] = now
+        
+        self.title_label.setText(notification["title"])
+        self.icon_label.setText(notification["icon"])
+        self.message_label.setText(notification["message"])
+        
+        # Cover only the card, centered in the parent, so clicks elsewhere still reach the game
         if self.parent():
-            parent_rect = self.parent().rect()
-            self.setGeometry(parent_rect)
+            card_rect = QRect(QPoint(0, 0), self.notification_container.size())
+            card_rect.moveCenter(self.parent().rect().center())
+            if self.geometry() != card_rect:
+                self.setGeometry(card_rect)
         
         # Show overlay
         self.show()
         
         # Start fade-in animation
-        self.fade_animation.setStartValue(0.0)
-        self.fade_animation.setEndValue(1.0)
-        self.fade_animation.start()
+        self.start_fade(0.0, 1.0)
         
         # Set auto-hide timer
-        self.hide_timer.start(duration)
+        self.frame_clock.call_later((self, "hide"), notification["duration"] / 1000, self.hide_animation)
     
     def close_notification(self):
         """Immediately close the notification when the close button is clicked"""
-        self.hide_timer.stop()
         self.hide_animation()
     
     def hide_animation(self):
         """Start fade-out animation"""
-        self.hide_timer.stop()
-        self.fade_animation.setStartValue(1.0)
-        self.fade_animation.setEndValue(0.0)
-        self.fade_animation.start()
+        self.frame_clock.cancel((self, "hide"))
+        self.hiding = True
+        self.start_fade(1.0, 0.0)
+    
+    def start_fade(self, start_value, end_value):
+        self.fade_start = self.frame_clock.clock()
+        self.fade_from = start_value
+        self.fade_to = end_value
+        self.opacity = start_value
+        self.snapshot_card()
+        self.frame_clock.animate((self, "fade"), self.fade_step)
+    
+    def snapshot_card(self):
+        """Swap the live card for a pixmap of it, which is cheap to paint at any opacity"""
+        device_pixel_ratio = self.devicePixelRatioF()
+        self.card_pixmap = QPixmap(self.notification_container.size() * device_pixel_ratio)
+        self.card_pixmap.setDevicePixelRatio(device_pixel_ratio)
+        self.card_pixmap.fill(Qt.GlobalColor.transparent)
+        # Without DrawWindowBackground the rounded corners stay transparent
+        self.notification_container.show()
+        self.notification_container.render(self.card_pixmap, QPoint(), QRegion(), QWidget.RenderFlag.DrawChildren)
+        self.notification_container.hide()
+        self.frame_clock.invalidate(self)
+    
+    def fade_step(self, now):
+        """Move the opacity linearly towards fade_to, one frame clock frame at a time"""
+        progress = min((now - self.fade_start) / self.fade_duration, 1.0)
+        self.opacity = self.fade_from + (self.fade_to - self.fade_from) * progress
+        self.frame_clock.invalidate(self)
+        if progress < 1.0:
+            return True
+        self.on_animation_finished()
+        return False
+    
+    def paintEvent(self, event):
+        if self.notification_container.isVisible() or self.card_pixmap is None:
+            return
+        painter = QPainter(self)
+        painter.setOpacity(self.opacity)
+        painter.drawPixmap(0, 0, self.card_pixmap)
+        painter.end()
     
     def on_animation_finished(self):
         """Handle animation completion"""
-        if self.opacity_effect.opacity() == 0:
+        if self.opacity == 1:
+            # Fully faded in, the live card takes over so its buttons respond again
+            self.notification_container.show()
+            self.card_pixmap = None
+        elif self.opacity == 0:
             self.hide()
+            self.current = None
+            self.show_next()
 
 class ClickerGame(QMainWindow):
-    def __init__(self):
+    def __init__(self, record_path=None):
         super().__init__()
         self.setWindowTitle("Coin Clicker")
         self.setFixedSize(800, 600)  # Set fixed size instead of minimum size
@@ -418,15 +549,11 @@ class ClickerGame(QMainWindow):
         self.setup_audio()
         
         # Initialize game state
-        self.coins = 0
-        self.coins_per_click = 1
-        self.total_coins = 0
-        self.total_clicks = 0
         self.start_time = QDateTime.currentDateTime()
         self.last_save_time = self.start_time
         
         # Define upgrades with dependencies - now with 15 upgrades total
-        self.upgrades = [
+        upgrades = [
             Upgrade("Cursor", 10, 0.1, "🖱️", "Automatically clicks coins"),  # First upgrade, no dependency
             Upgrade("Grandma", 50, 0.5, "👵", "Collects coins with love", "Cursor"),  # Requires Cursor
             Upgrade("Farm", 200, 2.0, "🌾", "Grows coin plants", "Grandma"),  # Requires Grandma
@@ -444,20 +571,17 @@ class ClickerGame(QMainWindow):
             Upgrade("Fractal Engine", 500000000, 5000000.0, "🌈", "Generates coins through recursion", "Prism")
         ]
         
-        # Achievements
-        self.achievements = {
-            "First Click": {"name": "First Click", "description": "Click the coin for the first time", "unlocked": False},
-            "Coin Master": {"name": "Coin Master", "description": "Reach 100 coins", "unlocked": False},
-            "Coin Empire": {"name": "Coin Empire", "description": "Reach 1000 coins", "unlocked": False}
-        }
+        # The engine owns coins, upgrades and achievements; this window is a view over it
+        self.engine = ClickerEngine(upgrades)
+        # Sounds use their own stream so they never shift the engine's random game decisions
+        self.sound_rng = random.Random(self.engine.seed)
         
-        # Add achievements for each upgrade
-        for upgrade in self.upgrades:
-            self.achievements[upgrade.achievement_name] = {
-                "name": upgrade.achievement_name,
-                "description": upgrade.achievement_description,
-                "unlocked": False
-            }
+        # With a record path every new game's inputs are logged for replay_recording()
+        self.record_path = record_path
+        self.recorder = InputRecorder()
+        
+        # Last values pushed into the game widgets, see update_display()
+        self.view_state = ViewState()
         
         # Create central widget with stacked layout
         self.central_widget = QStackedWidget()
@@ -492,26 +616,15 @@ class ClickerGame(QMainWindow):
         self.move(x, y)
         
     def start_new_game(self):
-        # Reset game state
-        self.coins = 0
-        self.coins_per_click = 1
-        self.total_coins = 0
-        self.total_clicks = 0
+        # Reset game state, upgrades and achievements
+        self.engine.reset()
+        self.tick_driver.restart()
+        self.start_game_clock()
+        if self.record_path:
+            self.recorder.attach(self.engine)
         self.start_time = QDateTime.currentDateTime()
         self.last_save_time = self.start_time
         
-        # Reset upgrades
-        for upgrade in self.upgrades:
-            upgrade.count = 0
-            upgrade.cost = upgrade.base_cost
-            upgrade.production = upgrade.base_production
-            upgrade.total_bought = 0
-            upgrade.total_spent = 0
-        
-        # Reset achievements
-        for achievement in self.achievements.values():
-            achievement["unlocked"] = False
-        
         # Switch to game view
         self.central_widget.setCurrentWidget(self.game_widget)
         
@@ -538,7 +651,7 @@ class ClickerGame(QMainWindow):
         game_tab_layout = QVBoxLayout(game_tab)
         
         # Create coin display
-        self.coin_label = QLabel(f"Coins: {self.coins:.1f}")
+        self.coin_label = QLabel(f"Coins: {format_number(self.engine.coins)}")
         self.coin_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.coin_label.setFont(QFont("Arial", 24))
         game_tab_layout.addWidget(self.coin_label)
@@ -562,43 +675,26 @@ class ClickerGame(QMainWindow):
         
         game_tab_layout.addWidget(coin_container)
         
-        # Create shop section with scrollable area
-        shop_scroll = QScrollArea()
-        shop_scroll.setWidgetResizable(True)
-        shop_content = QWidget()
-        shop_layout = QGridLayout(shop_content)
-        shop_layout.setContentsMargins(5, 5, 5, 5)
-        
-        # Create shop items for each upgrade, but add them to layout later dynamically
-        self.upgrade_widgets = {}
-        for i, upgrade in enumerate(self.upgrades):
-            # Create labels and button for each upgrade
-            count_label = QLabel(f"{upgrade.icon} {upgrade.name}s: {upgrade.count}")
-            count_label.setFont(QFont("Arial", 16))
-            
-            cost_label = QLabel(f"Cost: {upgrade.cost}")
-            cost_label.setFont(QFont("Arial", 16))
-            
-            buy_button = QPushButton(f"Buy {upgrade.name}")
-            buy_button.clicked.connect(lambda checked, u=upgrade: self.buy_upgrade(u))
-            
-            # Store widgets for updating
-            self.upgrade_widgets[upgrade.name] = {
-                "count_label": count_label,
-                "cost_label": cost_label,
-                "buy_button": buy_button,
-                "row": i,  # Store row index for later placement
-                "visible": False  # Track if currently visible in shop
-            }
-        
-        # Add the shop content to the scroll area
-        shop_scroll.setWidget(shop_content)
-        shop_scroll.setMinimumHeight(250)  # Set a reasonable height for the shop
-        game_tab_layout.addWidget(shop_scroll)
-        
-        # Store references for later use
-        self.shop_layout = shop_layout
-        self.shop_content = shop_content
+        # Create buy amount selector for the shop
+        self.buy_amount = 1
+        buy_amount_layout = QHBoxLayout()
+        buy_amount_layout.addStretch()
+        self.buy_amount_group = QButtonGroup(self)
+        for label, amount in (("x1", 1), ("x10", 10), ("x100", 100), ("Max", BUY_MAX)):
+            amount_button = QPushButton(label)
+            amount_button.setCheckable(True)
+            amount_button.setChecked(amount == self.buy_amount)
+            amount_button.clicked.connect(lambda checked, a=amount: self.set_buy_amount(a))
+            self.buy_amount_group.addButton(amount_button)
+            buy_amount_layout.addWidget(amount_button)
+        game_tab_layout.addLayout(buy_amount_layout)
+        
+        # Create the shop, a table over the upgrades discovered so far
+        self.shop_model = ShopModel(self.engine, buy_verb="Buy", cost_suffix="")
+        self.shop_view = ShopView(self.shop_model)
+        self.shop_view.buy_clicked.connect(lambda index: self.buy_upgrade(self.engine.upgrades[index]))
+        self.shop_view.setMinimumHeight(250)  # Set a reasonable height for the shop
+        game_tab_layout.addWidget(self.shop_view)
         
         # Initialize visible upgrades
         self.update_visible_upgrades()
@@ -634,7 +730,7 @@ class ClickerGame(QMainWindow):
         
         # Create achievement labels
         self.achievement_labels = {}
-        for achievement_name, achievement in self.achievements.items():
+        for achievement_name, achievement in self.engine.achievements.items():
             achievement_widget = QWidget()
             achievement_widget.setMaximumHeight(100)  # Set maximum height
             achievement_layout = QHBoxLayout(achievement_widget)
@@ -749,7 +845,7 @@ class ClickerGame(QMainWindow):
         
         # Create container widgets for upgrade stats but don't add them to layout yet
         self.upgrade_stat_widgets = {}
-        for upgrade in self.upgrades:
+        for upgrade in self.engine.upgrades:
             upgrade_widget = QWidget()
             upgrade_widget.setMinimumHeight(90)  # Set minimum height for each upgrade stat
             upgrade_layout = QVBoxLayout(upgrade_widget)  # Changed to QVBoxLayout for better text display
@@ -758,8 +854,8 @@ class ClickerGame(QMainWindow):
             # Create upgrade stats
             stats_text = f"{upgrade.icon} {upgrade.name}:"
             stats_text += f"\nTotal Bought: {upgrade.total_bought}"
-            stats_text += f"\nTotal Spent: {upgrade.total_spent:,}"
-            stats_text += f"\nCurrent Production: {upgrade.count * upgrade.production:.1f}/s"
+            stats_text += f"\nTotal Spent: {format_number(upgrade.total_spent, 0)}"
+            stats_text += f"\nCurrent Production: {format_number(upgrade.count * upgrade.production)}/s"
             
             upgrade_label = QLabel(stats_text)
             upgrade_label.setFont(QFont("Arial", 11))
@@ -791,19 +887,25 @@ class ClickerGame(QMainWindow):
         self.tab_widget.addTab(stats_tab, "Stats")
         
         # Setup auto-clicker timer with longer interval
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.auto_click)
-        self.timer.start(250)  # Update every 250ms instead of 100ms
+        # The timer only wakes the tick driver, which measures how much time really passed
+        self.tick_driver = TickDriver(self.engine, step=0.25)
+        # All periodic work shares the frame clock's timer, see start_game_clock()
+        self.frame_clock = shared_frame_clock()
         
-        # Setup stats update timer with longer interval
-        self.stats_timer = QTimer()
-        self.stats_timer.timeout.connect(self.update_stats)
-        self.stats_timer.start(2000)  # Update every 2 seconds instead of 1 second
+    def start_game_clock(self):
+        """Schedule the periodic work of a running game on the frame clock"""
+        self.frame_clock.call_every((self, "tick"), 0.25, self.auto_click)  # Update every 250ms instead of 100ms
         
-        # Setup auto-save timer with longer interval
-        self.auto_save_timer = QTimer()
-        self.auto_save_timer.timeout.connect(self.auto_save)
-        self.auto_save_timer.start(60000)  # Auto-save every 60 seconds instead of 30 seconds
+        # Setup stats update with longer interval
+        self.frame_clock.call_every((self, "stats"), 2, self.update_stats)  # Update every 2 seconds instead of 1 second
+        
+        # Setup auto-save with longer interval
+        self.frame_clock.call_every((self, "auto_save"), 60, self.auto_save)  # Auto-save every 60 seconds instead of 30 seconds
+        
+    def stop_game_clock(self):
+        """Cancel the periodic work, so the frame clock can stop while no game runs"""
+        for name in ("tick", "stats", "auto_save"):
+            self.frame_clock.cancel((self, name))
         
     def setup_audio(self):
         # Define sound file paths
@@ -833,115 +935,83 @@ class ClickerGame(QMainWindow):
     def click_coin(self):
         # Play a random coin sound
         if self.has_coin_sounds:
-            random_coin_sound = random.choice(self.coin_sound_paths)
+            random_coin_sound = self.sound_rng.choice(self.coin_sound_paths)
             play_sound(random_coin_sound)
         
-        self.coins += self.coins_per_click
-        self.total_coins += self.coins_per_click
-        self.total_clicks += 1
+        self.engine.click()
         self.update_display()
-        self.check_achievements()
+        self.process_engine_events()
         
         # Visual feedback
         self.coin_button.show_click_animation()
-        
-        # Check for first click achievement
-        if not self.achievements["First Click"]["unlocked"]:
-            self.unlock_achievement("First Click")
             
     def buy_upgrade(self, upgrade):
-        if self.coins >= upgrade.cost:
+        # Buy the selected amount in one step
+        result = self.engine.buy(upgrade.name, self.buy_amount)
+        if result is not None:
+            count, price = result
+            
             # Play click sound
             if self.has_click_sound:
                 play_sound(self.click_sound_path)
             
-            # Check if this is the first purchase of this upgrade
-            first_purchase = upgrade.count == 0
-            
-            self.coins -= upgrade.cost
-            upgrade.count += 1
-            upgrade.total_bought += 1
-            upgrade.total_spent += upgrade.cost
-            upgrade.cost = int(upgrade.cost * 1.5)  # Increase cost by 50%
-            upgrade.production += upgrade.base_production  # Increase production
             self.update_display()
-            self.show_status_message(f"Bought {upgrade.name} for {upgrade.cost} coins")
+            self.show_status_message(f"Bought {count}x {upgrade.name} for {format_number(price, 0)} coins")
             
-            # Update visible upgrades after purchase to potentially reveal new ones
-            self.update_visible_upgrades()
+            # Reveal what a first purchase unlocks and show the upgrade achievement
+            self.process_engine_events()
             
-            # If first purchase, add the upgrade to the stats tab
-            if first_purchase:
-                # Find the upgrade stats scroll area content
-                stats_tab = self.tab_widget.widget(2)  # Stats is the third tab (index 2)
-                upgrade_scroll = stats_tab.findChild(QScrollArea)
-                upgrade_content = upgrade_scroll.widget()
-                upgrade_layout = upgrade_content.layout()
-                
-                # Find the stretch item at the end (if exists)
-                if upgrade_layout.count() > 0 and upgrade_layout.itemAt(upgrade_layout.count() - 1).spacerItem():
-                    # Remove the stretch
-                    upgrade_layout.removeItem(upgrade_layout.itemAt(upgrade_layout.count() - 1))
-                
-                # Add the upgrade widget to the layout
-                upgrade_layout.addWidget(self.upgrade_stat_widgets[upgrade.name]["widget"])
-                
-                # Add the stretch back
-                upgrade_layout.addStretch(1)
-            
-            # Check for upgrade achievement
-            if not self.achievements[upgrade.achievement_name]["unlocked"]:
-                self.unlock_achievement(upgrade.achievement_name)
-            
-    def auto_click(self):
-        total_production = 0
-        for upgrade in self.upgrades:
-            if upgrade.count > 0:
-                total_production += upgrade.production * upgrade.count
+    def show_first_purchase(self, upgrade):
+        """Reveal the upgrades unlocked by the first unit of upgrade and add it to the stats tab"""
+        self.reveal_dependents(upgrade)
         
-        if total_production > 0:
-            self.coins += total_production * (self.timer.interval() / 1000)
-            self.total_coins += total_production * (self.timer.interval() / 1000)
+        # Find the upgrade stats scroll area content
+        stats_tab = self.tab_widget.widget(2)  # Stats is the third tab (index 2)
+        upgrade_scroll = stats_tab.findChild(QScrollArea)
+        upgrade_content = upgrade_scroll.widget()
+        upgrade_layout = upgrade_content.layout()
+        
+        # Find the stretch item at the end (if exists)
+        if upgrade_layout.count() > 0 and upgrade_layout.itemAt(upgrade_layout.count() - 1).spacerItem():
+            # Remove the stretch
+            upgrade_layout.removeItem(upgrade_layout.itemAt(upgrade_layout.count() - 1))
+        
+        # Add the upgrade widget to the layout
+        upgrade_layout.addWidget(self.upgrade_stat_widgets[upgrade.name]["widget"])
+        
+        # Add the stretch back
+        upgrade_layout.addStretch(1)
+        
+    def set_buy_amount(self, amount):
+        """Select how many units the shop buttons buy (1, 10, 100 or BUY_MAX)"""
+        self.buy_amount = amount
+        self.shop_model.set_buy_amount(amount)
+        self.update_display()
+        
+    def auto_click(self):
+        if self.tick_driver.update() > 0:
             self.update_display()
-            self.check_achievements()
+            self.process_engine_events()
             
     def update_display(self):
-        self.coin_label.setText(f"Coins: {self.coins:.1f}")
+        # Only widgets whose value changed since the last refresh are touched
+        view = self.view_state
+        view.begin_refresh()
+        view.set_text(self.coin_label, f"Coins: {format_number(self.engine.coins)}")
         
         # Calculate number of discovered generators (showing in shop)
-        discovered_count = 0
-        for upgrade in self.upgrades:
-            widget_data = self.upgrade_widgets[upgrade.name]
-            if widget_data["visible"]:
-                discovered_count += 1
+        discovered_count = len(self.shop_model.rows)
         
         # Update generators discovered label
-        self.generators_label.setText(f"{discovered_count} of {len(self.upgrades)} generators discovered")
+        view.set_text(self.generators_label, f"{discovered_count} of {len(self.engine.upgrades)} generators discovered")
         
-        # Update all upgrade displays
-        for upgrade in self.upgrades:
-            widgets = self.upgrade_widgets[upgrade.name]
-            widgets["count_label"].setText(f"{upgrade.icon} {upgrade.name}s: {upgrade.count}")
-            widgets["cost_label"].setText(f"Cost: {upgrade.cost}")
-            
-            # Check if required upgrade is purchased
-            can_buy = self.coins >= upgrade.cost
-            if upgrade.required_upgrade:
-                # Find the required upgrade object
-                for req_upgrade in self.upgrades:
-                    if req_upgrade.name == upgrade.required_upgrade:
-                        # Only enable if required upgrade has been bought
-                        if req_upgrade.count == 0:
-                            can_buy = False
-                            # Update cost label to show requirement
-                            widgets["cost_label"].setText(f"Requires {upgrade.required_upgrade}")
-                        break
-            
-            widgets["buy_button"].setEnabled(can_buy)
+        # The shop model repaints only the rows whose count, cost or button changed
+        self.shop_model.refresh()
         
         # Update achievement displays
-        for achievement_name, achievement in self.achievements.items():
-            self.achievement_labels[achievement_name]["status_label"].setText("🏆" if achievement["unlocked"] else "🔒")
+        for achievement_name, achievement in self.engine.achievements.items():
+            view.set_text(self.achievement_labels[achievement_name]["status_label"], "🏆" if achievement["unlocked"] else "🔒")
+        view.end_refresh()
             
     def update_stats(self):
         # Update time played
@@ -953,36 +1023,35 @@ class ClickerGame(QMainWindow):
         self.stats_labels["time"].setText(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
         
         # Update clicks
-        self.stats_labels["clicks"].setText(f"{self.total_clicks:,}")
+        self.stats_labels["clicks"].setText(f"{self.engine.total_clicks:,}")
         
         # Update total coins
-        self.stats_labels["total_coins"].setText(f"{self.total_coins:,.1f}")
+        self.stats_labels["total_coins"].setText(format_number(self.engine.total_coins))
         
-        # Calculate and update coins per second
-        total_cps = 0
-        for upgrade in self.upgrades:
-            if upgrade.count > 0:
-                total_cps += upgrade.production * upgrade.count
-        self.stats_labels["cps"].setText(f"{total_cps:.1f}")
+        # Update coins per second
+        total_cps = self.engine.total_production()
+        self.stats_labels["cps"].setText(format_number(total_cps))
         
         # Update upgrade stats with clear formatting
-        for upgrade in self.upgrades:
+        for upgrade in self.engine.upgrades:
             stats_text = f"{upgrade.icon} {upgrade.name}:"
             stats_text += f"\nTotal Bought: {upgrade.total_bought}"
-            stats_text += f"\nTotal Spent: {upgrade.total_spent:,}"
-            stats_text += f"\nCurrent Production: {upgrade.count * upgrade.production:.1f}/s"
+            stats_text += f"\nTotal Spent: {format_number(upgrade.total_spent, 0)}"
+            stats_text += f"\nCurrent Production: {format_number(upgrade.count * upgrade.production)}/s"
             self.stats_labels[upgrade.name].setText(stats_text)
         
-    def check_achievements(self):
-        if self.coins >= 100 and not self.achievements["Coin Master"]["unlocked"]:
-            self.unlock_achievement("Coin Master")
-        if self.coins >= 1000 and not self.achievements["Coin Empire"]["unlocked"]:
-            self.unlock_achievement("Coin Empire")
+    def process_engine_events(self):
+        """Apply the UI side effects of everything the engine reported since the last call"""
+        for event in self.engine.pop_events():
+            if event[0] == "achievement":
+                self.show_achievement(event[1])
+            elif event[0] == "first_purchase":
+                self.show_first_purchase(self.engine.upgrades[event[1]])
             
-    def unlock_achievement(self, achievement_name):
-        self.achievements[achievement_name]["unlocked"] = True
+    def show_achievement(self, achievement_name):
+        achievement = self.engine.achievements[achievement_name]
         achievement_data = self.achievement_labels[achievement_name]
-        achievement_data["status_label"].setText("🏆")
+        self.view_state.set_text(achievement_data["status_label"], "🏆")
         
         # Add the achievement widget to the scroll layout
         scroll_content = self.tab_widget.widget(1).findChild(QScrollArea).widget()
@@ -999,14 +1068,16 @@ class ClickerGame(QMainWindow):
         scroll_layout.addStretch(1)
         
         # Show status message
-        self.show_status_message(f"Achievement unlocked: {self.achievements[achievement_name]['name']}")
+        self.show_status_message(f"Achievement unlocked: {achievement['name']}")
         
         # Show achievement notification using overlay instead of dialog
         self.notification_overlay.show_notification(
             "Achievement Unlocked!",
             "🏆",
-            f"{self.achievements[achievement_name]['name']}\n{self.achievements[achievement_name]['description']}",
-            4000  # Show for 4 seconds
+            f"{achievement['name']}\n{achievement['description']}",
+            4000,  # Show for 4 seconds
+            kind="achievement",
+            summarize=lambda count: f"{achievement['name']}\nand {count - 1} more achievements",
         )
         
         # Play achievement sound if available
@@ -1017,65 +1088,47 @@ class ClickerGame(QMainWindow):
         self.statusBar().showMessage(message, timeout)
 
     def auto_save(self):
-        save_data = {
-            "coins": self.coins,
-            "coins_per_click": self.coins_per_click,
-            "total_coins": self.total_coins,
-            "total_clicks": self.total_clicks,
-            "start_time": self.start_time.toString(),
-            "achievements": self.achievements
-        }
-        
-        # Save upgrade data
-        for upgrade in self.upgrades:
-            save_data[upgrade.name] = {
-                "count": upgrade.count,
-                "cost": upgrade.cost,
-                "production": upgrade.production,
-                "total_bought": upgrade.total_bought,
-                "total_spent": upgrade.total_spent
-            }
+        self.last_save_time = QDateTime.currentDateTime()
+        save_data = self.engine.to_save_data()
+        save_data["start_time"] = self.start_time.toString()
+        save_data["last_save_time"] = self.last_save_time.toString()
         
         # Create and start save worker thread
-        self.save_worker = SaveWorker(save_data)
+        self.save_worker = SaveWorker(save_data, self.recording_snapshot(), self.record_path)
         self.save_worker.finished.connect(lambda: self.show_status_message("Game auto-saved"))
         self.save_worker.error.connect(lambda e: self.show_status_message(f"Failed to save game: {e}"))
         self.save_worker.start()
 
     def save_game(self, silent=False):
-        save_data = {
-            "coins": self.coins,
-            "coins_per_click": self.coins_per_click,
-            "total_coins": self.total_coins,
-            "total_clicks": self.total_clicks,
-            "start_time": self.start_time.toString(),
-            "achievements": self.achievements
-        }
-        
-        # Save upgrade data
-        for upgrade in self.upgrades:
-            save_data[upgrade.name] = {
-                "count": upgrade.count,
-                "cost": upgrade.cost,
-                "production": upgrade.production,
-                "total_bought": upgrade.total_bought,
-                "total_spent": upgrade.total_spent
-            }
+        self.last_save_time = QDateTime.currentDateTime()
+        save_data = self.engine.to_save_data()
+        save_data["start_time"] = self.start_time.toString()
+        save_data["last_save_time"] = self.last_save_time.toString()
         
         # Create and start save worker thread
-        self.save_worker = SaveWorker(save_data)
+        self.save_worker = SaveWorker(save_data, self.recording_snapshot(), self.record_path)
         if not silent:
             self.save_worker.finished.connect(lambda: self.show_status_message("Game saved successfully!"))
             self.save_worker.error.connect(lambda e: self.show_status_message(f"Failed to save game: {e}"))
         self.save_worker.start()
-        self.last_save_time = QDateTime.currentDateTime()
+
+    def recording_snapshot(self):
+        """Return the input log of the current game for the save worker, or None if not recording"""
+        if self.record_path and self.recorder.engine is not None:
+            return self.recorder.snapshot()
+        return None
 
     def return_to_menu(self):
         # Auto-save before returning to menu
         self.auto_save()
+        self.stop_game_clock()
         # Switch to menu view
         self.central_widget.setCurrentWidget(self.main_menu)
 
+    def closeEvent(self, event):
+        self.stop_game_clock()
+        super().closeEvent(event)
+
     def load_game(self):
         if os.path.exists("clicker_save_game.json"):
             # Use proper Qt thread for loading
@@ -1087,23 +1140,15 @@ class ClickerGame(QMainWindow):
             self.show_status_message("No save file found")
 
     def process_loaded_data(self, save_data):
-        # Update game state on the main thread
-        self.coins = save_data["coins"]
-        self.coins_per_click = save_data["coins_per_click"]
-        self.total_coins = save_data.get("total_coins", 0)
-        self.total_clicks = save_data.get("total_clicks", 0)
+        # Update game state on the main thread, recordings only cover games started from scratch
+        self.recorder.detach()
+        self.engine.load_save_data(save_data)
         self.start_time = QDateTime.fromString(save_data.get("start_time", QDateTime.currentDateTime().toString()))
-        self.achievements = save_data["achievements"]
-        
-        # Load upgrade data
-        for upgrade in self.upgrades:
-            if upgrade.name in save_data:
-                upgrade_data = save_data[upgrade.name]
-                upgrade.count = upgrade_data["count"]
-                upgrade.cost = upgrade_data["cost"]
-                upgrade.production = upgrade_data["production"]
-                upgrade.total_bought = upgrade_data.get("total_bought", 0)
-                upgrade.total_spent = upgrade_data.get("total_spent", 0)
+        
+        # Catch up on what was produced while the game was closed
+        offline_summary = self.apply_offline_progress(save_data)
+        self.tick_driver.restart()
+        self.start_game_clock()
         
         # Update visible upgrades in the shop based on loaded data
         self.update_visible_upgrades()
@@ -1119,10 +1164,10 @@ class ClickerGame(QMainWindow):
                 item.widget().deleteLater()
         
         # Add unlocked achievements to the scroll layout
-        for achievement_name, achievement in self.achievements.items():
+        for achievement_name, achievement in self.engine.achievements.items():
             if achievement["unlocked"]:
                 achievement_data = self.achievement_labels[achievement_name]
-                achievement_data["status_label"].setText("🏆")
+                self.view_state.set_text(achievement_data["status_label"], "🏆")
                 scroll_layout.addWidget(achievement_data["widget"])
         
         # Add spacer to push content up
@@ -1143,7 +1188,7 @@ class ClickerGame(QMainWindow):
                 upgrade_layout.removeItem(item)
         
         # Add only unlocked upgrades to the stats tab
-        for upgrade in self.upgrades:
+        for upgrade in self.engine.upgrades:
             if upgrade.count > 0:
                 upgrade_layout.addWidget(self.upgrade_stat_widgets[upgrade.name]["widget"])
         
@@ -1154,73 +1199,52 @@ class ClickerGame(QMainWindow):
         self.update_display()
         self.update_stats()
         self.central_widget.setCurrentWidget(self.game_widget)
+        if offline_summary and offline_summary["earned"] > 0:
+            self.show_offline_progress(offline_summary)
         self.show_status_message("Game loaded successfully")
 
+    def apply_offline_progress(self, save_data):
+        """Credit everything produced between the last save and now in a single step"""
+        if "last_save_time" not in save_data:
+            return None
+        
+        last_save_time = QDateTime.fromString(save_data["last_save_time"])
+        summary = self.engine.advance_offline(last_save_time.secsTo(QDateTime.currentDateTime()))
+        self.last_save_time = QDateTime.currentDateTime()
+        
+        # The restored tabs already list anything unlocked while away, so one summary replaces the individual popups
+        self.engine.pop_events()
+        return summary
+    
+    def show_offline_progress(self, summary):
+        """Show a single notification summarising the progress made while away"""
+        self.notification_overlay.show_notification(
+            "Welcome Back!",
+            "💤",
+            f"You were away for {format_duration(summary['seconds'])}.\nYou earned {format_number(summary['earned'])} coins.",
+            5000,  # Show for 5 seconds
+            priority=PRIORITY_HIGH,
+        )
+
     def update_visible_upgrades(self):
         """Update which upgrades should be visible in the shop based on prerequisites"""
-        # First, determine which upgrades should be visible
-        visible_upgrades = []
-        unlocked_names = set()
-        next_upgrades = set()
-        
-        # Collect names of all unlocked upgrades (count > 0)
-        for upgrade in self.upgrades:
-            if upgrade.count > 0:
-                unlocked_names.add(upgrade.name)
-                
-        # Always show first upgrade
-        visible_upgrades.append(self.upgrades[0])
+        # Show bought upgrades, those whose prerequisite is met, and always the first upgrade
+        upgrades = self.engine.upgrades
+        visible = upgrades.available() | (upgrades.count > 0)
+        if len(visible):
+            visible[0] = True
         
-        # Determine which upgrades should be visible now
-        for upgrade in self.upgrades:
-            if upgrade.count > 0:
-                # Always show unlocked upgrades
-                if upgrade not in visible_upgrades:
-                    visible_upgrades.append(upgrade)
-            elif not upgrade.required_upgrade or upgrade.required_upgrade in unlocked_names:
-                # Show unlockable upgrades (those whose prerequisite is met)
-                if upgrade not in visible_upgrades:
-                    visible_upgrades.append(upgrade)
-                    next_upgrades.add(upgrade.name)
-        
-        # Update shop layout
-        for upgrade in self.upgrades:
-            widget_data = self.upgrade_widgets[upgrade.name]
-            
-            # Check if widget should be visible
-            should_be_visible = upgrade in visible_upgrades
-            
-            # Only update if visibility changed
-            if should_be_visible != widget_data["visible"]:
-                if should_be_visible:
-                    # Add widget to layout
-                    row = widget_data["row"]
-                    self.shop_layout.addWidget(widget_data["count_label"], row, 0)
-                    self.shop_layout.addWidget(widget_data["cost_label"], row, 1)
-                    self.shop_layout.addWidget(widget_data["buy_button"], row, 2)
-                else:
-                    # Remove widget from layout
-                    self.shop_layout.removeWidget(widget_data["count_label"])
-                    self.shop_layout.removeWidget(widget_data["cost_label"])
-                    self.shop_layout.removeWidget(widget_data["buy_button"])
-                    widget_data["count_label"].hide()
-                    widget_data["cost_label"].hide()
-                    widget_data["buy_button"].hide()
-                
-                # Update visibility state
-                widget_data["visible"] = should_be_visible
-                
-                # If now visible, show the widgets
-                if should_be_visible:
-                    widget_data["count_label"].show()
-                    widget_data["cost_label"].show()
-                    widget_data["buy_button"].show()
-        
-        # Refresh the shop content
-        self.shop_content.adjustSize()
+        self.shop_model.set_listed(visible)
+    
+    def reveal_dependents(self, upgrade):
+        """Show the upgrades unlocked by the first purchase of upgrade, without rescanning the shop"""
+        # Rows are only inserted, and laid out, for upgrades that were not listed yet
+        self.shop_model.show_upgrades(self.engine.upgrades.dependents[upgrade.index])
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    game = ClickerGame()
+    # --record FILE logs every new game's inputs so they can be replayed headless
+    record_path = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv[:-1] else None
+    game = ClickerGame(record_path)
     game.show()
     sys.exit(app.exec()) 
\ No newline at end of file
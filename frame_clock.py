@@ -0,0 +1,145 @@
+"""One timer for the animations, repaints and periodic work of all game windows.
+
+Widgets schedule callbacks and request repaints through the shared
+FrameClock instead of running their own QTimers. Repaint requests are
+collected and flushed at most once per display frame. The clock sleeps
+until its next deadline and stops completely when nothing is scheduled.
+"""
+import math
+import time
+
+from PyQt6.QtCore import Qt, QObject, QTimer
+
+FRAME_SECONDS = 1 / 60
+
+
+class FrameClock(QObject):
+    """Single-shot timer rearmed for the earliest of the scheduled deadlines.
+
+    Deadlines and animations are keyed, typically by (widget, name), so
+    scheduling under an existing key replaces the old entry instead of adding
+    another timer. Animations are called with the clock time on every frame
+    until they return False.
+    """
+
+    def __init__(self, parent=None, frame_seconds=FRAME_SECONDS, clock=time.monotonic):
+        super().__init__(parent)
+        self.frame_seconds = frame_seconds
+        self.clock = clock
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.frame)
+        self.wake_time = None  # Clock time the timer is armed for, None while stopped
+
+        self.deadlines = {}  # key -> (due time, repeat interval or None, callback)
+        self.animations = {}  # key -> callback(now)
+        self.dirty = {}  # widget -> list of rects to repaint, None for the whole widget
+        self.last_frame = -math.inf
+
+        # Counters for benchmarks
+        self.frames = 0
+        self.repaints = 0
+
+    def call_later(self, key, delay, callback):
+        """Call callback once after delay seconds"""
+        self.deadlines[key] = (self.clock() + delay, None, callback)
+        self.wake()
+
+    def call_every(self, key, interval, callback):
+        """Call callback every interval seconds until cancelled"""
+        self.deadlines[key] = (self.clock() + interval, interval, callback)
+        self.wake()
+
+    def animate(self, key, callback):
+        """Call callback(now) on every frame until it returns False"""
+        self.animations[key] = callback
+        self.wake()
+
+    def cancel(self, key):
+        self.deadlines.pop(key, None)
+        self.animations.pop(key, None)
+        if not (self.deadlines or self.animations or self.dirty):
+            self.timer.stop()
+            self.wake_time = None
+
+    def invalidate(self, widget, rect=None):
+        """Repaint rect of widget (all of it by default) on the next frame"""
+        if widget in self.dirty:
+            rects = self.dirty[widget]
+            if rects is not None:
+                if rect is None:
+                    self.dirty[widget] = None
+                else:
+                    rects.append(rect)
+            return
+        self.dirty[widget] = None if rect is None else [rect]
+        self.wake()
+
+    def next_wake_time(self):
+        due = min((deadline[0] for deadline in self.deadlines.values()), default=math.inf)
+        if self.animations or self.dirty:
+            due = min(due, self.last_frame + self.frame_seconds)
+        return due
+
+    def wake(self):
+        """(Re)arm the timer for the next thing that needs doing, or stop it"""
+        due = self.next_wake_time()
+        if due == math.inf:
+            self.timer.stop()
+            self.wake_time = None
+            return
+        if self.wake_time is not None and self.wake_time <= due:
+            return  # Already armed early enough
+        self.wake_time = due
+        self.timer.start(math.ceil(max(0.0, due - self.clock()) * 1000))
+
+    def frame(self):
+        now = self.clock()
+        self.wake_time = None
+        self.frames += 1
+
+        for key, (due, interval, callback) in list(self.deadlines.items()):
+            if due > now or self.deadlines.get(key) != (due, interval, callback):
+                continue
+            if interval is None:
+                del self.deadlines[key]
+            else:
+                # Skip missed intervals instead of firing a burst after a stall
+                due += interval
+                if due <= now:
+                    due = now + interval
+                self.deadlines[key] = (due, interval, callback)
+            callback()
+
+        if self.animations or self.dirty:
+            if now - self.last_frame >= self.frame_seconds:
+                self.last_frame = now
+                for key, callback in list(self.animations.items()):
+                    if callback(now) is False and self.animations.get(key) is callback:
+                        del self.animations[key]
+                self.flush()
+
+        self.wake()
+
+    def flush(self):
+        dirty, self.dirty = self.dirty, {}
+        for widget, rects in dirty.items():
+            if rects is None:
+                widget.update()
+            else:
+                for rect in rects:
+                    widget.update(rect)
+            self.repaints += 1
+
+
+# FrameClock shared by every window, see shared_frame_clock()
+shared_clock = None
+
+
+def shared_frame_clock():
+    """Return the process-wide FrameClock, creating it on first use"""
+    global shared_clock
+    if shared_clock is None:
+        shared_clock = FrameClock()
+    return shared_clock
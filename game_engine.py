@@ -0,0 +1,1209 @@
+"""Qt-free game rules for the clicker games.
+
+The QMainWindow classes in clicker_game.py, rpg_game.py and space_game.py are
+views over the engines defined here. Everything that changes game state lives
+in this module so it can be simulated, benchmarked and run without a display.
+"""
+import bisect
+import math
+import random
+from collections import namedtuple
+import sys
+import time
+
+import numpy as np
+
+# Buy amount meaning "as many as the player can afford"
+BUY_MAX = "max"
+# Format of the timestamps in the statistics, like QDateTime.toString()
+TIMESTAMP_FORMAT = "%a %b %d %H:%M:%S %Y"
+
+
+def default_timestamp(seconds=None):
+    """Return the local time (default now) formatted like QDateTime.toString()"""
+    return time.strftime(TIMESTAMP_FORMAT, time.localtime(seconds))
+
+
+def format_duration(seconds):
+    """Format a number of seconds like "2d 3h 15m" for display"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d {hours}h {minutes}m"
+    if hours:
+        return f"{hours}h {minutes}m"
+    if minutes:
+        return f"{minutes}m {seconds}s"
+    return f"{seconds}s"
+
+
+def format_enemy_name(enemy_id):
+    """Convert an enemy id like "some-enemy-name" to "Some Enemy Name" """
+    if not enemy_id:
+        return "Unknown Enemy"
+    return " ".join(word.capitalize() for word in enemy_id.split("-"))
+
+
+# Short scale suffixes, starting at a million (10**6)
+SHORT_SCALE = ["M", "B", "T", "Qa", "Qi", "Sx", "Sp", "Oc", "No", "Dc",
+               "UDc", "DDc", "TDc", "QaDc", "QiDc", "SxDc", "SpDc", "OcDc", "NoDc", "Vg"]
+
+# Amounts switch from float to BigNumber here. Floats are as precise and much
+# faster below it, and it is far enough below float overflow (2**1024) that
+# adding two amounts cannot overflow.
+BIG_NUMBER_START = 2.0 ** 1000
+
+LOG10_2 = math.log10(2)
+
+
+class BigNumber:
+    """A number stored as mantissa * 2 ** exponent with 0.5 <= |mantissa| < 1.
+
+    The mantissa is a float, so precision matches a float, but the exponent is
+    a Python int and never overflows. Arithmetic and comparisons accept plain
+    ints and floats on either side.
+
+    Like a float, a sum keeps 53 significant bits: adding less than about
+    2**-53 of the total does not change it. Below BIG_NUMBER_START the engine
+    carries such increments in a remainder (see add_exact()), past it they are
+    lost.
+    """
+    __slots__ = ("mantissa", "exponent")
+
+    def __init__(self, mantissa=0.0, exponent=0):
+        mantissa, shift = math.frexp(mantissa)
+        self.mantissa = mantissa
+        self.exponent = exponent + shift if mantissa else 0
+
+    @classmethod
+    def of(cls, value):
+        """Return value as a BigNumber"""
+        if isinstance(value, BigNumber):
+            return value
+        if isinstance(value, int):
+            # Keep the leading bits of ints too large for a float
+            shift = max(0, value.bit_length() - 64)
+            return cls(value >> shift, shift)
+        return cls(value)
+
+    def difference(self, mantissa, exponent):
+        """Return self - mantissa * 2 ** exponent as (mantissa, exponent), not normalized"""
+        # Scale the smaller operand down so ldexp can only underflow, never overflow
+        if self.exponent >= exponent:
+            return self.mantissa - math.ldexp(mantissa, exponent - self.exponent), self.exponent
+        return math.ldexp(self.mantissa, self.exponent - exponent) - mantissa, exponent
+
+    def __add__(self, other):
+        if isinstance(other, BigNumber):
+            return BigNumber(*self.difference(-other.mantissa, other.exponent))
+        mantissa, exponent = math.frexp(other)
+        return BigNumber(*self.difference(-mantissa, exponent))
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return BigNumber(-self.mantissa, self.exponent)
+
+    def __sub__(self, other):
+        if isinstance(other, BigNumber):
+            return BigNumber(*self.difference(other.mantissa, other.exponent))
+        return BigNumber(*self.difference(*math.frexp(other)))
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        if not isinstance(other, BigNumber):
+            other = BigNumber(other)
+        return BigNumber(self.mantissa * other.mantissa, self.exponent + other.exponent)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if not isinstance(other, BigNumber):
+            other = BigNumber(other)
+        return BigNumber(self.mantissa / other.mantissa, self.exponent - other.exponent)
+
+    def __rtruediv__(self, other):
+        return BigNumber.of(other) / self
+
+    def sign(self, other=0):
+        """Return -1, 0 or 1 as self is less than, equal to or greater than other"""
+        if isinstance(other, BigNumber):
+            difference = self.difference(other.mantissa, other.exponent)[0]
+        else:
+            difference = self.difference(*math.frexp(other))[0]
+        return (difference > 0) - (difference < 0)
+
+    def __lt__(self, other):
+        return self.sign(other) < 0
+
+    def __le__(self, other):
+        return self.sign(other) <= 0
+
+    def __gt__(self, other):
+        return self.sign(other) > 0
+
+    def __ge__(self, other):
+        return self.sign(other) >= 0
+
+    def __eq__(self, other):
+        if not isinstance(other, (BigNumber, int, float)):
+            return NotImplemented
+        return self.sign(other) == 0
+
+    def __hash__(self):
+        return hash(float(self))
+
+    def __bool__(self):
+        return self.mantissa != 0
+
+    def __float__(self):
+        try:
+            return math.ldexp(self.mantissa, self.exponent)
+        except OverflowError:
+            return math.copysign(math.inf, self.mantissa)
+
+    def __int__(self):
+        if self.exponent <= 53:
+            return int(float(self))
+        return int(math.ldexp(self.mantissa, 53)) << (self.exponent - 53)
+
+    def log10(self):
+        """Base 10 logarithm of the absolute value"""
+        return math.log10(abs(self.mantissa)) + self.exponent * LOG10_2
+
+    def __format__(self, spec):
+        if not spec:
+            return str(self)
+        value = float(self)
+        if math.isinf(value):
+            return str(self)
+        return format(value, spec)
+
+    def __str__(self):
+        return format_number(self)
+
+    def __repr__(self):
+        return f"BigNumber({self.mantissa!r}, {self.exponent!r})"
+
+    def to_save_data(self):
+        """Return a JSON friendly value: a float when it fits, else [mantissa, exponent]"""
+        value = float(self)
+        if math.isinf(value):
+            return [self.mantissa, self.exponent]
+        return value
+
+
+def promote(value):
+    """Return value as a BigNumber once it is close to float overflow"""
+    if isinstance(value, BigNumber) or value < BIG_NUMBER_START:
+        return value
+    return BigNumber(value)
+
+
+def multiply(value, factor):
+    """Return value * factor, as a BigNumber where the float product would overflow"""
+    if isinstance(value, BigNumber) or isinstance(factor, BigNumber):
+        return value * factor
+    product = value * factor
+    if math.isinf(product):
+        return BigNumber(value) * factor
+    return promote(product)
+
+
+def add_exact(total, remainder, amount):
+    """Return (total + amount, remainder) with the rounding error of the sum carried in remainder.
+
+    remainder collects what a float total is too large to register, e.g. a
+    tick's income once the total passes 2**53, and is added back as soon as
+    it adds up to a representable step, so many small increments sum exactly.
+    BigNumber totals are added without a remainder.
+    """
+    if isinstance(total, BigNumber) or isinstance(amount, BigNumber):
+        return total + amount, remainder
+    rounded = total + amount
+    # Exact error of the rounded sum (Knuth's TwoSum)
+    amount_part = rounded - total
+    remainder += (total - (rounded - amount_part)) + (amount - amount_part)
+    carried = rounded + remainder
+    return carried, remainder - (carried - rounded)
+
+
+def number_to_save(value):
+    """Convert an amount for json.dump()"""
+    if isinstance(value, BigNumber):
+        return value.to_save_data()
+    return value
+
+
+def number_from_save(value):
+    """Inverse of number_to_save()"""
+    if isinstance(value, list):
+        return BigNumber(*value)
+    return promote(value)
+
+
+def format_number(value, decimals=1):
+    """Format an amount for display, e.g. "12,345.6" below a million and "1.23 Qa" above.
+
+    Amounts are shown as they are stored, so past 2**53 (and for BigNumbers)
+    the digits below float precision are not exact, see BigNumber.
+    """
+    if not isinstance(value, BigNumber):
+        # Prices past the end of a GrowthTable are infinite. Round first so
+        # 999,999.96 is shown as "1.00 M" rather than "1,000,000.0".
+        if abs(value) == math.inf or abs(round(value, decimals)) < 1e6:
+            return f"{value:,.{decimals}f}"
+        value = BigNumber.of(value)
+    elif value.exponent <= 64 and abs(round(float(value), decimals)) < 1e6:
+        return f"{float(value):,.{decimals}f}"
+
+    exponent = math.floor(value.log10())
+    mantissa = math.copysign(10 ** (value.log10() - exponent), value.mantissa)
+    # Rounding can carry the mantissa into the next power of ten
+    if round(abs(mantissa), 2) >= 10:
+        mantissa /= 10
+        exponent += 1
+    group = exponent // 3 - 2
+    if group >= len(SHORT_SCALE):
+        return f"{mantissa:.2f}e{exponent}"
+    return f"{mantissa * 10 ** (exponent % 3):.2f} {SHORT_SCALE[group]}"
+
+
+# Most units of one upgrade (or levels) a GrowthTable sells, so counts stay
+# exact in the int64 columns and in float arithmetic
+MAX_COUNT = 2 ** 53
+# Largest value or running total a GrowthTable lists, so every price
+# converts to a float
+MAX_PRICE = int(sys.float_info.max)
+
+
+class GrowthTable:
+    """Running totals of a value that grows by `factor` with int() truncation each step.
+
+    values[k] is the value after k steps from `start`, exactly as repeatedly
+    applying value = int(value * factor) produces it, and totals[k] is the sum
+    of the first k values. Both are extended lazily, so the price of buying
+    any number of units (or the number of units a budget pays for) is a
+    subtraction or a bisect instead of a loop.
+
+    The table ends before a running total would pass MAX_PRICE. value() and
+    total() are infinite past the end, so those units can never be bought.
+
+    A start that int(value * factor) maps to itself (1 with the default
+    factor) never grows. Such tables are priced in closed form as a constant
+    series instead of being listed, up to MAX_COUNT values.
+    """
+    def __init__(self, start, factor=1.5):
+        if start < 1:
+            raise ValueError(f"GrowthTable start must be at least 1, not {start!r}")
+        if start > MAX_PRICE:
+            raise ValueError(f"GrowthTable start must be at most MAX_PRICE, not {start!r}")
+        self.factor = factor
+        self.constant = int(start * factor) == start
+        self.values = [start]
+        self.totals = [0, start]
+        # Number of values in the table, None until the growth reaches MAX_PRICE
+        self.length = MAX_COUNT if self.constant else None
+
+    def extend_to(self, index):
+        """Make sure values[index] and totals[index + 1] exist, returning False past the end of the table"""
+        if self.length is not None and index >= self.length:
+            return False
+        if self.constant:
+            return True
+        values = self.values
+        totals = self.totals
+        while len(values) <= index:
+            value = values[-1] * self.factor
+            if value > MAX_PRICE or totals[-1] + int(value) > MAX_PRICE:
+                self.length = len(values)
+                return False
+            value = int(value)
+            values.append(value)
+            totals.append(totals[-1] + value)
+        return True
+
+    def value(self, index):
+        if not self.extend_to(index):
+            return math.inf
+        return self.values[0] if self.constant else self.values[index]
+
+    def total(self, first, count):
+        """Sum of `count` values starting at values[first].
+
+        Infinite unless the value after them, the next price, is in the table too.
+        """
+        if not self.extend_to(first + count):
+            return math.inf
+        if self.constant:
+            return self.values[0] * count
+        return self.totals[first + count] - self.totals[first]
+
+    def max_count(self, first, budget):
+        """Largest number of values starting at values[first] whose sum fits in budget"""
+        if not self.extend_to(first):
+            return 0
+        # Costs are computed with floats, so nothing beyond float range is for sale
+        budget = int(min(float(budget), sys.float_info.max))
+        if self.constant:
+            return max(0, min(budget // self.values[0], self.length - 1 - first))
+        limit = self.totals[first] + budget
+        # Values grow geometrically, so this extends O(log budget) entries at most
+        while self.totals[-1] <= limit and self.extend_to(len(self.values)):
+            pass
+        # The value after the last one bought must exist, it becomes the next price
+        return min(bisect.bisect_right(self.totals, limit) - 1, len(self.values) - 1) - first
+
+
+# Static description of an upgrade. The mutable state of every upgrade lives
+# in the columns of an UpgradeTable.
+Upgrade = namedtuple("Upgrade", "name base_cost base_production icon description required_upgrade",
+                     defaults=(None,))
+
+
+class UpgradeTable:
+    """Column store for the upgrades of one game.
+
+    Every numeric field is a NumPy array indexed by upgrade position, so
+    sums, masks and ratios over the whole shop are single vectorized
+    operations. Iterating or indexing the table yields UpgradeView objects
+    that read and write the columns.
+    """
+
+    def __init__(self, upgrades):
+        self.definitions = upgrades = list(upgrades)
+        self.names = [upgrade.name for upgrade in upgrades]
+        self.icons = [upgrade.icon for upgrade in upgrades]
+        self.descriptions = [upgrade.description for upgrade in upgrades]
+        self.required_upgrades = [upgrade.required_upgrade for upgrade in upgrades]
+        self.indexes = {name: i for i, name in enumerate(self.names)}
+
+        # Prerequisite graph, compiled once: the position of each upgrade's
+        # required upgrade (-1 for none) and the upgrades each one unlocks
+        self.required_indexes = np.full(len(upgrades), -1, dtype=np.int64)
+        self.dependents = [[] for _ in upgrades]
+        for i, required in enumerate(self.required_upgrades):
+            if upgrades[i].base_cost < 1:
+                raise ValueError(f"Upgrade {self.names[i]!r} must cost at least 1, not {upgrades[i].base_cost!r}")
+            if not required:
+                continue
+            if required not in self.indexes:
+                raise ValueError(f"Upgrade {self.names[i]!r} requires unknown upgrade {required!r}")
+            self.required_indexes[i] = self.indexes[required]
+            self.dependents[self.indexes[required]].append(i)
+        self.has_requirement = self.required_indexes >= 0
+
+        # Costs are whole numbers; float64 holds them exactly up to 2**53
+        self.base_cost = np.array([upgrade.base_cost for upgrade in upgrades], dtype=float)
+        self.base_production = np.array([upgrade.base_production for upgrade in upgrades], dtype=float)
+        self.count = np.zeros(len(upgrades), dtype=np.int64)
+        self.cost = np.zeros(len(upgrades))
+        self.production = np.zeros(len(upgrades))
+        self.total_bought = np.zeros(len(upgrades), dtype=np.int64)
+        # Python ints, the sum of many prices can pass both 2**53 and float range
+        self.total_spent = np.zeros(len(upgrades), dtype=object)
+        self.views = [UpgradeView(self, i) for i in range(len(upgrades))]
+        self.reset()
+
+    def __len__(self):
+        return len(self.views)
+
+    def __iter__(self):
+        return iter(self.views)
+
+    def __getitem__(self, key):
+        """Return the view for an upgrade position or name"""
+        if isinstance(key, str):
+            key = self.indexes[key]
+        return self.views[key]
+
+    def __contains__(self, name):
+        return name in self.indexes
+
+    def reset(self):
+        self.count[:] = 0
+        self.cost[:] = self.base_cost
+        self.production[:] = self.base_production
+        self.total_bought[:] = 0
+        self.total_spent[:] = 0
+
+    def contributions(self, out=None):
+        """Production of every upgrade (production * count)"""
+        return np.multiply(self.production, self.count, out=out)
+
+    def affordable(self, budget):
+        """Boolean mask of the upgrades whose next unit costs at most budget"""
+        return self.cost <= budget
+
+    def available(self):
+        """Boolean mask of the upgrades without a prerequisite or whose prerequisite has been bought"""
+        return ~self.has_requirement | (self.count[self.required_indexes] > 0)
+
+    def payback_times(self):
+        """Seconds the next unit of each upgrade needs to pay back its cost"""
+        with np.errstate(divide="ignore"):
+            return self.cost / self.base_production
+
+
+class UpgradeView:
+    """One row of an UpgradeTable, with the attributes the views use"""
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def name(self):
+        return self.table.names[self.index]
+
+    @property
+    def icon(self):
+        return self.table.icons[self.index]
+
+    @property
+    def description(self):
+        return self.table.descriptions[self.index]
+
+    @property
+    def required_upgrade(self):
+        return self.table.required_upgrades[self.index]  # Name of the required upgrade
+
+    @property
+    def achievement_name(self):
+        return f"First {self.name}"
+
+    @property
+    def base_cost(self):
+        return int(self.table.base_cost[self.index])
+
+    @property
+    def base_production(self):
+        return float(self.table.base_production[self.index])
+
+    @property
+    def count(self):
+        return int(self.table.count[self.index])
+
+    @count.setter
+    def count(self, value):
+        self.table.count[self.index] = value
+
+    @property
+    def cost(self):
+        return int(self.table.cost[self.index])
+
+    @cost.setter
+    def cost(self, value):
+        self.table.cost[self.index] = value
+
+    @property
+    def production(self):
+        return float(self.table.production[self.index])
+
+    @production.setter
+    def production(self, value):
+        self.table.production[self.index] = value
+
+    @property
+    def total_bought(self):
+        return int(self.table.total_bought[self.index])
+
+    @total_bought.setter
+    def total_bought(self, value):
+        self.table.total_bought[self.index] = value
+
+    @property
+    def total_spent(self):
+        return int(self.table.total_spent[self.index])
+
+    @total_spent.setter
+    def total_spent(self, value):
+        self.table.total_spent[self.index] = value
+
+
+class GameEngine:
+    """Currency, upgrades and achievements shared by every game.
+
+    Views drive the engine through click(), buy() and tick() and then call
+    pop_events() to find out what happened (achievements, first purchases,
+    level ups, kills).
+    """
+    # Verb used in the "First <upgrade>" achievement descriptions
+    upgrade_verb = "Buy"
+
+    def __init__(self, upgrades, achievements=None, timestamp=default_timestamp, seed=None):
+        self.upgrades = UpgradeTable(upgrades)
+        # production * count of every upgrade, kept in sync on purchase, load and reset
+        self.production_by_upgrade = np.zeros(len(self.upgrades))
+        self.production_total = 0.0
+        self.timestamp = timestamp
+        self.rng = random.Random()  # Every random game decision draws from this stream
+        self.events = []
+        self.growth_tables = {}  # GrowthTable per starting value, shared by every curve with the same start
+
+        # Views may pass their own themed names and descriptions for the built-in achievements
+        if achievements is None:
+            achievements = self.create_achievements()
+        self.achievements = {name: dict(achievement) for name, achievement in achievements.items()}
+        for upgrade in self.upgrades:
+            self.achievements[upgrade.achievement_name] = {
+                "name": upgrade.achievement_name,
+                "description": f"{self.upgrade_verb} your first {upgrade.name.lower()}",
+                "unlocked": False
+            }
+
+        self.reset(seed)
+
+    def create_achievements(self):
+        """Return the game specific achievements, keyed by id"""
+        return {}
+
+    def reset(self, seed=None):
+        """Reset all state to a fresh game whose random stream starts from seed.
+
+        A new seed is drawn when seed is None; it is kept in self.seed so the
+        game can be replayed.
+        """
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng.seed(self.seed)
+        self.currency = 0
+        self.currency_per_click = 1
+        self.total_currency = 0
+        self.clear_remainders()
+        self.total_clicks = 0
+        self.upgrades.reset()
+        self.recompute_production()
+        for achievement in self.achievements.values():
+            achievement["unlocked"] = False
+        self.events = []
+
+    def setup_data(self):
+        """Return the constructor arguments of this engine in JSON friendly form"""
+        return {
+            "upgrades": [list(definition) for definition in self.upgrades.definitions],
+            "achievements": {name: dict(achievement, unlocked=False)
+                             for name, achievement in self.achievements.items()}
+        }
+
+    def pop_events(self):
+        """Return and clear the events recorded since the last call"""
+        events = self.events
+        self.events = []
+        return events
+
+    def total_production(self):
+        return self.production_total
+
+    def recompute_production(self):
+        """Rebuild the per-upgrade production array and its total from scratch"""
+        self.upgrades.contributions(out=self.production_by_upgrade)
+        self.production_total = float(self.production_by_upgrade.sum())
+
+    def update_production(self, upgrade):
+        """Refresh one upgrade's contribution and adjust the total by the difference"""
+        index = upgrade.index
+        contribution = upgrade.production * upgrade.count
+        self.production_total += contribution - float(self.production_by_upgrade[index])
+        self.production_by_upgrade[index] = contribution
+
+    def clear_remainders(self):
+        """Forget the increments too small to register yet, after the amounts are set directly"""
+        self.currency_remainder = 0.0
+        self.total_remainder = 0.0
+
+    def earn(self, amount):
+        amount = promote(amount)
+        self.currency, self.currency_remainder = add_exact(self.currency, self.currency_remainder, amount)
+        self.total_currency, self.total_remainder = add_exact(self.total_currency, self.total_remainder, amount)
+        # Floats are fastest, so only switch to BigNumber once the lifetime total needs it
+        if self.total_currency >= BIG_NUMBER_START:
+            self.currency = promote(self.currency)
+            self.total_currency = BigNumber.of(self.total_currency)
+
+    def spend(self, price):
+        """Subtract a whole number price from the currency"""
+        rounded = float(price)
+        self.currency, self.currency_remainder = add_exact(self.currency, self.currency_remainder, -rounded)
+        # Running totals of a GrowthTable can have more digits than a float holds
+        self.currency_remainder -= price - int(rounded)
+
+    def click(self):
+        """Handle one manual click"""
+        self.earn(self.currency_per_click)
+        self.total_clicks += 1
+
+    def growth_table(self, start, index, current):
+        """Return (table, index) such that table.value(index) == current.
+
+        current is expected to be step `index` of the curve beginning at
+        `start`. If it was saved by a different curve the returned table
+        continues from current instead.
+        """
+        table = self.growth_tables.get(start)
+        if table is None:
+            table = self.growth_tables[start] = GrowthTable(start)
+        if table.value(index) == current:
+            return table, index
+
+        table = self.growth_tables.get(current)
+        if table is None:
+            table = self.growth_tables[current] = GrowthTable(current)
+        return table, 0
+
+    def cost_table(self, upgrade):
+        """Return the GrowthTable holding the upgrade's costs and the index of its current cost"""
+        return self.growth_table(upgrade.base_cost, upgrade.count, upgrade.cost)
+
+    def quote(self, upgrade, amount=1):
+        """Return (count, price) for buying `amount` units of the upgrade.
+
+        amount may be BUY_MAX, in which case count is the number of units the
+        current currency pays for (possibly 0).
+        """
+        table, index = self.cost_table(upgrade)
+        if amount == BUY_MAX:
+            amount = table.max_count(index, self.currency)
+        return amount, table.total(index, amount)
+
+    def buy(self, name, amount=1):
+        """Buy `amount` units (or BUY_MAX) of the named upgrade.
+
+        Returns (count, price) for the units bought, or None if the player
+        cannot afford them. All units are applied in a single state change.
+        """
+        upgrade = self.upgrades[name]
+        table, index = self.cost_table(upgrade)
+        if amount == BUY_MAX:
+            amount = table.max_count(index, self.currency)
+        if amount <= 0:
+            return None
+        # Every check comes before the first state change, so a purchase is all or nothing
+        price = table.total(index, amount)
+        if self.currency < price:
+            return None  # Also when the price is infinite, past the end of the table
+
+        self.spend(price)
+        first_purchase = upgrade.count == 0
+        upgrade.count += amount
+        upgrade.total_bought += amount
+        upgrade.total_spent += price
+        upgrade.cost = table.value(index + amount)  # Cost grows by 50% per unit
+        upgrade.production += upgrade.base_production * amount  # Increase production
+        self.update_production(upgrade)
+        if first_purchase:
+            # Only the first unit can make other upgrades available
+            self.events.append(("first_purchase", name))
+
+        # Check for upgrade achievement
+        self.unlock_achievement(upgrade.achievement_name)
+        return amount, price
+
+    def affordable_mask(self):
+        """Boolean mask of the upgrades whose next unit the player can pay for"""
+        return self.upgrades.affordable(float(self.currency))
+
+    def is_available(self, upgrade):
+        """Return True if the upgrade's prerequisite has been bought"""
+        required = self.upgrades.required_indexes[upgrade.index]
+        return required < 0 or bool(self.upgrades.count[required] > 0)
+
+    def tick(self, dt):
+        """Advance the simulation by dt seconds, returning the amount produced"""
+        total_production = self.total_production()
+        if total_production <= 0:
+            return 0
+        earned = multiply(total_production, dt)
+        self.earn(earned)
+        self.check_achievements()
+        return earned
+
+    def advance_offline(self, seconds):
+        """Apply the production of `seconds` spent away from the game in one step.
+
+        Returns a summary dict for the welcome back notification. The cost
+        does not depend on how long the player was away.
+        """
+        earned = 0
+        if seconds > 0:
+            earned = multiply(self.total_production(), seconds)
+        if earned > 0:
+            self.earn(earned)
+            self.check_achievements()
+        return {"seconds": seconds, "earned": earned}
+
+    def check_achievements(self):
+        pass
+
+    def unlock_achievement(self, achievement_name):
+        """Unlock an achievement, returning True if it was newly unlocked"""
+        achievement = self.achievements[achievement_name]
+        if achievement["unlocked"]:
+            return False
+        achievement["unlocked"] = True
+        self.events.append(("achievement", achievement_name))
+        return True
+
+    def to_save_data(self):
+        save_data = {"achievements": self.achievements}
+        for upgrade in self.upgrades:
+            save_data[upgrade.name] = {
+                "count": upgrade.count,
+                "cost": upgrade.cost,
+                "production": upgrade.production,
+                "total_bought": upgrade.total_bought,
+                "total_spent": upgrade.total_spent
+            }
+        return save_data
+
+    def load_save_data(self, save_data):
+        for achievement_name, achievement in save_data.get("achievements", {}).items():
+            if achievement_name in self.achievements:
+                self.achievements[achievement_name]["unlocked"] = achievement.get("unlocked", False)
+
+        for upgrade in self.upgrades:
+            if upgrade.name in save_data:
+                upgrade_data = save_data[upgrade.name]
+                upgrade.count = upgrade_data["count"]
+                upgrade.cost = upgrade_data["cost"]
+                upgrade.production = upgrade_data["production"]
+                upgrade.total_bought = upgrade_data.get("total_bought", 0)
+                upgrade.total_spent = upgrade_data.get("total_spent", 0)
+        self.recompute_production()
+        # Saves keep the amounts only, to float precision
+        self.clear_remainders()
+        self.events = []
+
+
+class TickDriver:
+    """Advances an engine by the real time elapsed between update() calls.
+
+    Time is measured on a monotonic clock and fed through an accumulator in
+    fixed steps, so income does not depend on how late the event loop
+    delivers the timer. When more than max_catch_up steps are pending (a
+    modal dialog, a suspended laptop) the whole gap is applied as one
+    closed-form tick instead of being replayed step by step.
+    """
+
+    def __init__(self, engine, step=0.25, max_catch_up=40, clock=time.monotonic):
+        self.engine = engine
+        self.step = step
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.restart()
+
+    def restart(self):
+        """Start measuring from now, dropping any time not yet applied"""
+        self.last_time = self.clock()
+        self.accumulator = 0.0
+
+    def update(self):
+        """Apply every whole step elapsed since the last call, returning the amount produced"""
+        now = self.clock()
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        steps = int(self.accumulator // self.step)
+        if steps <= 0:
+            return 0
+        self.accumulator -= steps * self.step
+
+        if steps > self.max_catch_up:
+            # Production is constant between purchases, so one long tick is exact
+            return self.engine.tick(steps * self.step)
+        earned = 0
+        for _ in range(steps):
+            earned += self.engine.tick(self.step)
+        return earned
+
+
+class ClickerEngine(GameEngine):
+    """Rules for the coin clicker: coins, upgrades and coin milestones"""
+
+    def create_achievements(self):
+        return {
+            "First Click": {"name": "First Click", "description": "Click the coin for the first time", "unlocked": False},
+            "Coin Master": {"name": "Coin Master", "description": "Reach 100 coins", "unlocked": False},
+            "Coin Empire": {"name": "Coin Empire", "description": "Reach 1000 coins", "unlocked": False}
+        }
+
+    @property
+    def coins(self):
+        return self.currency
+
+    @property
+    def total_coins(self):
+        return self.total_currency
+
+    @property
+    def coins_per_click(self):
+        return self.currency_per_click
+
+    def click(self):
+        super().click()
+        self.check_achievements()
+        self.unlock_achievement("First Click")
+
+    def check_achievements(self):
+        if self.currency >= 100:
+            self.unlock_achievement("Coin Master")
+        if self.currency >= 1000:
+            self.unlock_achievement("Coin Empire")
+
+    def to_save_data(self):
+        save_data = {
+            "coins": number_to_save(self.currency),
+            "coins_per_click": self.currency_per_click,
+            "total_coins": number_to_save(self.total_currency),
+            "total_clicks": self.total_clicks
+        }
+        save_data.update(super().to_save_data())
+        return save_data
+
+    def load_save_data(self, save_data):
+        self.currency = number_from_save(save_data["coins"])
+        self.currency_per_click = save_data["coins_per_click"]
+        self.total_currency = number_from_save(save_data.get("total_coins", 0))
+        self.total_clicks = save_data.get("total_clicks", 0)
+        super().load_save_data(save_data)
+
+
+class RPGEngine(GameEngine):
+    """Rules for the enemy battlers: XP, player levels and enemies.
+
+    enemy_ids is the catalogue of enemies that can be picked as the next
+    opponent; the views use the same ids to find the enemy images.
+    """
+    upgrade_verb = "Recruit"
+    # Number of distinct enemies that bulk kills are shared between
+    defeat_sample_size = 16
+    # XP needed for level 2, each later level needs 50% more (truncated)
+    first_level_xp = 100
+
+    def __init__(self, upgrades, enemy_ids, achievements=None, timestamp=default_timestamp, seed=None):
+        self.enemy_ids = list(enemy_ids) or ["placeholder"]
+        self.max_hp = 100
+        super().__init__(upgrades, achievements, timestamp, seed)
+
+    def create_achievements(self):
+        return {
+            "First Kill": {"name": "First Kill", "description": "Defeat your first monster", "unlocked": False},
+            "Monster Hunter": {"name": "Monster Hunter", "description": "Reach Level 5", "unlocked": False},
+            "Legendary Slayer": {"name": "Legendary Slayer", "description": "Reach Level 20", "unlocked": False}
+        }
+
+    def setup_data(self):
+        setup_data = super().setup_data()
+        setup_data["enemy_ids"] = self.enemy_ids
+        return setup_data
+
+    def reset(self, seed=None):
+        super().reset(seed)
+        self.player_level = 1
+        self.xp_to_next_level = self.first_level_xp
+        self.enemies_defeated = 0
+        self.enemy_stats = {}  # Dictionary to track statistics for each unique enemy
+        self.last_defeated_ids = ()  # Enemies whose statistics the last defeat changed
+        self.next_enemy_id = self.rng.choice(self.enemy_ids)
+        self.select_random_enemy()
+
+    @property
+    def xp(self):
+        return self.currency
+
+    @property
+    def total_xp(self):
+        return self.total_currency
+
+    @property
+    def xp_per_click(self):
+        return self.currency_per_click
+
+    def get_enemy_name(self):
+        """Return formatted name of the current enemy for display"""
+        return format_enemy_name(self.enemy_id)
+
+    def select_random_enemy(self):
+        """Bring in the enemy drawn last time and draw the one after it.
+
+        Drawing one enemy ahead lets the views load next_enemy_id's image
+        before it is needed.
+        """
+        self.enemy_id = self.next_enemy_id
+        self.next_enemy_id = self.rng.choice(self.enemy_ids)
+        self.enemy_hp = self.max_hp
+
+    def apply_bulk_damage(self, damage):
+        """Apply a large amount of damage at once, returning the number of enemies defeated.
+
+        Damage left over after an enemy falls carries into the next one, so
+        the number of kills is resolved arithmetically instead of per enemy.
+        """
+        if damage < self.enemy_hp:
+            self.enemy_hp -= damage
+            return 0
+
+        overflow = damage - self.enemy_hp
+        if isinstance(overflow, BigNumber):
+            # The remainder is far below the precision of the damage, start the next enemy fresh
+            kills = 1 + int(overflow / self.max_hp)
+            remainder = 0
+        else:
+            kills = 1 + int(overflow // self.max_hp)
+            remainder = overflow % self.max_hp
+        self.record_defeats(kills)
+        self.enemy_hp = self.max_hp - remainder
+        self.unlock_achievement("First Kill")
+        return kills
+
+    def record_defeats(self, kills):
+        """Track statistics for the current enemy and the kills - 1 enemies after it.
+
+        The following enemies are drawn as a bounded random sample that shares
+        the kills between them, so the cost does not grow with kills. A new
+        enemy is selected afterwards. The ids whose statistics changed are
+        kept in last_defeated_ids.
+        """
+        defeats = {self.enemy_id: 1}
+        remaining = kills - 1
+        if remaining > 0:
+            sample = self.rng.choices(self.enemy_ids, k=min(remaining, self.defeat_sample_size))
+            share, extra = divmod(remaining, len(sample))
+            for i, enemy_id in enumerate(sample):
+                defeats[enemy_id] = defeats.get(enemy_id, 0) + share + (1 if i < extra else 0)
+
+        timestamp = self.timestamp()
+        for enemy_id, count in defeats.items():
+            if enemy_id not in self.enemy_stats:
+                self.enemy_stats[enemy_id] = {
+                    "name": format_enemy_name(enemy_id),
+                    "defeats": count,
+                    "last_defeated": timestamp
+                }
+            else:
+                self.enemy_stats[enemy_id]["defeats"] += count
+                self.enemy_stats[enemy_id]["last_defeated"] = timestamp
+        self.last_defeated_ids = tuple(defeats)
+        self.enemies_defeated += kills
+        self.select_random_enemy()
+
+    def damage_enemy(self, damage, manual=False):
+        """Apply damage to the current enemy, returning the number of enemies defeated.
+
+        Overflow damage carries into the following enemies, so a single tick
+        can defeat any number of them at constant cost. Kills are reported
+        as one ("enemy_defeated", first_enemy_id, manual, kills, enemy_ids)
+        event, enemy_ids being the enemies whose statistics changed.
+        """
+        defeated_enemy_id = self.enemy_id
+        kills = self.apply_bulk_damage(damage)
+        if kills:
+            self.events.append(("enemy_defeated", defeated_enemy_id, manual, kills, self.last_defeated_ids))
+        return kills
+
+    def click(self):
+        # Apply damage to the enemy (basic damage = xp_per_click)
+        self.damage_enemy(self.currency_per_click, manual=True)
+        super().click()
+        self.check_level_up()
+
+    def tick(self, dt):
+        total_production = self.total_production()
+        if total_production <= 0:
+            return 0
+
+        # Calculate XP earned this tick
+        xp_earned = multiply(total_production, dt)
+        self.earn(xp_earned)
+
+        # Auto-damage enemy based on party members' contribution
+        self.damage_enemy(xp_earned)
+
+        self.check_level_up()
+        return xp_earned
+
+    def advance_offline(self, seconds):
+        summary = super().advance_offline(seconds)
+        summary["enemies_defeated"] = 0
+        summary["levels"] = 0
+        if summary["earned"] > 0:
+            # The party kept fighting and the XP they earned kept paying for levels
+            summary["enemies_defeated"] = self.apply_bulk_damage(summary["earned"])
+            summary["levels"] = self.resolve_level_ups()
+        return summary
+
+    def check_level_up(self):
+        """Apply pending level ups and push a single ("level_up", level, levels) event"""
+        levels = self.resolve_level_ups()
+        if levels:
+            self.events.append(("level_up", self.player_level, levels))
+        return levels
+
+    def level_table(self):
+        """Return the GrowthTable of XP thresholds and the index of the current one"""
+        return self.growth_table(self.first_level_xp, self.player_level - 1, self.xp_to_next_level)
+
+    def resolve_level_ups(self):
+        """Apply every level up the current XP pays for, returning the number of levels gained.
+
+        The XP needed grows by 50% (truncated) per level, so the cumulative
+        thresholds are a GrowthTable and the levels gained are one bisect.
+        """
+        if self.currency < self.xp_to_next_level:
+            return 0
+        table, index = self.level_table()
+        levels = table.max_count(index, self.currency)
+        if levels <= 0:
+            return 0
+        self.spend(table.total(index, levels))
+        self.player_level += levels
+        self.xp_to_next_level = table.value(index + levels)
+        self.check_level_achievements()
+        return levels
+
+    def check_level_achievements(self):
+        # Check for level-based achievements
+        if self.player_level >= 5:
+            self.unlock_achievement("Monster Hunter")
+        if self.player_level >= 20:
+            self.unlock_achievement("Legendary Slayer")
+
+    def to_save_data(self):
+        save_data = {
+            "xp": number_to_save(self.currency),
+            "xp_per_click": self.currency_per_click,
+            "total_xp": number_to_save(self.total_currency),
+            "total_clicks": self.total_clicks,
+            "player_level": self.player_level,
+            "xp_to_next_level": self.xp_to_next_level,
+            "enemies_defeated": self.enemies_defeated,
+            "enemy_stats": self.enemy_stats  # Save enemy statistics
+        }
+        save_data.update(super().to_save_data())
+        return save_data
+
+    def load_save_data(self, save_data):
+        self.currency = number_from_save(save_data.get("xp", 0))
+        self.currency_per_click = save_data.get("xp_per_click", 1)
+        self.total_currency = number_from_save(save_data.get("total_xp", 0))
+        self.total_clicks = save_data.get("total_clicks", 0)
+        self.player_level = save_data.get("player_level", 1)
+        self.xp_to_next_level = save_data.get("xp_to_next_level", 100)
+        self.enemies_defeated = save_data.get("enemies_defeated", 0)
+
+        # Load enemy statistics if available
+        self.enemy_stats = save_data.get("enemy_stats", {})
+        super().load_save_data(save_data)
+
+
+# Ticks are recorded as one run while each stays within this many seconds
+# of the time the run predicts for it
+TICK_RUN_DRIFT = 1.0
+
+
+def run_seconds(seconds, dt, index):
+    """Recorded time of tick number index of a run of dt ticks that starts at seconds"""
+    return round(seconds + index * dt, 3)
+
+
+class InputRecorder:
+    """Log of the inputs that drove an engine, so a session can be replayed headless.
+
+    attach() wraps the engine's click(), buy() and tick() methods on the
+    instance and records each call as [seconds, action, args]. Consecutive
+    ticks of the same dt are run-length encoded as [seconds, "tick", [dt],
+    count], ticks dt seconds apart, so an idle session does not grow the log.
+    While recording, the engine's timestamps come from the recorded times,
+    so replay_recording() reproduces the final state exactly.
+    """
+    actions = ("click", "buy", "tick")
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.engine = None
+        self.recording = None
+
+    def attach(self, engine):
+        """Start a new recording of engine, which should have just been reset"""
+        self.detach()
+        self.engine = engine
+        self.start = self.clock()
+        self.now = self.start
+        self.recording = {
+            "engine": type(engine).__name__,
+            "setup": engine.setup_data(),
+            "seed": engine.seed,
+            "start": self.start,
+            "entries": []
+        }
+        self.original_timestamp = engine.timestamp
+        engine.timestamp = lambda: default_timestamp(self.now)
+        for action in self.actions:
+            setattr(engine, action, self.wrap(action, getattr(engine, action)))
+
+    def detach(self):
+        """Stop recording and restore the engine's own methods"""
+        if self.engine is None:
+            return
+        for action in self.actions:
+            delattr(self.engine, action)
+        self.engine.timestamp = self.original_timestamp
+        self.engine = None
+
+    def wrap(self, action, method):
+        entries = self.recording["entries"]
+
+        def record(*args):
+            seconds = round(self.clock() - self.start, 3)
+            last = entries[-1] if entries else None
+            if action == "tick" and last is not None and last[1:3] == ["tick", list(args)]:
+                count = last[3] if len(last) > 3 else 1
+                predicted = run_seconds(last[0], args[0], count)
+                if abs(predicted - seconds) <= TICK_RUN_DRIFT:
+                    # The engine sees the time replay will give this tick
+                    self.now = self.start + predicted
+                    last[3:] = [count + 1]
+                    return method(*args)
+            self.now = self.start + seconds
+            entries.append([seconds, action, list(args)])
+            return method(*args)
+        return record
+
+    def snapshot(self):
+        """Return a copy of the recording that later inputs do not change, e.g. to write it on another thread"""
+        entries = self.recording["entries"]
+        snapshot = dict(self.recording, entries=entries[:-1])
+        if entries:
+            # Only the last entry changes, when a tick run grows
+            snapshot["entries"].append(list(entries[-1]))
+        return snapshot
+
+
+def replay_recording(recording):
+    """Rebuild the engine of an InputRecorder recording and replay every input.
+
+    Runs as fast as possible and returns the engine in its final state.
+    """
+    arguments = dict(recording["setup"])
+    arguments["upgrades"] = [Upgrade(*definition) for definition in arguments["upgrades"]]
+    engine = ENGINE_CLASSES[recording["engine"]](**arguments)
+    engine.reset(recording["seed"])
+
+    now = recording["start"]
+    engine.timestamp = lambda: default_timestamp(now)
+    for entry in recording["entries"]:
+        seconds, action, args = entry[:3]
+        method = getattr(engine, action)
+        count = entry[3] if len(entry) > 3 else 1  # Only tick runs repeat
+        for index in range(count):
+            now = recording["start"] + (run_seconds(seconds, args[0], index) if count > 1 else seconds)
+            method(*args)
+            engine.events = []
+    return engine
+
+
+# Engines that replay_recording() can rebuild, by class name
+ENGINE_CLASSES = {"ClickerEngine": ClickerEngine, "RPGEngine": RPGEngine}
@@ -0,0 +1,276 @@
+"""Enemy image loading shared by rpg_game.py and space_game.py.
+
+Only the file names are indexed at startup. Pixmaps are decoded the first
+time an enemy is shown and kept in a least recently used cache with a byte
+budget, so memory does not grow with the size of the enemy catalogue.
+
+The display sizes can also be packed into one atlas file (see
+build_enemy_atlas.py). It is memory-mapped and sprites are sliced out of it
+without decoding any PNG. Without an atlas, request_scaled() decodes and
+scales on a worker thread so the GUI thread never waits for a PNG.
+"""
+import glob
+import json
+import mmap
+import os
+import struct
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QColor, QImage, QPixmap
+
+# Enough for 16 decoded 512x512 ARGB images
+DEFAULT_BUDGET_BYTES = 16 * 1024 * 1024
+
+DEFAULT_ATLAS_PATH = "images/enemies.atlas"
+# Battle view, pressed battle view and bestiary thumbnail sizes in pixels
+ATLAS_SIZES = (100, 90, 80)
+ATLAS_MAGIC = b"ENEMYATL"
+ATLAS_FORMAT = QImage.Format.Format_ARGB32_Premultiplied
+
+
+def enemy_image_paths(enemy_directory):
+    """Return {enemy id: png path} for every image in enemy_directory, sorted by id"""
+    # Use forward slashes for consistency
+    path_pattern = enemy_directory.replace("\\", "/") + "/*.png"
+    paths = {}
+    for image_file in sorted(glob.glob(path_pattern)):
+        name = os.path.basename(image_file).split(".")[0]  # Get filename without extension
+        paths[name] = image_file
+    return paths
+
+
+def build_atlas(enemy_directory, atlas_path, sizes=ATLAS_SIZES):
+    """Pack every enemy image at each of sizes into one file, returning the number of enemies.
+
+    Layout: ATLAS_MAGIC, a little endian uint32 header length, a JSON header
+    and then, for each size, the raw premultiplied ARGB32 pixels of every
+    enemy in header order.
+    """
+    paths = enemy_image_paths(enemy_directory)
+    ids = list(paths)
+    header = {"ids": ids, "sizes": list(sizes), "offsets": {}}
+    offset = 0
+    for size in sizes:
+        header["offsets"][str(size)] = offset
+        offset += len(ids) * size * size * 4
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    with open(atlas_path, "wb") as f:
+        f.write(ATLAS_MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for size in sizes:
+            for enemy_id in ids:
+                image = QImage(paths[enemy_id]).scaled(size, size, Qt.AspectRatioMode.IgnoreAspectRatio,
+                                                       Qt.TransformationMode.SmoothTransformation)
+                image = image.convertToFormat(ATLAS_FORMAT)
+                f.write(image.constBits().asstring(size * size * 4))
+    return len(ids)
+
+
+class EnemyAtlas:
+    """Read side of build_atlas(): a memory-mapped file of pre-scaled sprites"""
+
+    def __init__(self, atlas_path):
+        with open(atlas_path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(ATLAS_MAGIC)] != ATLAS_MAGIC:
+            raise ValueError(f"{atlas_path} is not an enemy atlas")
+        header_start = len(ATLAS_MAGIC) + 4
+        header_length, = struct.unpack("<I", self.data[len(ATLAS_MAGIC):header_start])
+        header = json.loads(self.data[header_start:header_start + header_length])
+        self.ids = header["ids"]
+        self.indexes = {enemy_id: i for i, enemy_id in enumerate(self.ids)}
+        self.pixels_start = header_start + header_length
+        self.offsets = {int(size): offset for size, offset in header["offsets"].items()}
+
+    def has(self, enemy_id, size):
+        return size in self.offsets and enemy_id in self.indexes
+
+    def image(self, enemy_id, size):
+        """Return the sprite as a QImage copied straight out of the mapping"""
+        sprite_bytes = size * size * 4
+        start = self.pixels_start + self.offsets[size] + self.indexes[enemy_id] * sprite_bytes
+        pixels = self.data[start:start + sprite_bytes]
+        # QImage does not own the buffer, so copy() before pixels goes away
+        return QImage(pixels, size, size, size * 4, ATLAS_FORMAT).copy()
+
+
+def pixmap_bytes(pixmap):
+    """Approximate memory held by a decoded pixmap"""
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+# EnemyImageCache per enemy directory, see shared_enemy_images()
+shared_caches = {}
+
+
+def shared_enemy_images(enemy_directory):
+    """Return the process-wide EnemyImageCache for enemy_directory, creating it on first use"""
+    cache = shared_caches.get(enemy_directory)
+    if cache is None:
+        cache = shared_caches[enemy_directory] = EnemyImageCache(enemy_directory)
+    return cache
+
+
+class ScaleTask(QRunnable):
+    """Decode and scale one enemy image with QImage, which is safe off the GUI thread"""
+
+    def __init__(self, cache, key, path, pixels):
+        super().__init__()
+        self.cache = cache
+        self.key = key
+        self.path = path
+        self.pixels = pixels
+
+    def run(self):
+        if self.path is None:
+            image = QImage(self.pixels, self.pixels, ATLAS_FORMAT)
+            image.fill(QColor(255, 0, 0))
+        else:
+            image = QImage(self.path)
+        if not image.isNull():
+            image = image.scaled(self.pixels, self.pixels, Qt.AspectRatioMode.IgnoreAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+        # Delivered to the cache's own (GUI) thread through a queued connection
+        self.cache.image_ready.emit(self.key, image)
+
+
+class EnemyImageCache(QObject):
+    """Enemy pixmaps decoded on demand and evicted least recently used first.
+
+    The cache holds the full size images keyed by enemy id and the scaled
+    variants keyed by (enemy id, size, device pixel ratio) under one budget.
+    Scaled variants come from the atlas when it has them.
+    """
+    image_ready = pyqtSignal(object, QImage)
+
+    def __init__(self, enemy_directory, budget_bytes=DEFAULT_BUDGET_BYTES, atlas_path=DEFAULT_ATLAS_PATH):
+        super().__init__()
+        self.budget_bytes = budget_bytes
+        self.pending = {}  # Key of a variant being scaled on a worker -> callbacks waiting for it
+        self.image_ready.connect(self.finish_request)
+        self.pixmaps = OrderedDict()  # Least recently used first
+        self.used_bytes = 0
+
+        self.atlas = None
+        self.paths = enemy_image_paths(enemy_directory)
+        if atlas_path and os.path.exists(atlas_path):
+            # Sprites are sliced from the atlas, PNGs are only read for enemies
+            # added after it was built and for sizes it does not hold
+            self.atlas = EnemyAtlas(atlas_path)
+            for enemy_id in self.atlas.ids:
+                self.paths.setdefault(enemy_id, os.path.join(enemy_directory, f"{enemy_id}.png"))
+            self.paths = dict(sorted(self.paths.items()))
+
+        if not self.paths:
+            print(f"Warning: No enemy images found in {enemy_directory}")
+            self.paths["placeholder"] = None
+
+    def keys(self):
+        return self.paths.keys()
+
+    def __contains__(self, enemy_id):
+        return enemy_id in self.paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    def get(self, enemy_id):
+        """Return the pixmap for enemy_id, decoding it if needed, or None for unknown ids"""
+        pixmap = self.pixmaps.get(enemy_id)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(enemy_id)
+            return pixmap
+        if enemy_id not in self.paths:
+            return None
+
+        return self.store(enemy_id, self.load(enemy_id))
+
+    def scaled(self, enemy_id, size, device_pixel_ratio=1.0):
+        """Return the enemy drawn at size x size logical pixels, or None for unknown ids.
+
+        Each variant is smooth scaled once for the screen's device pixel
+        ratio, so painting it is a plain blit.
+        """
+        key = (enemy_id, size, device_pixel_ratio)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+            return pixmap
+
+        pixels = round(size * device_pixel_ratio)
+        if self.atlas is not None and self.atlas.has(enemy_id, pixels):
+            pixmap = QPixmap.fromImage(self.atlas.image(enemy_id, pixels))
+        else:
+            source = self.get(enemy_id)
+            if source is None:
+                return None
+            pixmap = source.scaled(pixels, pixels, Qt.AspectRatioMode.IgnoreAspectRatio,
+                                   Qt.TransformationMode.SmoothTransformation)
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        return self.store(key, pixmap)
+
+    def request_scaled(self, enemy_id, size, device_pixel_ratio=1.0, callback=None):
+        """Like scaled(), but never decodes a PNG on the calling thread.
+
+        Cached and atlas variants are returned (and passed to callback)
+        right away. Otherwise None is returned, the image is scaled on the
+        global QThreadPool and callback receives the pixmap, or None if it
+        could not be loaded, once it is ready.
+        """
+        key = (enemy_id, size, device_pixel_ratio)
+        pixels = round(size * device_pixel_ratio)
+        if key in self.pixmaps or (self.atlas is not None and self.atlas.has(enemy_id, pixels)):
+            pixmap = self.scaled(enemy_id, size, device_pixel_ratio)
+            if callback is not None:
+                callback(pixmap)
+            return pixmap
+        if enemy_id not in self.paths:
+            if callback is not None:
+                callback(None)
+            return None
+
+        callbacks = self.pending.get(key)
+        if callbacks is None:
+            callbacks = self.pending[key] = []
+            QThreadPool.globalInstance().start(ScaleTask(self, key, self.paths[enemy_id], pixels))
+        if callback is not None:
+            callbacks.append(callback)
+        return None
+
+    def finish_request(self, key, image):
+        pixmap = None
+        if not image.isNull():
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(key[2])
+            self.store(key, pixmap)
+        for callback in self.pending.pop(key, []):
+            callback(pixmap)
+
+    def store(self, key, pixmap):
+        if key in self.pixmaps:
+            self.used_bytes -= pixmap_bytes(self.pixmaps[key])
+        self.pixmaps[key] = pixmap
+        self.used_bytes += pixmap_bytes(pixmap)
+        self.evict()
+        return pixmap
+
+    def load(self, enemy_id):
+        path = self.paths[enemy_id]
+        if path is None:
+            # Create a fallback red square as a placeholder
+            placeholder = QPixmap(512, 512)
+            placeholder.fill(QColor(255, 0, 0))
+            return placeholder
+        return QPixmap(path)
+
+    def evict(self):
+        """Drop least recently used pixmaps until the cache fits its budget.
+
+        The most recent pixmap is always kept, even if it alone is over budget.
+        """
+        while self.used_bytes > self.budget_bytes and len(self.pixmaps) > 1:
+            key, pixmap = self.pixmaps.popitem(last=False)
+            self.used_bytes -= pixmap_bytes(pixmap)
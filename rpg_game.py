@@ -2,15 +2,30 @@ import sys
 import json
 import os
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                            QHBoxLayout, QPushButton, QLabel, QGridLayout,
+                            QHBoxLayout, QPushButton, QLabel,
                             QMessageBox, QTabWidget, QScrollArea, QStackedWidget,
-                            QGraphicsOpacityEffect, QStackedLayout)
-from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QDateTime, QThread, pyqtSignal, QObject, QUrl, QRect
-from PyQt6.QtGui import QFont, QColor, QPainter, QPixmap
+                            QButtonGroup, QStackedLayout,
+                            QLineEdit, QComboBox)
+from PyQt6.QtCore import Qt, QDateTime, QThread, pyqtSignal, QObject, QUrl, QRect, QPoint
+from PyQt6.QtGui import QFont, QColor, QPainter, QPixmap, QRegion
 import threading
 import queue
-import winsound  # Windows-only sound module
+try:
+    import winsound  # Windows-only sound module
+except ImportError:
+    winsound = None  # Other platforms run silently, e.g. the offscreen benchmarks
 import random
+from frame_clock import shared_frame_clock
+from game_engine import RPGEngine, InputRecorder, TickDriver, Upgrade, BUY_MAX, format_duration, format_number
+from bestiary_model import SORT_ORDERS, BestiaryModel, BestiaryProxy, BestiaryView
+from image_cache import shared_enemy_images
+from shop_model import ShopModel, ShopView
+from view_state import ViewState
+
+# Notification priorities, higher ones are shown first
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
 
 # Use a flag to prevent too many sounds playing at once
 MAX_CONCURRENT_SOUNDS = 4
@@ -31,40 +46,31 @@ def play_sound_thread(sound_file):
 
 def play_sound(sound_file):
     """Windows sound playing function that doesn't cut off previous sounds"""
+    if winsound is None:
+        return
     # Start a new thread for each sound to allow overlapping
     sound_thread = threading.Thread(target=play_sound_thread, args=(sound_file,))
     sound_thread.daemon = True  # Make thread terminate when main program exits
     sound_thread.start()
 
-class Upgrade:
-    def __init__(self, name, base_cost, base_production, icon, description, required_upgrade=None):
-        self.name = name
-        self.count = 0
-        self.base_cost = base_cost
-        self.cost = base_cost
-        self.base_production = base_production
-        self.production = base_production
-        self.icon = icon
-        self.description = description
-        self.achievement_name = f"First {name}"
-        self.achievement_description = f"Recruit your first {name.lower()}"
-        self.required_upgrade = required_upgrade  # Name of the required upgrade
-        # Add stats tracking
-        self.total_bought = 0
-        self.total_spent = 0
-
 class SaveWorker(QThread):
     finished = pyqtSignal()
     error = pyqtSignal(str)
     
-    def __init__(self, save_data):
+    def __init__(self, save_data, recording=None, record_path=None):
         super().__init__()
         self.save_data = save_data
+        # Snapshot of the input log to write alongside the save, if recording
+        self.recording = recording
+        self.record_path = record_path
         
     def run(self):
         try:
             with open("rpg_save_game.json", "w") as f:
                 json.dump(self.save_data, f)
+            if self.recording is not None:
+                with open(self.record_path, "w") as f:
+                    json.dump(self.recording, f)
             self.finished.emit()
         except Exception as e:
             self.error.emit(str(e))
@@ -147,156 +153,121 @@ class MainMenu(QWidget):
         layout.setSpacing(20)
 
 class EnemyButton(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, engine, enemy_images, parent=None):
         super().__init__(parent)
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         self.setFixedSize(130, 150)  # Increased height for HP bar
         
-        # Find all enemy images
-        self.enemy_images = {}
-        self.enemy_directory = "images/enemies"
-        self.load_enemy_images()
-        
-        # Enemy state
-        self.current_enemy = None
-        self.enemy_name = ""
-        self.enemy_hp = 100
-        self.max_hp = 100
-        self.is_new_enemy = True  # Flag to track if enemy is new and not yet defeated
-        
-        # Select initial enemy
-        self.select_random_enemy()
+        # Enemy state lives in the engine, this widget only draws it
+        self.engine = engine
+        self.enemy_images = enemy_images
+        # Repaints and the click animation go through the shared frame clock
+        self.frame_clock = shared_frame_clock()
         
         # Click animation properties
+        self.image_size = 100
         self.is_clicked = False
         self.click_scale = 0.9  # Scale down to 90% when clicked
         
-    def load_enemy_images(self):
-        """Load all enemy images from the enemies directory"""
-        import glob
-        import os
-        
-        # Use forward slashes for consistency
-        path_pattern = self.enemy_directory.replace("\\", "/") + "/*.png"
-        image_files = glob.glob(path_pattern)
+        # Areas repainted independently, the sprite and the HP bar below it
+        self.image_rect = QRect(5, 5, self.image_size, self.image_size)
+        self.bar_rect = QRect(5, 130, 120, 15)
         
-        for image_file in image_files:
-            name = os.path.basename(image_file).split(".")[0]  # Get filename without extension
-            self.enemy_images[name] = QPixmap(image_file)
-            
-        if not self.enemy_images:
-            print(f"Warning: No enemy images found in {self.enemy_directory}")
-            # Create a fallback red square as a placeholder
-            placeholder = QPixmap(512, 512)
-            placeholder.fill(QColor(255, 0, 0))
-            self.enemy_images["placeholder"] = placeholder
+        # What the last paint drew, so refresh() only invalidates what changed
+        self.drawn_enemy_id = None
+        self.drawn_hp_fill = None
     
-    def select_random_enemy(self):
-        """Select a random enemy from the available images"""
-        if not self.enemy_images:
-            return
-            
-        import random
-        self.enemy_name = random.choice(list(self.enemy_images.keys()))
-        self.current_enemy = self.enemy_images[self.enemy_name]
-        self.enemy_hp = self.max_hp
-        self.is_new_enemy = True  # Mark this as a new enemy that hasn't been defeated
-        self.update()
-        
-    def damage_enemy(self, damage):
-        """Apply damage to the current enemy"""
-        self.enemy_hp -= damage
-        if self.enemy_hp <= 0:
-            # Get the defeated enemy's name and ID before selecting a new one
-            defeated_enemy_name = self.enemy_name
-            defeated_enemy_id = self.enemy_name
-            defeated_enemy_formatted_name = self.get_enemy_name()
-            
-            # Enemy defeated, select a new one
-            self.select_random_enemy()
-            
-            # Return both the defeated status and the defeated enemy info
-            return True, defeated_enemy_id, defeated_enemy_formatted_name
-        
-        self.update()
-        # Return False for not defeated and None for enemy info
-        return False, None, None
+    def hp_fill(self):
+        """Return (pixel width, color) of the HP bar fill for the current enemy"""
+        if self.engine.max_hp <= 0:
+            return 0, None
+        hp_width = int((self.engine.enemy_hp / self.engine.max_hp) * self.bar_rect.width())
+        
+        # Color changes based on HP percentage
+        hp_percent = self.engine.enemy_hp / self.engine.max_hp
+        if hp_percent > 0.6:
+            # Green for high health
+            return hp_width, (0, 200, 0)
+        elif hp_percent > 0.3:
+            # Yellow for medium health
+            return hp_width, (200, 200, 0)
+        # Red for low health
+        return hp_width, (200, 0, 0)
+    
+    def refresh(self):
+        """Schedule a repaint of the sprite and/or HP bar, only if their pixels changed"""
+        if self.engine.enemy_id != self.drawn_enemy_id:
+            self.frame_clock.invalidate(self, self.image_rect)
+        if self.hp_fill() != self.drawn_hp_fill:
+            self.frame_clock.invalidate(self, self.bar_rect)
     
     def paintEvent(self, event):
         painter = QPainter(self)
-        
+        if event.rect().intersects(self.image_rect):
+            self.paint_enemy(painter)
+        if event.rect().intersects(self.bar_rect):
+            self.paint_hp_bar(painter)
+        painter.end()
+    
+    def paint_enemy(self, painter):
         # Draw enemy image
-        if self.current_enemy:
-            # Calculate target rect for the image (120x120 at the top)
-            target_rect = QRect(5, 5, 100, 100)
-            
-            # If clicked, scale down the drawing
-            if self.is_clicked:
-                # Calculate scaled rect
-                scale_factor = self.click_scale
-                width_diff = target_rect.width() * (1 - scale_factor)
-                height_diff = target_rect.height() * (1 - scale_factor)
-                scaled_rect = QRect(
-                    int(target_rect.x() + width_diff / 2),
-                    int(target_rect.y() + height_diff / 2),
-                    int(target_rect.width() * scale_factor),
-                    int(target_rect.height() * scale_factor)
-                )
-                painter.drawPixmap(scaled_rect, self.current_enemy)
-            else:
-                painter.drawPixmap(target_rect, self.current_enemy)
+        # Target rect for the image (100x100 at the top)
+        target_rect = self.image_rect
+        
+        # If clicked, scale down the drawing
+        if self.is_clicked:
+            # Calculate scaled rect
+            scale_factor = self.click_scale
+            width_diff = target_rect.width() * (1 - scale_factor)
+            height_diff = target_rect.height() * (1 - scale_factor)
+            target_rect = QRect(
+                int(target_rect.x() + width_diff / 2),
+                int(target_rect.y() + height_diff / 2),
+                int(target_rect.width() * scale_factor),
+                int(target_rect.height() * scale_factor)
+            )
         
+        # The cache hands out the image already scaled for this size and screen, so this is a plain blit
+        current_enemy = self.enemy_images.scaled(self.engine.enemy_id, target_rect.width(), self.devicePixelRatioF())
+        if current_enemy:
+            painter.drawPixmap(target_rect.topLeft(), current_enemy)
+        self.drawn_enemy_id = self.engine.enemy_id
+    
+    def paint_hp_bar(self, painter):
         # Draw HP bar background
-        bar_rect = QRect(5, 130, 120, 15)
+        bar_rect = self.bar_rect
         painter.setPen(Qt.PenStyle.NoPen)
         painter.setBrush(QColor(60, 60, 60))
         painter.drawRect(bar_rect)
         
         # Draw HP bar fill based on current HP
-        if self.max_hp > 0:
-            hp_width = int((self.enemy_hp / self.max_hp) * bar_rect.width())
+        hp_width, hp_color = self.drawn_hp_fill = self.hp_fill()
+        if hp_color is not None:
             hp_rect = QRect(bar_rect.x(), bar_rect.y(), hp_width, bar_rect.height())
-            
-            # Color changes based on HP percentage
-            hp_percent = self.enemy_hp / self.max_hp
-            if hp_percent > 0.6:
-                # Green for high health
-                hp_color = QColor(0, 200, 0)
-            elif hp_percent > 0.3:
-                # Yellow for medium health
-                hp_color = QColor(200, 200, 0)
-            else:
-                # Red for low health
-                hp_color = QColor(200, 0, 0)
-                
-            painter.setBrush(hp_color)
+            painter.setBrush(QColor(*hp_color))
             painter.drawRect(hp_rect)
         
         # Draw border around HP bar
         painter.setPen(QColor(200, 200, 200))
         painter.setBrush(Qt.BrushStyle.NoBrush)
         painter.drawRect(bar_rect)
-        
-        painter.end()
+    
+    def prefetch(self, enemy_id):
+        """Build the normal and pressed images of an enemy before it is shown"""
+        for size in (self.image_size, int(self.image_size * self.click_scale)):
+            self.enemy_images.request_scaled(enemy_id, size, self.devicePixelRatioF())
     
     def show_click_animation(self):
-        # Set clicked state
+        # Set clicked state, only the sprite changes size
         self.is_clicked = True
-        self.update()
+        self.frame_clock.invalidate(self, self.image_rect)
         
-        # Reset after short delay
-        QTimer.singleShot(100, self.reset_click_animation)
+        # Reset after short delay, rescheduling replaces the reset of an earlier click
+        self.frame_clock.call_later((self, "click"), 0.1, self.reset_click_animation)
     
     def reset_click_animation(self):
         self.is_clicked = False
-        self.update()
-        
-    def get_enemy_name(self):
-        """Return formatted enemy name for display"""
-        # Convert string like "some-enemy-name" to "Some Enemy Name"
-        if not self.enemy_name:
-            return "Unknown Enemy"
-        return " ".join(word.capitalize() for word in self.enemy_name.split("-"))
+        self.frame_clock.invalidate(self, self.image_rect)
 
 class XPIconLabel(QLabel):
     def __init__(self, parent=None):
@@ -333,9 +304,9 @@ class NotificationOverlay(QWidget):
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
         
-        # Set up layout
+        # Set up layout, the overlay is exactly as big as the notification card
         self.layout = QVBoxLayout(self)
-        self.layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.layout.setContentsMargins(0, 0, 0, 0)
         
         # Create container for notification with semi-transparent background
         self.notification_container = QWidget()
@@ -435,60 +406,174 @@ class NotificationOverlay(QWidget):
         # Initially hide the overlay
         self.hide()
         
-        # Auto-hide timer
-        self.hide_timer = QTimer(self)
-        self.hide_timer.timeout.connect(self.hide_animation)
-        
-        # Animation for fading in/out
-        self.opacity_effect = QGraphicsOpacityEffect(self)
-        self.notification_container.setGraphicsEffect(self.opacity_effect)
-        self.opacity_effect.setOpacity(0)
+        # Auto-hide and fading in/out run on the shared frame clock. While fading, the
+        # live card is hidden and a snapshot of it is painted with the current opacity
+        self.frame_clock = shared_frame_clock()
+        self.opacity = 0.0
+        self.card_pixmap = None
+        
+        self.fade_duration = 0.5  # 500ms for fade
+        self.fade_start = 0.0
+        self.fade_from = 0.0
+        self.fade_to = 0.0
+        
+        # Notifications wait their turn instead of replacing the one on screen
+        self.queue = []
+        self.current = None
+        self.hiding = False
+        self.shown_at = 0.0
+        self.hide_at = 0.0
+        self.last_shown = {}  # Kind -> clock time it was last put on screen, for cooldowns
+        self.min_display = 1.0  # Seconds a notification stays up before a more important one replaces it
+    
+    def show_notification(self, title, icon, message, duration=3000, priority=PRIORITY_NORMAL,
+                          kind=None, count=1, summarize=None, cooldown=0):
+        """Queue a notification with title, icon, and message for the specified duration.
+        
+        Notifications are shown one at a time, highest priority first. One of
+        the same kind as the notification on screen or a queued one is merged
+        into it: the counts add up and summarize(count) rewrites the message.
+        A kind with a cooldown is shown at most once per cooldown seconds.
+        """
+        notification = {
+            "title": title,
+            "icon": icon,
+            "message": message,
+            "duration": duration,
+            "priority": priority,
+            "kind": kind,
+            "count": count,
+            "summarize": summarize,
+            "cooldown": cooldown,
+        }
         
-        self.fade_animation = QPropertyAnimation(self.opacity_effect, b"opacity")
-        self.fade_animation.setDuration(500)  # 500ms for fade
-        self.fade_animation.finished.connect(self.on_animation_finished)
+        if kind is not None:
+            candidates = self.queue if self.hiding else [self.current] + self.queue
+            for pending in candidates:
+                if pending is not None and pending["kind"] == kind:
+                    pending["count"] += count
+                    pending["message"] = summarize(pending["count"]) if summarize else message
+                    if pending is self.current:
+                        # Only the text changes, the overlay stays up as scheduled
+                        self.message_label.setText(pending["message"])
+                        if not self.notification_container.isVisible():
+                            self.snapshot_card()
+                    return
+        
+        self.queue.append(notification)
+        if self.current is None:
+            self.show_next()
+        elif not self.hiding and priority > self.current["priority"]:
+            # Cut the current notification short, but leave it up long enough to be read
+            hide_at = max(self.shown_at + self.min_display, self.frame_clock.clock())
+            if hide_at < self.hide_at:
+                self.hide_at = hide_at
+                self.frame_clock.call_later((self, "hide"), hide_at - self.frame_clock.clock(), self.hide_animation)
     
-    def show_notification(self, title, icon, message, duration=3000):
-        """Show a notification with title, icon, and message for the specified duration"""
-        self.title_label.setText(title)
-        self.icon_label.setText(icon)
-        self.message_label.setText(message)
+    def show_next(self):
+        """Put the most important queued notification whose cooldown has passed on screen"""
+        if self.current is not None or not self.queue:
+            return
+        now = self.frame_clock.clock()
+        ready = [notification for notification in self.queue
+                 if now >= self.last_shown.get(notification["kind"], -notification["cooldown"]) + notification["cooldown"]]
+        if not ready:
+            # Everything left is cooling down, come back when the first one may be shown
+            wait = min(self.last_shown[notification["kind"]] + notification["cooldown"] for notification in self.queue)
+            self.frame_clock.call_later((self, "next"), wait - now, self.show_next)
+            return
         
-        # Position overlay centered in parent
+        # max() keeps the first of equal priorities, so the queue is FIFO within a priority
+        notification = max(ready, key=lambda pending: pending["priority"])
+        self.queue.remove(notification)
+        self.current = notification
+        self.hiding = False
+        self.shown_at = now
+        self.hide_at = now + notification["duration"] / 1000
+        if notification["kind"] is not None:
+            self.last_shown[notification["kind"]] = now
+        
+        self.title_label.setText(notification["title"])
+        self.icon_label.setText(notification["icon"])
+        self.message_label.setText(notification["message"])
+        
+        # Cover only the card, centered in the parent, so clicks elsewhere still reach the game
         if self.parent():
-            parent_rect = self.parent().rect()
-            self.setGeometry(parent_rect)
+            card_rect = QRect(QPoint(0, 0), self.notification_container.size())
+            card_rect.moveCenter(self.parent().rect().center())
+            if self.geometry() != card_rect:
+                self.setGeometry(card_rect)
         
         # Show overlay
         self.show()
         
         # Start fade-in animation
-        self.fade_animation.setStartValue(0.0)
-        self.fade_animation.setEndValue(1.0)
-        self.fade_animation.start()
+        self.start_fade(0.0, 1.0)
         
         # Set auto-hide timer
-        self.hide_timer.start(duration)
+        self.frame_clock.call_later((self, "hide"), notification["duration"] / 1000, self.hide_animation)
     
     def close_notification(self):
         """Immediately close the notification when the close button is clicked"""
-        self.hide_timer.stop()
         self.hide_animation()
     
     def hide_animation(self):
         """Start fade-out animation"""
-        self.hide_timer.stop()
-        self.fade_animation.setStartValue(1.0)
-        self.fade_animation.setEndValue(0.0)
-        self.fade_animation.start()
+        self.frame_clock.cancel((self, "hide"))
+        self.hiding = True
+        self.start_fade(1.0, 0.0)
+    
+    def start_fade(self, start_value, end_value):
+        self.fade_start = self.frame_clock.clock()
+        self.fade_from = start_value
+        self.fade_to = end_value
+        self.opacity = start_value
+        self.snapshot_card()
+        self.frame_clock.animate((self, "fade"), self.fade_step)
+    
+    def snapshot_card(self):
+        """Swap the live card for a pixmap of it, which is cheap to paint at any opacity"""
+        device_pixel_ratio = self.devicePixelRatioF()
+        self.card_pixmap = QPixmap(self.notification_container.size() * device_pixel_ratio)
+        self.card_pixmap.setDevicePixelRatio(device_pixel_ratio)
+        self.card_pixmap.fill(Qt.GlobalColor.transparent)
+        # Without DrawWindowBackground the rounded corners stay transparent
+        self.notification_container.show()
+        self.notification_container.render(self.card_pixmap, QPoint(), QRegion(), QWidget.RenderFlag.DrawChildren)
+        self.notification_container.hide()
+        self.frame_clock.invalidate(self)
+    
+    def fade_step(self, now):
+        """Move the opacity linearly towards fade_to, one frame clock frame at a time"""
+        progress = min((now - self.fade_start) / self.fade_duration, 1.0)
+        self.opacity = self.fade_from + (self.fade_to - self.fade_from) * progress
+        self.frame_clock.invalidate(self)
+        if progress < 1.0:
+            return True
+        self.on_animation_finished()
+        return False
+    
+    def paintEvent(self, event):
+        if self.notification_container.isVisible() or self.card_pixmap is None:
+            return
+        painter = QPainter(self)
+        painter.setOpacity(self.opacity)
+        painter.drawPixmap(0, 0, self.card_pixmap)
+        painter.end()
     
     def on_animation_finished(self):
         """Handle animation completion"""
-        if self.opacity_effect.opacity() == 0:
+        if self.opacity == 1:
+            # Fully faded in, the live card takes over so its buttons respond again
+            self.notification_container.show()
+            self.card_pixmap = None
+        elif self.opacity == 0:
             self.hide()
+            self.current = None
+            self.show_next()
 
 class RPGGame(QMainWindow):
-    def __init__(self):
+    def __init__(self, record_path=None):
         super().__init__()
         self.setWindowTitle("Monster Slayer RPG")
         self.setFixedSize(800, 700)  # Set fixed size to 800x700
@@ -500,19 +585,11 @@ class RPGGame(QMainWindow):
         self.setup_audio()
         
         # Initialize game state
-        self.xp = 0
-        self.xp_per_click = 1
-        self.total_xp = 0
-        self.total_clicks = 0
-        self.player_level = 1
-        self.xp_to_next_level = 100  # Base XP needed for level 2
-        self.enemies_defeated = 0
-        self.enemy_stats = {}  # Dictionary to track statistics for each unique enemy
         self.start_time = QDateTime.currentDateTime()
         self.last_save_time = self.start_time
         
         # Define upgrades with dependencies - now themed for RPG
-        self.upgrades = [
+        upgrades = [
             Upgrade("Squire", 10, 0.1, "🧑", "A novice fighter who helps you attack monsters"),  # First upgrade, no dependency
             Upgrade("Knight", 50, 0.5, "🛡️", "A trained warrior with better fighting skills", "Squire"),  # Requires Squire
             Upgrade("Archer", 200, 2.0, "🏹", "Attacks monsters from a distance", "Knight"),  # Requires Knight
@@ -531,19 +608,27 @@ class RPGGame(QMainWindow):
         ]
         
         # Achievements
-        self.achievements = {
+        achievements = {
             "First Kill": {"name": "First Kill", "description": "Defeat your first monster", "unlocked": False},
             "Monster Hunter": {"name": "Monster Hunter", "description": "Reach Level 5", "unlocked": False},
             "Legendary Slayer": {"name": "Legendary Slayer", "description": "Reach Level 20", "unlocked": False}
         }
         
-        # Add achievements for each upgrade
-        for upgrade in self.upgrades:
-            self.achievements[upgrade.achievement_name] = {
-                "name": upgrade.achievement_name,
-                "description": upgrade.achievement_description,
-                "unlocked": False
-            }
+        # Find all enemy images
+        # One cache per process serves the battle view and the bestiary thumbnails
+        self.enemy_images = shared_enemy_images("images/enemies")
+        
+        # The engine owns XP, levels, upgrades, achievements and enemies; this window is a view over it
+        self.engine = RPGEngine(upgrades, self.enemy_images.keys(), achievements)
+        # Sounds use their own stream so they never shift the engine's random game decisions
+        self.sound_rng = random.Random(self.engine.seed)
+        
+        # With a record path every new game's inputs are logged for replay_recording()
+        self.record_path = record_path
+        self.recorder = InputRecorder()
+        
+        # Last values pushed into the game widgets, see update_display()
+        self.view_state = ViewState()
         
         # Create central widget with stacked layout
         self.central_widget = QStackedWidget()
@@ -578,37 +663,22 @@ class RPGGame(QMainWindow):
         self.move(x, y)
         
     def start_new_game(self):
-        # Reset game state
-        self.xp = 0
-        self.xp_per_click = 1
-        self.total_xp = 0
-        self.total_clicks = 0
-        self.player_level = 1
-        self.xp_to_next_level = 100  # Base XP needed for level 2
-        self.enemies_defeated = 0
-        self.enemy_stats = {}  # Clear enemy statistics
+        # Reset game state, upgrades, achievements, enemy statistics and the current enemy
+        self.engine.reset()
+        self.tick_driver.restart()
+        self.start_game_clock()
+        if self.record_path:
+            self.recorder.attach(self.engine)
         self.start_time = QDateTime.currentDateTime()
         self.last_save_time = self.start_time
         
-        # Reset upgrades
-        for upgrade in self.upgrades:
-            upgrade.count = 0
-            upgrade.cost = upgrade.base_cost
-            upgrade.production = upgrade.base_production
-            upgrade.total_bought = 0
-            upgrade.total_spent = 0
-        
-        # Reset achievements
-        for achievement in self.achievements.values():
-            achievement["unlocked"] = False
-        
         # Reset enemy
-        self.enemy_button.select_random_enemy()
-        self.enemy_name_label.setText(f"Enemy: {self.enemy_button.get_enemy_name()}")
-        self.enemies_defeated_label.setText(f"Enemies Defeated: {self.enemies_defeated}")
+        self.enemy_button.refresh()
+        self.enemy_name_label.setText(f"Enemy: {self.engine.get_enemy_name()}")
+        self.enemies_defeated_label.setText(f"Enemies Defeated: {self.engine.enemies_defeated}")
         
         # Clear enemy statistics display
-        self.clear_enemy_stats_display()
+        self.update_enemy_stats_display()
         
         # Switch to game view
         self.central_widget.setCurrentWidget(self.game_widget)
@@ -636,12 +706,12 @@ class RPGGame(QMainWindow):
         game_tab_layout = QVBoxLayout(game_tab)
         
         # Create XP and level display
-        self.level_label = QLabel(f"Level: {self.player_level}")
+        self.level_label = QLabel(f"Level: {self.engine.player_level}")
         self.level_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.level_label.setFont(QFont("Arial", 24, QFont.Weight.Bold))
         game_tab_layout.addWidget(self.level_label)
         
-        self.xp_label = QLabel(f"XP: {self.xp}/{self.xp_to_next_level}")
+        self.xp_label = QLabel(f"XP: {self.engine.xp}/{self.engine.xp_to_next_level}")
         self.xp_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.xp_label.setFont(QFont("Arial", 18))
         game_tab_layout.addWidget(self.xp_label)
@@ -659,7 +729,7 @@ class RPGGame(QMainWindow):
         game_tab_layout.addWidget(self.enemy_name_label)
         
         # Create animated enemy button (replacing monster button)
-        self.enemy_button = EnemyButton()
+        self.enemy_button = EnemyButton(self.engine, self.enemy_images)
         
         # Create click area for the enemy (using transparent button overlay)
         self.enemy_container = QWidget()
@@ -694,43 +764,26 @@ class RPGGame(QMainWindow):
         self.enemies_defeated_label.setFont(QFont("Arial", 14))
         game_tab_layout.addWidget(self.enemies_defeated_label)
         
-        # Create shop section with scrollable area
-        shop_scroll = QScrollArea()
-        shop_scroll.setWidgetResizable(True)
-        shop_content = QWidget()
-        shop_layout = QGridLayout(shop_content)
-        shop_layout.setContentsMargins(5, 5, 5, 5)
-        
-        # Create shop items for each upgrade, but add them to layout later dynamically
-        self.upgrade_widgets = {}
-        for i, upgrade in enumerate(self.upgrades):
-            # Create labels and button for each upgrade
-            count_label = QLabel(f"{upgrade.icon} {upgrade.name}s: {upgrade.count}")
-            count_label.setFont(QFont("Arial", 16))
-            
-            cost_label = QLabel(f"Cost: {upgrade.cost} XP")
-            cost_label.setFont(QFont("Arial", 16))
-            
-            buy_button = QPushButton(f"Recruit {upgrade.name}")
-            buy_button.clicked.connect(lambda checked, u=upgrade: self.buy_upgrade(u))
-            
-            # Store widgets for updating
-            self.upgrade_widgets[upgrade.name] = {
-                "count_label": count_label,
-                "cost_label": cost_label,
-                "buy_button": buy_button,
-                "row": i,  # Store row index for later placement
-                "visible": False  # Track if currently visible in shop
-            }
-        
-        # Add the shop content to the scroll area
-        shop_scroll.setWidget(shop_content)
-        shop_scroll.setMinimumHeight(250)  # Set a reasonable height for the shop
-        game_tab_layout.addWidget(shop_scroll)
-        
-        # Store references for later use
-        self.shop_layout = shop_layout
-        self.shop_content = shop_content
+        # Create buy amount selector for the shop
+        self.buy_amount = 1
+        buy_amount_layout = QHBoxLayout()
+        buy_amount_layout.addStretch()
+        self.buy_amount_group = QButtonGroup(self)
+        for label, amount in (("x1", 1), ("x10", 10), ("x100", 100), ("Max", BUY_MAX)):
+            amount_button = QPushButton(label)
+            amount_button.setCheckable(True)
+            amount_button.setChecked(amount == self.buy_amount)
+            amount_button.clicked.connect(lambda checked, a=amount: self.set_buy_amount(a))
+            self.buy_amount_group.addButton(amount_button)
+            buy_amount_layout.addWidget(amount_button)
+        game_tab_layout.addLayout(buy_amount_layout)
+        
+        # Create the shop, a table over the upgrades discovered so far
+        self.shop_model = ShopModel(self.engine, buy_verb="Recruit", cost_suffix=" XP")
+        self.shop_view = ShopView(self.shop_model)
+        self.shop_view.buy_clicked.connect(lambda index: self.buy_upgrade(self.engine.upgrades[index]))
+        self.shop_view.setMinimumHeight(250)  # Set a reasonable height for the shop
+        game_tab_layout.addWidget(self.shop_view)
         
         # Initialize visible upgrades
         self.update_visible_upgrades()
@@ -766,7 +819,7 @@ class RPGGame(QMainWindow):
         
         # Create achievement labels
         self.achievement_labels = {}
-        for achievement_name, achievement in self.achievements.items():
+        for achievement_name, achievement in self.engine.achievements.items():
             achievement_widget = QWidget()
             achievement_widget.setMaximumHeight(100)  # Set maximum height
             achievement_layout = QHBoxLayout(achievement_widget)
@@ -834,7 +887,7 @@ class RPGGame(QMainWindow):
         level_layout = QHBoxLayout(level_widget)
         level_label = QLabel("👑 Player Level:")
         level_label.setFont(QFont("Arial", 16))
-        self.stats_labels["level"] = QLabel(f"{self.player_level}")
+        self.stats_labels["level"] = QLabel(f"{self.engine.player_level}")
         self.stats_labels["level"].setFont(QFont("Arial", 16))
         level_layout.addWidget(level_label)
         level_layout.addWidget(self.stats_labels["level"])
@@ -903,7 +956,7 @@ class RPGGame(QMainWindow):
         
         # Create container widgets for party stats but don't add them to layout yet
         self.upgrade_stat_widgets = {}
-        for upgrade in self.upgrades:
+        for upgrade in self.engine.upgrades:
             upgrade_widget = QWidget()
             upgrade_widget.setMinimumHeight(90)  # Set minimum height for each party stat
             upgrade_layout = QVBoxLayout(upgrade_widget)  # Changed to QVBoxLayout for better text display
@@ -912,8 +965,8 @@ class RPGGame(QMainWindow):
             # Create party stats
             stats_text = f"{upgrade.icon} {upgrade.name}:"
             stats_text += f"\nTotal Recruited: {upgrade.total_bought}"
-            stats_text += f"\nTotal XP Spent: {upgrade.total_spent:,}"
-            stats_text += f"\nCurrent XP/s: {upgrade.count * upgrade.production:.1f}/s"
+            stats_text += f"\nTotal XP Spent: {format_number(upgrade.total_spent, 0)}"
+            stats_text += f"\nCurrent XP/s: {format_number(upgrade.count * upgrade.production)}/s"
             
             upgrade_label = QLabel(stats_text)
             upgrade_label.setFont(QFont("Arial", 11))
@@ -949,28 +1002,33 @@ class RPGGame(QMainWindow):
         enemies_header_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         enemies_layout.addWidget(enemies_header_label)
         
-        # Create a scrollable area for enemy statistics
-        enemies_scroll = QScrollArea()
-        enemies_scroll.setWidgetResizable(True)
-        enemies_content = QWidget()
-        self.enemies_content_layout = QVBoxLayout(enemies_content)
-        self.enemies_content_layout.setSpacing(5)
-        self.enemies_content_layout.setContentsMargins(10, 10, 10, 10)
+        # Search and sort controls for the bestiary
+        enemies_controls_layout = QHBoxLayout()
+        self.enemy_search_edit = QLineEdit()
+        self.enemy_search_edit.setPlaceholderText("Search enemies...")
+        self.enemy_search_edit.setClearButtonEnabled(True)
+        enemies_controls_layout.addWidget(self.enemy_search_edit, 1)
+        self.enemy_sort_combo = QComboBox()
+        self.enemy_sort_combo.addItems(SORT_ORDERS)
+        enemies_controls_layout.addWidget(self.enemy_sort_combo)
+        enemies_layout.addLayout(enemies_controls_layout)
         
         # Create a message for when no enemies have been defeated
         self.no_enemies_label = QLabel("No enemies defeated yet. Fight some monsters!")
         self.no_enemies_label.setFont(QFont("Arial", 14))
         self.no_enemies_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.enemies_content_layout.addWidget(self.no_enemies_label)
-        
-        # Dictionary to store enemy statistic widgets
-        self.enemy_stat_widgets = {}
-        
-        # Add stretch to push content to the top
-        self.enemies_content_layout.addStretch(1)
-        
-        enemies_scroll.setWidget(enemies_content)
-        enemies_layout.addWidget(enemies_scroll)
+        enemies_layout.addWidget(self.no_enemies_label)
+        
+        # The bestiary lists one row per defeated enemy type, painted only while on screen
+        self.bestiary_model = BestiaryModel(self.engine, self.enemy_images)
+        self.bestiary_proxy = BestiaryProxy(self.bestiary_model)
+        self.bestiary_view = BestiaryView(self.bestiary_model, self.bestiary_proxy)
+        self.bestiary_view.setVisible(False)
+        enemies_layout.addWidget(self.bestiary_view, 1)
+        self.bestiary_model.rowsInserted.connect(self.update_no_enemies_label)
+        self.bestiary_model.modelReset.connect(self.update_no_enemies_label)
+        self.enemy_search_edit.textChanged.connect(self.bestiary_proxy.setFilterFixedString)
+        self.enemy_sort_combo.currentTextChanged.connect(lambda text: self.bestiary_proxy.sort_by(SORT_ORDERS[text]))
         
         # Add tabs to tab widget
         self.tab_widget.addTab(game_tab, "Adventure")
@@ -979,19 +1037,25 @@ class RPGGame(QMainWindow):
         self.tab_widget.addTab(enemies_tab, "Enemies")
         
         # Setup auto-clicker timer with longer interval
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.auto_click)
-        self.timer.start(250)  # Update every 250ms instead of 100ms
+        # The timer only wakes the tick driver, which measures how much time really passed
+        self.tick_driver = TickDriver(self.engine, step=0.25)
+        # All periodic work shares the frame clock's timer, see start_game_clock()
+        self.frame_clock = shared_frame_clock()
+        
+    def start_game_clock(self):
+        """Schedule the periodic work of a running game on the frame clock"""
+        self.frame_clock.call_every((self, "tick"), 0.25, self.auto_click)  # Update every 250ms instead of 100ms
+        
+        # Setup stats update with longer interval
+        self.frame_clock.call_every((self, "stats"), 2, self.update_stats)  # Update every 2 seconds instead of 1 second
         
-        # Setup stats update timer with longer interval
-        self.stats_timer = QTimer()
-        self.stats_timer.timeout.connect(self.update_stats)
-        self.stats_timer.start(2000)  # Update every 2 seconds instead of 1 second
+        # Setup auto-save with longer interval
+        self.frame_clock.call_every((self, "auto_save"), 60, self.auto_save)  # Auto-save every 60 seconds instead of 30 seconds
         
-        # Setup auto-save timer with longer interval
-        self.auto_save_timer = QTimer()
-        self.auto_save_timer.timeout.connect(self.auto_save)
-        self.auto_save_timer.start(60000)  # Auto-save every 60 seconds instead of 30 seconds
+    def stop_game_clock(self):
+        """Cancel the periodic work, so the frame clock can stop while no game runs"""
+        for name in ("tick", "stats", "auto_save"):
+            self.frame_clock.cancel((self, name))
         
     def setup_audio(self):
         # Define sound file paths
@@ -1025,234 +1089,163 @@ class RPGGame(QMainWindow):
     def click_enemy(self):
         # Play a random monster sound
         if self.has_monster_sounds:
-            random_monster_sound = random.choice(self.monster_sound_paths)
+            random_monster_sound = self.sound_rng.choice(self.monster_sound_paths)
             play_sound(random_monster_sound)
         
-        # Get the current enemy's name for the label
-        current_enemy_name = self.enemy_button.get_enemy_name()
-        self.enemy_name_label.setText(f"Enemy: {current_enemy_name}")
+        # Damage the enemy, award XP and check for level up
+        self.engine.click()
+        self.process_engine_events()
         
-        # Apply damage to the enemy (basic damage = xp_per_click)
-        enemy_defeated, defeated_enemy_id, defeated_enemy_name = self.enemy_button.damage_enemy(self.xp_per_click)
+        # Update display
+        self.enemy_button.refresh()
+        self.update_display()
         
-        # Award XP and update counters
-        self.xp += self.xp_per_click
-        self.total_xp += self.xp_per_click
-        self.total_clicks += 1
+        # Visual feedback
+        self.enemy_button.show_click_animation()
         
-        # If enemy was defeated, update the counter and show notification
-        if enemy_defeated:
-            self.enemies_defeated += 1
-            self.enemies_defeated_label.setText(f"Enemies Defeated: {self.enemies_defeated}")
-            
-            # Track statistics for the defeated enemy
-            if defeated_enemy_id not in self.enemy_stats:
-                self.enemy_stats[defeated_enemy_id] = {
-                    "name": defeated_enemy_name,
-                    "defeats": 1,
-                    "last_defeated": QDateTime.currentDateTime().toString()
-                }
-            else:
-                self.enemy_stats[defeated_enemy_id]["defeats"] += 1
-                self.enemy_stats[defeated_enemy_id]["last_defeated"] = QDateTime.currentDateTime().toString()
-            
-            # Update the enemy statistics display
-            self.update_enemy_stats_display()
-            
-            # Get the new enemy's name after defeat
-            new_enemy_name = self.enemy_button.get_enemy_name()
-            self.enemy_name_label.setText(f"Enemy: {new_enemy_name}")
-            
-            # Show enemy defeated notification
+    def process_engine_events(self):
+        """Apply the UI side effects of everything the engine reported since the last call"""
+        for event in self.engine.pop_events():
+            if event[0] == "achievement":
+                self.show_achievement(event[1])
+            elif event[0] == "first_purchase":
+                self.show_first_purchase(self.engine.upgrades[event[1]])
+            elif event[0] == "enemy_defeated":
+                self.show_enemy_defeated(event[1], manual=event[2], kills=event[3], enemy_ids=event[4])
+            elif event[0] == "level_up":
+                self.show_level_up(event[2])
+        
+    def show_enemy_defeated(self, defeated_enemy_id, manual, kills=1, enemy_ids=()):
+        # Decode the following enemy once this event has been handled
+        self.frame_clock.call_later((self, "prefetch"), 0, lambda: self.enemy_button.prefetch(self.engine.next_enemy_id))
+        
+        self.enemies_defeated_label.setText(f"Enemies Defeated: {self.engine.enemies_defeated}")
+        
+        # Only the rows of the enemies just defeated change in the bestiary
+        self.bestiary_model.update_enemies(enemy_ids)
+        
+        # Get the new enemy's name after defeat
+        new_enemy_name = self.engine.get_enemy_name()
+        self.enemy_name_label.setText(f"Enemy: {new_enemy_name}")
+        
+        # Show enemy defeated notification for kills made by clicking,
+        # rapid kills are summed up in at most one notification every 5 seconds
+        if manual:
+            defeated_enemy_name = self.engine.enemy_stats[defeated_enemy_id]["name"]
+            if kills > 1:
+                defeated_enemy_name += f" and {kills - 1:,} more"
             self.notification_overlay.show_notification(
                 "Enemy Defeated!",
                 "⚔️",
                 f"You defeated {defeated_enemy_name}!\nA {new_enemy_name} appears!",
-                2000  # Show for 2 seconds
+                2000,  # Show for 2 seconds
+                priority=PRIORITY_LOW,
+                kind="enemy_defeated",
+                count=kills,
+                summarize=lambda count: f"You defeated {count:,} enemies!",
+                cooldown=5,
             )
-            
-            # Check for first kill achievement - only when actually defeating an enemy
-            if not self.achievements["First Kill"]["unlocked"] and self.enemies_defeated > 0:
-                self.unlock_achievement("First Kill")
         
-        # Check for level up
-        self.check_level_up()
+    def show_level_up(self, levels):
+        # Play level up sound
+        if self.has_level_up_sound:
+            play_sound(self.level_up_sound_path)
         
-        # Update display and check achievements
-        self.update_display()
-        self.check_achievements()
+        # Show one notification however many levels were gained at once
+        def level_up_message(levels):
+            if levels == 1:
+                reached = f"You've reached level {self.engine.player_level}!"
+            else:
+                reached = f"You gained {levels} levels and reached level {self.engine.player_level}!"
+            return f"{reached}\nYou now need {format_number(self.engine.xp_to_next_level, 0)} XP for next level."
         
-        # Visual feedback
-        self.enemy_button.show_click_animation()
+        self.notification_overlay.show_notification(
+            "Level Up!",
+            "⬆️",
+            level_up_message(levels),
+            4000,  # Show for 4 seconds
+            priority=PRIORITY_HIGH,
+            kind="level_up",
+            count=levels,
+            summarize=level_up_message,
+        )
         
-    def check_level_up(self):
-        if self.xp >= self.xp_to_next_level:
-            # Level up
-            self.xp -= self.xp_to_next_level
-            self.player_level += 1
-            
-            # Calculate new XP needed for next level (increasing by 50% each level)
-            self.xp_to_next_level = int(self.xp_to_next_level * 1.5)
-            
-            # Play level up sound
-            if self.has_level_up_sound:
-                play_sound(self.level_up_sound_path)
-            
-            # Show level up notification
-            self.notification_overlay.show_notification(
-                "Level Up!",
-                "⬆️",
-                f"You've reached level {self.player_level}!\nYou now need {self.xp_to_next_level} XP for next level.",
-                4000  # Show for 4 seconds
-            )
-            
-            # Play achievement sound for level up notification
-            if self.has_achievement_sound:
-                play_sound(self.achievement_sound_path)
-            
-            # Check for level-based achievements
-            if self.player_level >= 5 and not self.achievements["Monster Hunter"]["unlocked"]:
-                self.unlock_achievement("Monster Hunter")
-            if self.player_level >= 20 and not self.achievements["Legendary Slayer"]["unlocked"]:
-                self.unlock_achievement("Legendary Slayer")
+        # Play achievement sound for level up notification
+        if self.has_achievement_sound:
+            play_sound(self.achievement_sound_path)
         
     def buy_upgrade(self, upgrade):
-        if self.xp >= upgrade.cost:
+        # Buy the selected amount in one step
+        result = self.engine.buy(upgrade.name, self.buy_amount)
+        if result is not None:
+            count, price = result
+            
             # Play click sound
             if self.has_click_sound:
                 play_sound(self.click_sound_path)
             
-            # Check if this is the first purchase of this upgrade
-            first_purchase = upgrade.count == 0
-            
-            self.xp -= upgrade.cost
-            upgrade.count += 1
-            upgrade.total_bought += 1
-            upgrade.total_spent += upgrade.cost
-            upgrade.cost = int(upgrade.cost * 1.5)  # Increase cost by 50%
-            upgrade.production += upgrade.base_production  # Increase production
             self.update_display()
-            self.show_status_message(f"Recruited {upgrade.name} for {upgrade.cost} XP")
+            self.show_status_message(f"Recruited {count}x {upgrade.name} for {format_number(price, 0)} XP")
             
-            # Update visible upgrades after purchase to potentially reveal new ones
-            self.update_visible_upgrades()
+            # Reveal what a first purchase unlocks and show the upgrade achievement
+            self.process_engine_events()
             
-            # If first purchase, add the upgrade to the stats tab
-            if first_purchase:
-                # Find the upgrade stats scroll area content
-                stats_tab = self.tab_widget.widget(2)  # Stats is the third tab (index 2)
-                upgrade_scroll = stats_tab.findChild(QScrollArea)
-                upgrade_content = upgrade_scroll.widget()
-                upgrade_layout = upgrade_content.layout()
-                
-                # Find the stretch item at the end (if exists)
-                if upgrade_layout.count() > 0 and upgrade_layout.itemAt(upgrade_layout.count() - 1).spacerItem():
-                    # Remove the stretch
-                    upgrade_layout.removeItem(upgrade_layout.itemAt(upgrade_layout.count() - 1))
-                
-                # Add the upgrade widget to the layout
-                upgrade_layout.addWidget(self.upgrade_stat_widgets[upgrade.name]["widget"])
-                
-                # Add the stretch back
-                upgrade_layout.addStretch(1)
-            
-            # Check for upgrade achievement
-            if not self.achievements[upgrade.achievement_name]["unlocked"]:
-                self.unlock_achievement(upgrade.achievement_name)
-            
-    def auto_click(self):
-        total_production = 0
-        for upgrade in self.upgrades:
-            if upgrade.count > 0:
-                total_production += upgrade.production * upgrade.count
+    def show_first_purchase(self, upgrade):
+        """Reveal the upgrades unlocked by the first unit of upgrade and add it to the stats tab"""
+        self.reveal_dependents(upgrade)
         
-        if total_production > 0:
-            # Calculate XP earned this tick
-            xp_earned = total_production * (self.timer.interval() / 1000)
-            self.xp += xp_earned
-            self.total_xp += xp_earned
-            
-            # Auto-damage enemy based on party members' contribution
-            if self.enemy_button:
-                # Apply auto-damage from party members
-                damage_per_second = total_production
-                damage_this_tick = damage_per_second * (self.timer.interval() / 1000)
-                enemy_defeated, defeated_enemy_id, defeated_enemy_name = self.enemy_button.damage_enemy(damage_this_tick)
-                
-                # If enemy was defeated by auto-damage
-                if enemy_defeated:
-                    self.enemies_defeated += 1
-                    self.enemies_defeated_label.setText(f"Enemies Defeated: {self.enemies_defeated}")
-                    
-                    # Track statistics for the defeated enemy
-                    if defeated_enemy_id not in self.enemy_stats:
-                        self.enemy_stats[defeated_enemy_id] = {
-                            "name": defeated_enemy_name,
-                            "defeats": 1,
-                            "last_defeated": QDateTime.currentDateTime().toString()
-                        }
-                    else:
-                        self.enemy_stats[defeated_enemy_id]["defeats"] += 1
-                        self.enemy_stats[defeated_enemy_id]["last_defeated"] = QDateTime.currentDateTime().toString()
-                    
-                    # Update the enemy statistics display
-                    self.update_enemy_stats_display()
-                    
-                    # Get new enemy name for notification
-                    new_enemy_name = self.enemy_button.get_enemy_name()
-                    
-                    # Update the enemy name display
-                    self.enemy_name_label.setText(f"Enemy: {new_enemy_name}")
-                    
-                    # Check for first kill achievement when defeating an enemy through auto-damage
-                    if not self.achievements["First Kill"]["unlocked"] and self.enemies_defeated > 0:
-                        self.unlock_achievement("First Kill")
-            
-            # Check for level up
-            self.check_level_up()
-            
+        # Find the upgrade stats scroll area content
+        stats_tab = self.tab_widget.widget(2)  # Stats is the third tab (index 2)
+        upgrade_scroll = stats_tab.findChild(QScrollArea)
+        upgrade_content = upgrade_scroll.widget()
+        upgrade_layout = upgrade_content.layout()
+        
+        # Find the stretch item at the end (if exists)
+        if upgrade_layout.count() > 0 and upgrade_layout.itemAt(upgrade_layout.count() - 1).spacerItem():
+            # Remove the stretch
+            upgrade_layout.removeItem(upgrade_layout.itemAt(upgrade_layout.count() - 1))
+        
+        # Add the upgrade widget to the layout
+        upgrade_layout.addWidget(self.upgrade_stat_widgets[upgrade.name]["widget"])
+        
+        # Add the stretch back
+        upgrade_layout.addStretch(1)
+        
+    def set_buy_amount(self, amount):
+        """Select how many units the shop buttons buy (1, 10, 100 or BUY_MAX)"""
+        self.buy_amount = amount
+        self.shop_model.set_buy_amount(amount)
+        self.update_display()
+        
+    def auto_click(self):
+        # Earn XP and auto-damage the enemy based on party members' contribution
+        if self.tick_driver.update() > 0:
+            self.process_engine_events()
+            self.enemy_button.refresh()
             self.update_display()
-            self.check_achievements()
         
     def update_display(self):
+        # Only widgets whose value changed since the last refresh are touched
+        view = self.view_state
+        view.begin_refresh()
+        
         # Update level and XP displays
-        self.level_label.setText(f"Level: {self.player_level}")
-        self.xp_label.setText(f"XP: {self.xp:.1f}/{self.xp_to_next_level}")
+        view.set_text(self.level_label, f"Level: {self.engine.player_level}")
+        view.set_text(self.xp_label, f"XP: {format_number(self.engine.xp)}/{format_number(self.engine.xp_to_next_level, 0)}")
         
         # Calculate number of discovered party members (showing in shop)
-        discovered_count = 0
-        for upgrade in self.upgrades:
-            widget_data = self.upgrade_widgets[upgrade.name]
-            if widget_data["visible"]:
-                discovered_count += 1
+        discovered_count = len(self.shop_model.rows)
         
         # Update party members discovered label
-        self.party_label.setText(f"{discovered_count} of {len(self.upgrades)} party members discovered")
+        view.set_text(self.party_label, f"{discovered_count} of {len(self.engine.upgrades)} party members discovered")
         
-        # Update all upgrade displays
-        for upgrade in self.upgrades:
-            widgets = self.upgrade_widgets[upgrade.name]
-            widgets["count_label"].setText(f"{upgrade.icon} {upgrade.name}s: {upgrade.count}")
-            widgets["cost_label"].setText(f"Cost: {upgrade.cost} XP")
-            
-            # Check if required upgrade is purchased
-            can_buy = self.xp >= upgrade.cost
-            if upgrade.required_upgrade:
-                # Find the required upgrade object
-                for req_upgrade in self.upgrades:
-                    if req_upgrade.name == upgrade.required_upgrade:
-                        # Only enable if required upgrade has been bought
-                        if req_upgrade.count == 0:
-                            can_buy = False
-                            # Update cost label to show requirement
-                            widgets["cost_label"].setText(f"Requires {upgrade.required_upgrade}")
-                        break
-            
-            widgets["buy_button"].setEnabled(can_buy)
+        # The shop model repaints only the rows whose count, cost or button changed
+        self.shop_model.refresh()
         
         # Update achievement displays
-        for achievement_name, achievement in self.achievements.items():
-            self.achievement_labels[achievement_name]["status_label"].setText("🏆" if achievement["unlocked"] else "🔒")
+        for achievement_name, achievement in self.engine.achievements.items():
+            view.set_text(self.achievement_labels[achievement_name]["status_label"], "🏆" if achievement["unlocked"] else "🔒")
+        view.end_refresh()
             
     def update_stats(self):
         # Update time played
@@ -1264,41 +1257,34 @@ class RPGGame(QMainWindow):
         self.stats_labels["time"].setText(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
         
         # Update level
-        self.stats_labels["level"].setText(f"{self.player_level}")
+        self.stats_labels["level"].setText(f"{self.engine.player_level}")
         
         # Update monster kills (clicks)
-        self.stats_labels["clicks"].setText(f"{self.total_clicks:,}")
+        self.stats_labels["clicks"].setText(f"{self.engine.total_clicks:,}")
         
         # Update enemies defeated
         if "enemies_defeated" in self.stats_labels:
-            self.stats_labels["enemies_defeated"].setText(f"{self.enemies_defeated:,}")
+            self.stats_labels["enemies_defeated"].setText(f"{self.engine.enemies_defeated:,}")
         
         # Update total XP
-        self.stats_labels["total_xp"].setText(f"{self.total_xp:,.1f}")
+        self.stats_labels["total_xp"].setText(format_number(self.engine.total_xp))
         
-        # Calculate and update XP per second
-        total_xps = 0
-        for upgrade in self.upgrades:
-            if upgrade.count > 0:
-                total_xps += upgrade.production * upgrade.count
-        self.stats_labels["xps"].setText(f"{total_xps:.1f}")
+        # Update XP per second
+        total_xps = self.engine.total_production()
+        self.stats_labels["xps"].setText(format_number(total_xps))
         
         # Update upgrade stats with clear formatting
-        for upgrade in self.upgrades:
+        for upgrade in self.engine.upgrades:
             stats_text = f"{upgrade.icon} {upgrade.name}:"
             stats_text += f"\nTotal Recruited: {upgrade.total_bought}"
-            stats_text += f"\nTotal XP Spent: {upgrade.total_spent:,}"
-            stats_text += f"\nCurrent XP/s: {upgrade.count * upgrade.production:.1f}/s"
+            stats_text += f"\nTotal XP Spent: {format_number(upgrade.total_spent, 0)}"
+            stats_text += f"\nCurrent XP/s: {format_number(upgrade.count * upgrade.production)}/s"
             self.stats_labels[upgrade.name].setText(stats_text)
         
-    def check_achievements(self):
-        # Level-based achievements are now checked in check_level_up method
-        pass
-            
-    def unlock_achievement(self, achievement_name):
-        self.achievements[achievement_name]["unlocked"] = True
+    def show_achievement(self, achievement_name):
+        achievement = self.engine.achievements[achievement_name]
         achievement_data = self.achievement_labels[achievement_name]
-        achievement_data["status_label"].setText("🏆")
+        self.view_state.set_text(achievement_data["status_label"], "🏆")
         
         # Add the achievement widget to the scroll layout
         scroll_content = self.tab_widget.widget(1).findChild(QScrollArea).widget()
@@ -1315,14 +1301,16 @@ class RPGGame(QMainWindow):
         scroll_layout.addStretch(1)
         
         # Show status message
-        self.show_status_message(f"Achievement unlocked: {self.achievements[achievement_name]['name']}")
+        self.show_status_message(f"Achievement unlocked: {achievement['name']}")
         
         # Show achievement notification using overlay instead of dialog
         self.notification_overlay.show_notification(
             "Achievement Unlocked!",
             "🏆",
-            f"{self.achievements[achievement_name]['name']}\n{self.achievements[achievement_name]['description']}",
-            4000  # Show for 4 seconds
+            f"{achievement['name']}\n{achievement['description']}",
+            4000,  # Show for 4 seconds
+            kind="achievement",
+            summarize=lambda count: f"{achievement['name']}\nand {count - 1} more achievements",
         )
         
         # Play achievement sound if available
@@ -1333,73 +1321,47 @@ class RPGGame(QMainWindow):
         self.statusBar().showMessage(message, timeout)
 
     def auto_save(self):
-        save_data = {
-            "xp": self.xp,
-            "xp_per_click": self.xp_per_click,
-            "total_xp": self.total_xp,
-            "total_clicks": self.total_clicks,
-            "player_level": self.player_level,
-            "xp_to_next_level": self.xp_to_next_level,
-            "enemies_defeated": self.enemies_defeated,
-            "enemy_stats": self.enemy_stats,  # Save enemy statistics
-            "start_time": self.start_time.toString(),
-            "achievements": self.achievements
-        }
-        
-        # Save upgrade data
-        for upgrade in self.upgrades:
-            save_data[upgrade.name] = {
-                "count": upgrade.count,
-                "cost": upgrade.cost,
-                "production": upgrade.production,
-                "total_bought": upgrade.total_bought,
-                "total_spent": upgrade.total_spent
-            }
+        self.last_save_time = QDateTime.currentDateTime()
+        save_data = self.engine.to_save_data()
+        save_data["start_time"] = self.start_time.toString()
+        save_data["last_save_time"] = self.last_save_time.toString()
         
         # Create and start save worker thread
-        self.save_worker = SaveWorker(save_data)
+        self.save_worker = SaveWorker(save_data, self.recording_snapshot(), self.record_path)
         self.save_worker.finished.connect(lambda: self.show_status_message("Adventure auto-saved"))
         self.save_worker.error.connect(lambda e: self.show_status_message(f"Failed to save adventure: {e}"))
         self.save_worker.start()
 
     def save_game(self, silent=False):
-        save_data = {
-            "xp": self.xp,
-            "xp_per_click": self.xp_per_click,
-            "total_xp": self.total_xp,
-            "total_clicks": self.total_clicks,
-            "player_level": self.player_level,
-            "xp_to_next_level": self.xp_to_next_level,
-            "enemies_defeated": self.enemies_defeated,
-            "enemy_stats": self.enemy_stats,  # Save enemy statistics
-            "start_time": self.start_time.toString(),
-            "achievements": self.achievements
-        }
-        
-        # Save upgrade data
-        for upgrade in self.upgrades:
-            save_data[upgrade.name] = {
-                "count": upgrade.count,
-                "cost": upgrade.cost,
-                "production": upgrade.production,
-                "total_bought": upgrade.total_bought,
-                "total_spent": upgrade.total_spent
-            }
+        self.last_save_time = QDateTime.currentDateTime()
+        save_data = self.engine.to_save_data()
+        save_data["start_time"] = self.start_time.toString()
+        save_data["last_save_time"] = self.last_save_time.toString()
         
         # Create and start save worker thread
-        self.save_worker = SaveWorker(save_data)
+        self.save_worker = SaveWorker(save_data, self.recording_snapshot(), self.record_path)
         if not silent:
             self.save_worker.finished.connect(lambda: self.show_status_message("Adventure saved successfully!"))
             self.save_worker.error.connect(lambda e: self.show_status_message(f"Failed to save adventure: {e}"))
         self.save_worker.start()
-        self.last_save_time = QDateTime.currentDateTime()
+
+    def recording_snapshot(self):
+        """Return the input log of the current game for the save worker, or None if not recording"""
+        if self.record_path and self.recorder.engine is not None:
+            return self.recorder.snapshot()
+        return None
 
     def return_to_menu(self):
         # Auto-save before returning to menu
         self.auto_save()
+        self.stop_game_clock()
         # Switch to menu view
         self.central_widget.setCurrentWidget(self.main_menu)
 
+    def closeEvent(self, event):
+        self.stop_game_clock()
+        super().closeEvent(event)
+
     def load_game(self):
         if os.path.exists("rpg_save_game.json"):
             # Use proper Qt thread for loading
@@ -1411,38 +1373,23 @@ class RPGGame(QMainWindow):
             self.show_status_message("No save file found")
 
     def process_loaded_data(self, save_data):
-        # Update game state on the main thread
-        self.xp = save_data.get("xp", 0)
-        self.xp_per_click = save_data.get("xp_per_click", 1)
-        self.total_xp = save_data.get("total_xp", 0)
-        self.total_clicks = save_data.get("total_clicks", 0)
-        self.player_level = save_data.get("player_level", 1)
-        self.xp_to_next_level = save_data.get("xp_to_next_level", 100)
-        self.enemies_defeated = save_data.get("enemies_defeated", 0)
-        
-        # Load enemy statistics if available
-        self.enemy_stats = save_data.get("enemy_stats", {})
-        
+        # Update game state on the main thread, recordings only cover games started from scratch
+        self.recorder.detach()
+        self.engine.load_save_data(save_data)
         self.start_time = QDateTime.fromString(save_data.get("start_time", QDateTime.currentDateTime().toString()))
-        self.achievements = save_data["achievements"]
+        
+        # Catch up on what was produced while the game was closed
+        offline_summary = self.apply_offline_progress(save_data)
+        self.tick_driver.restart()
+        self.start_game_clock()
         
         # Update enemy counter display
-        self.enemies_defeated_label.setText(f"Enemies Defeated: {self.enemies_defeated}")
+        self.enemies_defeated_label.setText(f"Enemies Defeated: {self.engine.enemies_defeated}")
         
         # Update enemy name
-        enemy_name = self.enemy_button.get_enemy_name()
+        enemy_name = self.engine.get_enemy_name()
         self.enemy_name_label.setText(f"Enemy: {enemy_name}")
         
-        # Load upgrade data
-        for upgrade in self.upgrades:
-            if upgrade.name in save_data:
-                upgrade_data = save_data[upgrade.name]
-                upgrade.count = upgrade_data["count"]
-                upgrade.cost = upgrade_data["cost"]
-                upgrade.production = upgrade_data["production"]
-                upgrade.total_bought = upgrade_data.get("total_bought", 0)
-                upgrade.total_spent = upgrade_data.get("total_spent", 0)
-        
         # Update enemy statistics display
         self.update_enemy_stats_display()
         
@@ -1460,10 +1407,10 @@ class RPGGame(QMainWindow):
                 item.widget().deleteLater()
         
         # Add unlocked achievements to the scroll layout
-        for achievement_name, achievement in self.achievements.items():
+        for achievement_name, achievement in self.engine.achievements.items():
             if achievement["unlocked"]:
                 achievement_data = self.achievement_labels[achievement_name]
-                achievement_data["status_label"].setText("🏆")
+                self.view_state.set_text(achievement_data["status_label"], "🏆")
                 scroll_layout.addWidget(achievement_data["widget"])
         
         # Add spacer to push content up
@@ -1484,7 +1431,7 @@ class RPGGame(QMainWindow):
                 upgrade_layout.removeItem(item)
         
         # Add only unlocked upgrades to the stats tab
-        for upgrade in self.upgrades:
+        for upgrade in self.engine.upgrades:
             if upgrade.count > 0:
                 upgrade_layout.addWidget(self.upgrade_stat_widgets[upgrade.name]["widget"])
         
@@ -1495,169 +1442,64 @@ class RPGGame(QMainWindow):
         self.update_display()
         self.update_stats()
         self.central_widget.setCurrentWidget(self.game_widget)
+        if offline_summary and offline_summary["earned"] > 0:
+            self.show_offline_progress(offline_summary)
         self.show_status_message("Adventure loaded successfully")
 
-    def update_visible_upgrades(self):
-        """Update which upgrades should be visible in the shop based on prerequisites"""
-        # First, determine which upgrades should be visible
-        visible_upgrades = []
-        unlocked_names = set()
-        next_upgrades = set()
+    def apply_offline_progress(self, save_data):
+        """Credit everything produced between the last save and now in a single step"""
+        if "last_save_time" not in save_data:
+            return None
         
-        # Collect names of all unlocked upgrades (count > 0)
-        for upgrade in self.upgrades:
-            if upgrade.count > 0:
-                unlocked_names.add(upgrade.name)
-                
-        # Always show first upgrade
-        visible_upgrades.append(self.upgrades[0])
+        last_save_time = QDateTime.fromString(save_data["last_save_time"])
+        summary = self.engine.advance_offline(last_save_time.secsTo(QDateTime.currentDateTime()))
+        self.last_save_time = QDateTime.currentDateTime()
         
-        # Determine which upgrades should be visible now
-        for upgrade in self.upgrades:
-            if upgrade.count > 0:
-                # Always show unlocked upgrades
-                if upgrade not in visible_upgrades:
-                    visible_upgrades.append(upgrade)
-            elif not upgrade.required_upgrade or upgrade.required_upgrade in unlocked_names:
-                # Show unlockable upgrades (those whose prerequisite is met)
-                if upgrade not in visible_upgrades:
-                    visible_upgrades.append(upgrade)
-                    next_upgrades.add(upgrade.name)
-        
-        # Update shop layout
-        for upgrade in self.upgrades:
-            widget_data = self.upgrade_widgets[upgrade.name]
-            
-            # Check if widget should be visible
-            should_be_visible = upgrade in visible_upgrades
-            
-            # Only update if visibility changed
-            if should_be_visible != widget_data["visible"]:
-                if should_be_visible:
-                    # Add widget to layout
-                    row = widget_data["row"]
-                    self.shop_layout.addWidget(widget_data["count_label"], row, 0)
-                    self.shop_layout.addWidget(widget_data["cost_label"], row, 1)
-                    self.shop_layout.addWidget(widget_data["buy_button"], row, 2)
-                else:
-                    # Remove widget from layout
-                    self.shop_layout.removeWidget(widget_data["count_label"])
-                    self.shop_layout.removeWidget(widget_data["cost_label"])
-                    self.shop_layout.removeWidget(widget_data["buy_button"])
-                    widget_data["count_label"].hide()
-                    widget_data["cost_label"].hide()
-                    widget_data["buy_button"].hide()
-                
-                # Update visibility state
-                widget_data["visible"] = should_be_visible
-                
-                # If now visible, show the widgets
-                if should_be_visible:
-                    widget_data["count_label"].show()
-                    widget_data["cost_label"].show()
-                    widget_data["buy_button"].show()
-        
-        # Refresh the shop content
-        self.shop_content.adjustSize()
+        # The restored tabs already list anything unlocked while away, so one summary replaces the individual popups
+        self.engine.pop_events()
+        return summary
+    
+    def show_offline_progress(self, summary):
+        """Show a single notification summarising the progress made while away"""
+        self.notification_overlay.show_notification(
+            "Welcome Back!",
+            "💤",
+            f"You were away for {format_duration(summary['seconds'])}.\n"
+            f"Your party earned {format_number(summary['earned'])} XP,\n"
+            f"defeated {summary['enemies_defeated']:,} enemies and gained {summary['levels']} levels.",
+            5000,  # Show for 5 seconds
+            priority=PRIORITY_HIGH,
+        )
 
+    def update_visible_upgrades(self):
+        """Update which upgrades should be visible in the shop based on prerequisites"""
+        # Show bought upgrades, those whose prerequisite is met, and always the first upgrade
+        upgrades = self.engine.upgrades
+        visible = upgrades.available() | (upgrades.count > 0)
+        if len(visible):
+            visible[0] = True
+        
+        self.shop_model.set_listed(visible)
+    
+    def reveal_dependents(self, upgrade):
+        """Show the upgrades unlocked by the first purchase of upgrade, without rescanning the shop"""
+        # Rows are only inserted, and laid out, for upgrades that were not listed yet
+        self.shop_model.show_upgrades(self.engine.upgrades.dependents[upgrade.index])
+    
     def update_enemy_stats_display(self):
-        """Update the enemy statistics tab with current enemy defeat data"""
-        # If there are no defeated enemies yet, show the no enemies message
-        if not self.enemy_stats:
-            self.no_enemies_label.setVisible(True)
-            return
-            
-        # Hide the no enemies message if we have defeated enemies
-        self.no_enemies_label.setVisible(False)
-        
-        # For each enemy in the stats dictionary, create or update its display widget
-        for enemy_id, stats in self.enemy_stats.items():
-            # Check if we already have a widget for this enemy
-            if enemy_id in self.enemy_stat_widgets:
-                # Update existing widget
-                enemy_widget = self.enemy_stat_widgets[enemy_id]["widget"]
-                stats_label = self.enemy_stat_widgets[enemy_id]["label"]
-                
-                # Update the stats text
-                stats_text = f"<b>{stats['name']}</b><br>"
-                stats_text += f"Defeated: {stats['defeats']} times<br>"
-                stats_text += f"Last defeated: {stats['last_defeated']}"
-                stats_label.setText(stats_text)
-            else:
-                # Create a new widget for this enemy
-                enemy_widget = QWidget()
-                enemy_layout = QHBoxLayout(enemy_widget)
-                enemy_layout.setContentsMargins(5, 5, 5, 5)
-                
-                # Create image thumbnail (gray placeholder for now)
-                image_label = QLabel()
-                image_label.setFixedSize(80, 80)
-                # Try to get the enemy image
-                try:
-                    # Load a thumbnail of the enemy
-                    enemy_image = QPixmap(f"images/enemies/{enemy_id}.png")
-                    if not enemy_image.isNull():
-                        enemy_image = enemy_image.scaled(80, 80, Qt.AspectRatioMode.KeepAspectRatio)
-                        image_label.setPixmap(enemy_image)
-                    else:
-                        # Create a gray placeholder
-                        placeholder = QPixmap(80, 80)
-                        placeholder.fill(QColor(200, 200, 200))
-                        image_label.setPixmap(placeholder)
-                except Exception:
-                    # Create a gray placeholder
-                    placeholder = QPixmap(80, 80)
-                    placeholder.fill(QColor(200, 200, 200))
-                    image_label.setPixmap(placeholder)
-                
-                enemy_layout.addWidget(image_label)
-                
-                # Create stats info
-                stats_label = QLabel()
-                stats_label.setFont(QFont("Arial", 12))
-                stats_label.setWordWrap(True)
-                
-                # Format the stats text
-                stats_text = f"<b>{stats['name']}</b><br>"
-                stats_text += f"Defeated: {stats['defeats']} times<br>"
-                stats_text += f"Last defeated: {stats['last_defeated']}"
-                stats_label.setText(stats_text)
-                
-                enemy_layout.addWidget(stats_label, 1)  # Give the stats label stretch factor
-                
-                # Store the widget and label for future updates
-                self.enemy_stat_widgets[enemy_id] = {
-                    "widget": enemy_widget,
-                    "label": stats_label,
-                    "image": image_label
-                }
-                
-                # Add the widget to the layout - remove stretch first if it exists
-                if self.enemies_content_layout.count() > 0 and self.enemies_content_layout.itemAt(self.enemies_content_layout.count() - 1).spacerItem():
-                    self.enemies_content_layout.removeItem(self.enemies_content_layout.itemAt(self.enemies_content_layout.count() - 1))
-                
-                self.enemies_content_layout.addWidget(enemy_widget)
-                
-                # Add stretch back to push content to the top
-                self.enemies_content_layout.addStretch(1)
+        """Rebuild the enemy statistics tab from the engine's enemy defeat data"""
+        self.bestiary_model.reset_stats()
 
-    def clear_enemy_stats_display(self):
-        """Clear the enemy statistics display"""
-        # Clear all enemy stat widgets
-        for enemy_id, widget_data in self.enemy_stat_widgets.items():
-            widget = widget_data["widget"]
-            if widget.parentWidget():
-                self.enemies_content_layout.removeWidget(widget)
-                widget.setParent(None)
-        
-        # Reset the enemy stat widgets dictionary
-        self.enemy_stat_widgets = {}
-        
-        # Show the no enemies message
-        self.no_enemies_label.setVisible(True)
+    def update_no_enemies_label(self):
+        """Show the no enemies message instead of the bestiary while it is empty"""
+        has_enemies = self.bestiary_model.rowCount() > 0
+        self.no_enemies_label.setVisible(not has_enemies)
+        self.bestiary_view.setVisible(has_enemies)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    game = RPGGame()
+    # --record FILE logs every new game's inputs so they can be replayed headless
+    record_path = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv[:-1] else None
+    game = RPGGame(record_path)
     game.show()
     sys.exit(app.exec()) 
\ No newline at end of file
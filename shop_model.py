@@ -0,0 +1,266 @@
+"""Upgrade shop shared by clicker_game.py, rpg_game.py and space_game.py.
+
+ShopModel lists the upgrades the player has discovered and formats their
+rows on demand, so the shop owns no widgets per upgrade. ShopView shows it
+with uniform row heights, which lets Qt lay out and paint only the rows on
+screen, and draws the buy column as push buttons through BuyButtonDelegate.
+"""
+import bisect
+import math
+import sys
+
+import numpy as np
+from PyQt6.QtCore import Qt, QAbstractTableModel, QEvent, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QAbstractItemView, QHeaderView, QStyle, QStyleOptionButton, QStyledItemDelegate, QTableView
+
+from game_engine import BUY_MAX, format_duration, format_number
+
+COUNT_COLUMN = 0
+COST_COLUMN = 1
+BUY_COLUMN = 2
+# Whether the buy button of a row is enabled
+ENABLED_ROLE = Qt.ItemDataRole.UserRole
+
+
+class ShopModel(QAbstractTableModel):
+    """Rows are the listed upgrades in catalogue order, columns count, cost and buy button.
+
+    The model remembers the counts, availability and button states the view
+    last saw. refresh() compares them with the engine as whole-array
+    operations and emits dataChanged only for the rows that differ.
+    """
+
+    def __init__(self, engine, buy_verb="Buy", cost_suffix="", parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.buy_verb = buy_verb
+        self.cost_suffix = cost_suffix
+        self.font = QFont("Arial", 16)
+        self.buy_amount = 1
+
+        upgrade_count = len(engine.upgrades)
+        self.rows = []  # Positions of the listed upgrades, in catalogue order
+        self.listed = np.zeros(upgrade_count, dtype=bool)
+        self.row_of = np.full(upgrade_count, -1, dtype=np.int64)  # Upgrade position -> row, -1 if not listed
+        self.prices = None  # Price of buy_amount units per upgrade when buying more than one
+        self.shown_count = np.zeros(upgrade_count, dtype=np.int64)
+        self.shown_available = np.zeros(upgrade_count, dtype=bool)
+        self.shown_enabled = np.zeros(upgrade_count, dtype=bool)
+        self.shown_currency = None
+        self.changed_rows = 0  # Rows reported by the last refresh(), for benchmarks
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        upgrade = self.engine.upgrades[self.rows[index.row()]]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == COUNT_COLUMN:
+                return f"{upgrade.icon} {upgrade.name}s: {upgrade.count}"
+            if column == COST_COLUMN:
+                return self.cost_text(upgrade)
+            return f"{self.buy_verb} {upgrade.name}"
+        if role == Qt.ItemDataRole.FontRole and column != BUY_COLUMN:
+            return self.font
+        if role == Qt.ItemDataRole.ToolTipRole and column == COST_COLUMN:
+            return self.payback_text(upgrade)
+        if role == ENABLED_ROLE:
+            return bool(self.shown_enabled[upgrade.index])
+        return None
+
+    def cost_text(self, upgrade):
+        if not self.shown_available[upgrade.index]:
+            # Show the requirement instead of a price
+            return f"Requires {upgrade.required_upgrade}"
+        # Price the selected buy amount, Max shows how many the player can afford
+        count, price = self.engine.quote(upgrade, self.buy_amount)
+        if count == 0:
+            count, price = 1, upgrade.cost
+        if count == 1:
+            return f"Cost: {format_number(price, 0)}{self.cost_suffix}"
+        return f"Cost: {format_number(price, 0)}{self.cost_suffix} (x{count})"
+
+    def payback_text(self, upgrade):
+        """Return how long the next unit takes to produce its own cost, shown as the cost tooltip"""
+        seconds = self.engine.upgrades.payback_times()[upgrade.index]
+        if not math.isfinite(seconds):
+            return "Never pays for itself"
+        return f"Pays for itself in {format_duration(seconds)}"
+
+    def set_listed(self, listed):
+        """List exactly the upgrades in the boolean mask listed, e.g. after a new game or load.
+
+        The counts or costs may have changed arbitrarily, so every row is
+        reported as changed either way.
+        """
+        self.prices = None
+        if np.array_equal(listed, self.listed):
+            self.remember_shown()
+            self.emit_rows(0, len(self.rows) - 1)
+            return False
+        self.beginResetModel()
+        self.listed = np.array(listed, dtype=bool)
+        self.rows = np.flatnonzero(self.listed).tolist()
+        self.row_of[:] = -1
+        self.row_of[self.rows] = np.arange(len(self.rows))
+        self.remember_shown()
+        self.endResetModel()
+        return True
+
+    def show_upgrades(self, indexes):
+        """Insert rows for the upgrades at indexes that are not listed yet, returning whether any were"""
+        inserted = False
+        for index in indexes:
+            if self.listed[index]:
+                continue
+            row = bisect.bisect_left(self.rows, index)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.rows.insert(row, index)
+            self.listed[index] = True
+            self.row_of[self.rows[row:]] = np.arange(row, len(self.rows))
+            self.endInsertRows()
+            inserted = True
+        return inserted
+
+    def set_buy_amount(self, amount):
+        self.buy_amount = amount
+        self.prices = None
+        # Every cost text depends on the amount, the buttons are compared by the next refresh()
+        if self.rows:
+            self.dataChanged.emit(self.index(0, COST_COLUMN), self.index(len(self.rows) - 1, COST_COLUMN))
+
+    def selected_prices(self, changed):
+        """Price of buy_amount units of every upgrade, requoting only the positions in changed"""
+        upgrades = self.engine.upgrades
+        if self.prices is None:
+            self.prices = np.zeros(len(upgrades))
+            changed = range(len(upgrades))
+        for index in changed:
+            price = self.engine.quote(upgrades[index], self.buy_amount)[1]
+            self.prices[index] = float(price) if price < sys.float_info.max else math.inf
+        return self.prices
+
+    def enabled_mask(self, available, changed_counts):
+        """Boolean mask of the upgrades whose buy button is enabled"""
+        if self.buy_amount in (1, BUY_MAX):
+            # Max buys at least one unit whenever the next one is affordable
+            affordable = self.engine.affordable_mask()
+        else:
+            affordable = self.selected_prices(changed_counts) <= float(self.engine.currency)
+        return affordable & available
+
+    def remember_shown(self):
+        upgrades = self.engine.upgrades
+        self.shown_count = upgrades.count.copy()
+        self.shown_available = upgrades.available()
+        self.shown_enabled = self.enabled_mask(self.shown_available, range(len(upgrades)))
+        self.shown_currency = self.engine.currency
+
+    def refresh(self):
+        """Report the listed rows whose text or button changed since the last refresh"""
+        upgrades = self.engine.upgrades
+        counts_changed = upgrades.count != self.shown_count
+        available = upgrades.available()
+        enabled = self.enabled_mask(available, np.flatnonzero(counts_changed))
+        changed = (counts_changed | (available != self.shown_available) | (enabled != self.shown_enabled)) & self.listed
+        self.shown_count = upgrades.count.copy()
+        self.shown_available = available
+        self.shown_enabled = enabled
+
+        rows = self.row_of[changed]
+        for row in rows.tolist():
+            self.emit_rows(row, row)
+        self.changed_rows = len(rows)
+
+        # Max prices depend on the currency, which changes on nearly every refresh
+        if self.buy_amount == BUY_MAX and self.engine.currency != self.shown_currency and self.rows:
+            self.dataChanged.emit(self.index(0, COST_COLUMN), self.index(len(self.rows) - 1, COST_COLUMN))
+            self.changed_rows = len(self.rows)
+        self.shown_currency = self.engine.currency
+
+    def emit_rows(self, first, last):
+        if last >= first:
+            self.dataChanged.emit(self.index(first, COUNT_COLUMN), self.index(last, BUY_COLUMN))
+
+
+class BuyButtonDelegate(QStyledItemDelegate):
+    """Paints the buy column as push buttons and emits clicked(row) when an enabled one is clicked"""
+    clicked = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pressed_row = -1
+
+    def button_rect(self, cell_rect):
+        return cell_rect.adjusted(2, 2, -2, -2)
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = self.button_rect(option.rect)
+        button.text = index.data()
+        button.fontMetrics = option.fontMetrics
+        button.state = QStyle.StateFlag.State_Raised
+        if index.data(ENABLED_ROLE):
+            button.state |= QStyle.StateFlag.State_Enabled
+            if option.state & QStyle.StateFlag.State_MouseOver:
+                button.state |= QStyle.StateFlag.State_MouseOver
+            if index.row() == self.pressed_row:
+                button.state |= QStyle.StateFlag.State_Sunken
+        option.widget.style().drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease):
+            return False
+        if event.button() != Qt.MouseButton.LeftButton or not index.data(ENABLED_ROLE):
+            return False
+        inside = self.button_rect(option.rect).contains(event.position().toPoint())
+        if event.type() == QEvent.Type.MouseButtonPress:
+            self.pressed_row = index.row() if inside else -1
+        else:
+            clicked = inside and self.pressed_row == index.row()
+            self.pressed_row = -1
+            if clicked:
+                self.clicked.emit(index.row())
+        option.widget.update(index)
+        return True
+
+
+class ShopView(QTableView):
+    """Headerless table of a ShopModel, emitting buy_clicked(upgrade position) from the buy buttons"""
+    buy_clicked = pyqtSignal(int)
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.buy_delegate = BuyButtonDelegate(self)
+        self.buy_delegate.clicked.connect(lambda row: self.buy_clicked.emit(model.rows[row]))
+        self.setItemDelegateForColumn(BUY_COLUMN, self.buy_delegate)
+
+        self.horizontalHeader().hide()
+        self.verticalHeader().hide()
+        self.setShowGrid(False)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        # Draw over the window background like the widgets of a plain layout
+        self.viewport().setAutoFillBackground(False)
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WidgetAttribute.WA_Hover)
+
+        # Fixed sizes: nothing is measured per row, however long the catalogue is
+        rows = self.verticalHeader()
+        rows.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        rows.setDefaultSectionSize(40)
+        columns = self.horizontalHeader()
+        columns.setSectionResizeMode(COUNT_COLUMN, QHeaderView.ResizeMode.Stretch)
+        columns.setSectionResizeMode(COST_COLUMN, QHeaderView.ResizeMode.Stretch)
+        columns.setSectionResizeMode(BUY_COLUMN, QHeaderView.ResizeMode.Fixed)
+        columns.resizeSection(BUY_COLUMN, 220)
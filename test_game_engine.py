@@ -0,0 +1,312 @@
+"""Properties of the Qt-free game engine.
+
+Run from the repository root:
+    python -m pytest -q
+"""
+import json
+import math
+import random
+
+import pytest
+
+from game_engine import (BUY_MAX, BigNumber, ClickerEngine, GrowthTable, InputRecorder, RPGEngine, TickDriver,
+                         Upgrade, UpgradeTable, add_exact, format_number, replay_recording)
+
+
+def make_clicker():
+    return ClickerEngine([Upgrade("Cursor", 10, 0.1, "", ""), Upgrade("Penny", 1, 0.01, "", "")], seed=1)
+
+
+def make_rpg():
+    return RPGEngine([Upgrade("Squire", 10, 0.1, "", ""), Upgrade("Knight", 50, 0.5, "", "", "Squire")],
+                     ["goblin", "orc", "troll"], seed=1)
+
+
+def with_production(engine, count=10):
+    """Give the engine `count` units of its first upgrade without spending anything"""
+    engine.upgrades[0].count = count
+    engine.recompute_production()
+    return engine
+
+
+def save_state(engine):
+    return json.dumps(engine.to_save_data(), sort_keys=True)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def growth_loop(start, steps):
+    """The values of a cost curve as the games computed them before GrowthTable"""
+    values = []
+    value = start
+    for _ in range(steps):
+        values.append(value)
+        value = int(value * 1.5)
+    return values
+
+
+@pytest.mark.parametrize("start", [1, 2, 3, 10, 15, 100, 12345])
+def test_growth_table_matches_loop(start):
+    table = GrowthTable(start)
+    values = growth_loop(start, 300)
+    assert [table.value(k) for k in range(300)] == values
+    for first in (0, 1, 7, 50):
+        for count in (0, 1, 2, 10, 100):
+            assert table.total(first, count) == sum(values[first:first + count])
+
+
+@pytest.mark.parametrize("start", [2, 10, 12345])
+def test_growth_table_max_count_is_largest_affordable(start):
+    table = GrowthTable(start)
+    values = growth_loop(start, 200)
+    for first in (0, 3, 40):
+        for budget in (0, start - 1, start, 1e6, 1e30):
+            count = table.max_count(first, budget)
+            assert sum(values[first:first + count]) <= budget < sum(values[first:first + count + 1])
+
+
+def test_growth_table_rejects_starts_below_one():
+    with pytest.raises(ValueError):
+        GrowthTable(0)
+
+
+def test_constant_growth_table_is_priced_in_closed_form():
+    # int(1 * 1.5) == 1, listing these one by one would take a step per unit
+    assert GrowthTable(1).max_count(0, 1e12) == 10 ** 12
+
+
+@pytest.mark.parametrize("name", ["Cursor", "Penny"])
+@pytest.mark.parametrize("currency", [0, 9, 10, 1234.5, 1e5])
+def test_buy_max_matches_buying_one_at_a_time(name, currency):
+    bulk = make_clicker()
+    bulk.currency = currency
+    bulk.buy(name, BUY_MAX)
+
+    single = make_clicker()
+    single.currency = currency
+    while single.buy(name, 1):
+        pass
+    for upgrade, expected in zip(bulk.upgrades, single.upgrades):
+        assert (upgrade.count, upgrade.cost, upgrade.total_spent) == (expected.count, expected.cost, expected.total_spent)
+        # Production adds base_production once per unit, so only the rounding differs
+        assert upgrade.production == pytest.approx(expected.production)
+    assert bulk.currency == single.currency
+
+
+def test_total_spent_stays_exact_past_float_precision():
+    engine = make_clicker()
+    cursor = engine.upgrades["Cursor"]
+    cursor.total_spent = 2 ** 60 + 1
+    engine.currency = 100
+    engine.buy("Cursor")
+    assert cursor.total_spent == 2 ** 60 + 11
+    cursor.total_spent = 10 ** 400
+    assert format_number(cursor.total_spent, 0) == "1.00e400"
+
+
+def make_tree():
+    """Wood unlocks Axe and Saw, Axe unlocks Cabin"""
+    return ClickerEngine([Upgrade("Wood", 1, 1, "", ""), Upgrade("Axe", 2, 1, "", "", "Wood"),
+                          Upgrade("Cabin", 3, 1, "", "", "Axe"), Upgrade("Saw", 4, 1, "", "", "Wood")], seed=1)
+
+
+def test_first_purchase_unlocks_only_direct_dependents():
+    engine = make_tree()
+    upgrades = engine.upgrades
+    assert [upgrades[i].name for i in upgrades.dependents[upgrades.indexes["Wood"]]] == ["Axe", "Saw"]
+    assert upgrades.dependents[upgrades.indexes["Cabin"]] == []
+    assert upgrades.available().tolist() == [True, False, False, False]
+
+    engine.currency = 100
+    engine.buy("Wood")
+    engine.buy("Wood")
+    # Only the first unit reports a purchase that can unlock anything
+    assert [event for event in engine.pop_events() if event[0] == "first_purchase"] == [("first_purchase", "Wood")]
+    assert upgrades.available().tolist() == [True, True, False, True]
+    assert [engine.is_available(upgrade) for upgrade in upgrades] == [True, True, False, True]
+
+
+def test_unknown_required_upgrade_is_rejected():
+    with pytest.raises(ValueError, match="Missing"):
+        UpgradeTable([Upgrade("Wood", 1, 1, "", ""), Upgrade("Axe", 2, 1, "", "", "Missing")])
+
+
+def level_loop(xp):
+    """(level, xp needed, xp left) as the games computed them before GrowthTable"""
+    level, needed, left = 1, 100, xp
+    while left >= needed:
+        left -= needed
+        level += 1
+        needed = int(needed * 1.5)
+    return level, needed, left
+
+
+@pytest.mark.parametrize("xp", [0, 99, 100, 250, 1e4, 1e9, 1e30])
+def test_level_ups_match_baseline_loop(xp):
+    engine = make_rpg()
+    engine.currency = xp
+    engine.resolve_level_ups()
+
+    level, needed, left = level_loop(xp)
+    assert (engine.player_level, engine.xp_to_next_level) == (level, needed)
+    assert engine.currency == pytest.approx(left)
+
+
+@pytest.mark.parametrize("damage", [1, 99, 100, 101, 250, 5e6])
+def test_bulk_damage_matches_repeated_damage(damage):
+    bulk = make_rpg()
+    kills = bulk.damage_enemy(damage)
+
+    single = make_rpg()
+    single_kills = 0
+    left = damage
+    while left > 0:
+        chunk = min(left, 37)
+        single_kills += single.damage_enemy(chunk)
+        left -= chunk
+    assert (kills, bulk.enemies_defeated, bulk.enemy_hp) == (single_kills, single_kills, single.enemy_hp)
+    assert sum(stats["defeats"] for stats in bulk.enemy_stats.values()) == kills
+    if kills:
+        assert bulk.pop_events()[-1] == ("enemy_defeated", "goblin", False, kills, bulk.last_defeated_ids)
+
+
+def test_bulk_kills_sample_a_bounded_number_of_enemies():
+    engine = RPGEngine([], [f"enemy-{i}" for i in range(100)], seed=1)
+    kills = engine.damage_enemy(1e8)
+    assert kills == 10 ** 6
+    # The enemy that fell first plus at most defeat_sample_size others
+    assert len(engine.last_defeated_ids) <= engine.defeat_sample_size + 1
+    assert set(engine.last_defeated_ids) == set(engine.enemy_stats)
+    assert sum(stats["defeats"] for stats in engine.enemy_stats.values()) == kills
+
+
+def test_bulk_damage_past_float_range():
+    engine = make_rpg()
+    kills = engine.damage_enemy(BigNumber(1.0, 1100))
+    # Exact to float precision, the damage itself has no more
+    assert abs(kills - 2 ** 1100 // 100) < 2 ** 1100 // 100 >> 50
+    assert engine.enemy_hp == engine.max_hp
+
+
+@pytest.mark.parametrize("steps, calls", [(1, 1), (40, 40), (41, 1), (400, 1)])
+def test_tick_driver_catches_up_step_by_step_then_in_one_tick(steps, calls):
+    clock = FakeClock()
+    engine = with_production(make_clicker())
+    driver = TickDriver(engine, step=0.25, max_catch_up=40, clock=clock)
+    ticks = []
+    tick = engine.tick
+    engine.tick = lambda dt: ticks.append(dt) or tick(dt)
+
+    clock.now += steps * 0.25 + 0.1
+    driver.update()
+    assert len(ticks) == calls and sum(ticks) == steps * 0.25
+    assert driver.accumulator == pytest.approx(0.1)
+
+
+def test_tick_driver_long_gap_matches_small_steps():
+    clock = FakeClock()
+    gap = make_clicker()
+    gap_driver = TickDriver(with_production(gap), clock=clock)
+    steady = make_clicker()
+    steady_driver = TickDriver(with_production(steady), clock=clock)
+
+    for _ in range(400):
+        clock.now += 0.25
+        steady_driver.update()
+    gap_driver.update()
+    assert gap.currency == pytest.approx(steady.currency) == 100
+    assert gap.total_currency == pytest.approx(steady.total_currency)
+
+
+@pytest.mark.parametrize("seconds", [0, 50, 3600, 86400 * 365])
+def test_offline_progress_matches_one_long_tick(seconds):
+    away = with_production(make_rpg())
+    summary = away.advance_offline(seconds)
+    ticked = with_production(make_rpg())
+    ticked.tick(seconds)
+
+    assert summary["earned"] == ticked.total_currency
+    assert summary["enemies_defeated"] == ticked.enemies_defeated == away.enemies_defeated
+    assert (away.player_level, away.currency) == (ticked.player_level, ticked.currency)
+    level, needed, left = level_loop(seconds)
+    assert summary["levels"] == level - 1
+    assert (away.player_level, away.xp_to_next_level) == (level, needed)
+    assert away.enemies_defeated == seconds // 100
+
+
+@pytest.mark.parametrize("make_engine", [make_clicker, make_rpg])
+def test_replay_reproduces_the_recorded_save(make_engine):
+    now = [1000.0]
+    recorder = InputRecorder(clock=lambda: now[0])
+    engine = make_engine()
+    recorder.attach(engine)
+    jitter = random.Random(2)
+    first_upgrade = engine.upgrades[0].name
+    for step in range(3000):
+        now[0] += 0.25 + jitter.uniform(-0.02, 0.03)
+        engine.tick(0.25)
+        if step % 40 == 0:
+            engine.click()
+            engine.buy(first_upgrade, BUY_MAX)
+        if step == 2000:
+            # A long pause is applied as one big tick
+            now[0] += 60
+            engine.tick(60.0)
+    recording = json.loads(json.dumps(recorder.snapshot()))
+
+    assert save_state(replay_recording(recording)) == save_state(engine)
+    # Idle ticks are run-length encoded
+    assert len(recording["entries"]) < 500
+
+
+def test_buying_past_float_range_is_all_or_nothing():
+    engine = make_clicker()
+    engine.currency = BigNumber(1.0, 1030)
+    count, price = engine.buy("Cursor", BUY_MAX)
+    assert count > 0 and math.isfinite(float(price))
+
+    before = save_state(engine), engine.currency
+    assert engine.buy("Cursor", 1) is None
+    assert (save_state(engine), engine.currency) == before
+    assert engine.quote(engine.upgrades["Cursor"], 100)[1] == math.inf
+    assert format_number(math.inf, 0) == "inf"
+
+
+def test_production_past_float_range_becomes_big_number():
+    engine = make_clicker()
+    engine.production_total = 1e300
+    engine.advance_offline(1e10)
+    engine.tick(0.25)
+    assert isinstance(engine.currency, BigNumber)
+    assert format_number(engine.currency) == "1.00e310"
+
+
+def test_small_increments_past_float_precision_add_up():
+    engine = make_clicker()
+    engine.currency = engine.total_currency = 2.0 ** 60
+    for _ in range(1000):
+        engine.earn(0.25)
+    for total, remainder in ((engine.currency, engine.currency_remainder),
+                             (engine.total_currency, engine.total_remainder)):
+        assert total > 2.0 ** 60
+        assert int(total) - 2 ** 60 + remainder == 250
+    assert add_exact(1.0, 0.0, 2.0 ** -60) == (1.0, 2.0 ** -60)
+
+
+@pytest.mark.parametrize("value, text", [(999999.94, "999,999.9"), (999999.96, "1.00 M"),
+                                         (BigNumber(999999.96), "1.00 M"), (1234567, "1.23 M")])
+def test_format_number_rounds_before_switching_to_short_scale(value, text):
+    assert format_number(value) == text
+
+
+def test_amounts_stay_floats_below_overflow():
+    engine = make_clicker()
+    engine.production_total = 1e18
+    engine.tick(100.0)
+    assert isinstance(engine.currency, float)
@@ -0,0 +1,69 @@
+"""Row updates reported by the upgrade shop model.
+
+Run from the repository root:
+    python -m pytest -q
+"""
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+
+from game_engine import ClickerEngine, Upgrade
+from shop_model import ShopModel
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def shop(app):
+    """A model over Wood, which unlocks Axe and Saw, and Axe, which unlocks Cabin"""
+    engine = ClickerEngine([Upgrade("Wood", 1, 1, "", ""), Upgrade("Axe", 2, 1, "", "", "Wood"),
+                            Upgrade("Cabin", 3, 1, "", "", "Axe"), Upgrade("Saw", 4, 1, "", "", "Wood")], seed=1)
+    engine.currency = 1000
+    model = ShopModel(engine)
+    model.set_listed(engine.upgrades.available())
+    changes = []
+    model.dataChanged.connect(lambda top_left, bottom_right: changes.append((top_left.row(), bottom_right.row())))
+    return engine, model, changes
+
+
+def test_refresh_reports_nothing_when_nothing_changed(shop):
+    engine, model, changes = shop
+    model.refresh()
+    assert changes == [] and model.changed_rows == 0
+
+
+def test_purchase_reports_only_its_row(shop):
+    engine, model, changes = shop
+    engine.buy("Wood")
+    model.refresh()
+    assert changes == [(0, 0)]
+
+
+def test_first_purchase_inserts_only_direct_dependents(shop):
+    engine, model, changes = shop
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append(first))
+    engine.buy("Wood")
+    assert model.show_upgrades(engine.upgrades.dependents[0])
+    assert inserted == [1, 2]
+    assert [engine.upgrades[index].name for index in model.rows] == ["Wood", "Axe", "Saw"]
+    # Listing them again inserts nothing
+    assert not model.show_upgrades(engine.upgrades.dependents[0])
+
+
+def test_running_out_of_currency_reports_the_disabled_rows(shop):
+    engine, model, changes = shop
+    engine.buy("Wood")
+    model.show_upgrades(engine.upgrades.dependents[0])
+    model.refresh()
+    changes.clear()
+
+    engine.currency = 1.5  # Still pays for Wood, no longer for Axe or Saw
+    model.refresh()
+    assert sorted(changes) == [(1, 1), (2, 2)]
@@ -0,0 +1,44 @@
+"""Remembers what the game windows last pushed into their widgets.
+
+update_display() runs on every click and tick but usually only changes the
+currency label. Writing through a ViewState skips setters whose value did
+not change, so Qt only lays out and repaints the widgets that really changed.
+"""
+
+MISSING = object()
+
+
+class ViewState:
+    """Last value per (widget, setter), with counters of the updates issued per refresh"""
+
+    def __init__(self):
+        self.values = {}
+        # Counters of the current (or last finished) refresh and of all refreshes
+        self.updates = 0
+        self.skipped = 0
+        self.refreshes = 0
+        self.total_updates = 0
+        self.total_skipped = 0
+
+    def set_text(self, widget, text):
+        return self.push(widget, "setText", text)
+
+    def push(self, widget, setter, value):
+        """Call widget.setter(value) unless that is what it was last given, return whether it was called"""
+        key = (widget, setter)
+        if self.values.get(key, MISSING) == value:
+            self.skipped += 1
+            return False
+        self.values[key] = value
+        getattr(widget, setter)(value)
+        self.updates += 1
+        return True
+
+    def begin_refresh(self):
+        self.updates = 0
+        self.skipped = 0
+
+    def end_refresh(self):
+        self.refreshes += 1
+        self.total_updates += self.updates
+        self.total_skipped += self.skipped